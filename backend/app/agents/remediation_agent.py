@@ -1,24 +1,66 @@
 import asyncio
 import logging
 import json
-from typing import List
-from app.models.schemas import AgentFinding, VulnerabilitySeverity
+from typing import List, Dict, Any, Optional
+from app.core.config import settings
+from app.models.schemas import AgentFinding
 from app.services.ai_service import ai_service
+from app.services.remediation_cache import remediation_cache, finding_fingerprint
 
 logger = logging.getLogger(__name__)
 
+AGENT_NAME = "Remediation Engineer"
+
 class RemediationAgent:
     """
     The Engineer (Remediation): Suggests fixes.
     Takes findings from other agents and generates concrete code patches or config changes.
+    Plans are cached by finding fingerprint; only uncached findings go to the LLM.
     """
     async def analyze(self, findings: List[AgentFinding]) -> List[AgentFinding]:
         if not findings:
             return []
-            
+
+        if not settings.REMEDIATION_CACHE_ENABLED:
+            plans = await self._generate(findings)
+            return [self._to_finding(f, p) for f, p in zip(findings, plans) if p]
+
+        keys = [finding_fingerprint(f) for f in findings]
+        plans: List[Optional[Dict[str, Any]]] = [remediation_cache.get(k) for k in keys]
+
+        # One LLM entry per distinct uncached fingerprint
+        pending: Dict[str, int] = {}
+        for i, (key, plan) in enumerate(zip(keys, plans)):
+            if plan is None and key not in pending:
+                pending[key] = i
+        if pending:
+            generated = await self._generate([findings[i] for i in pending.values()])
+            fresh = {}
+            for key, plan in zip(pending, generated):
+                if plan:
+                    remediation_cache.put(key, plan)
+                    fresh[key] = plan
+            plans = [plan or fresh.get(key) for key, plan in zip(keys, plans)]
+            logger.info(f"Remediation: {len(findings) - len(pending)} cached, {len(pending)} generated")
+
+        return [self._to_finding(f, p) for f, p in zip(findings, plans) if p]
+
+    @staticmethod
+    def _to_finding(original: AgentFinding, plan: Dict[str, Any]) -> AgentFinding:
+        return AgentFinding(
+            agent_name=AGENT_NAME,
+            finding_type=plan.get("finding_type") or f"Remediation Plan: {original.finding_type}",
+            description=plan.get("description", ""),
+            severity=original.severity,
+            location=original.location or "System",
+            suggestion=plan.get("suggestion", "")
+        )
+
+    async def _generate(self, findings: List[AgentFinding]) -> List[Optional[Dict[str, Any]]]:
+        """Remediation plans aligned with `findings` (None where the model returned nothing)."""
         # Convert findings to string for context
-        findings_context = json.dumps([f.dict() for f in findings], default=str)
-        
+        findings_context = json.dumps([{"index": i, **f.dict()} for i, f in enumerate(findings)], default=str)
+
         system_prompt = """
         You are an expert Security Engineer Agent (The Fixer).
         Your goal is to review security findings and generate concrete, actionable remediation plans.
@@ -29,12 +71,14 @@ class RemediationAgent:
         - Prioritization of fixes based on impact/effort.
 
         For each finding provided, generate a detailed remediation entry.
+        Set "index" to the index of the finding it remediates.
         """
-        
+
         response_schema = """
         {
             "findings": [
                 {
+                    "index": integer (index of the original finding),
                     "finding_type": "string (Remediation Plan: [Original Finding Name])",
                     "description": "string (Actionable steps to fix)",
                     "severity": "string (Same as original)",
@@ -44,27 +88,29 @@ class RemediationAgent:
             ]
         }
         """
-        
+
+        plans: List[Optional[Dict[str, Any]]] = [None] * len(findings)
         try:
             results = await ai_service.analyze_content(system_prompt, findings_context, response_schema)
-            
-            remediation_findings = []
+
             if results and isinstance(results, list) and len(results) > 0:
                 items = results
                 if isinstance(results[0], dict) and "findings" in results[0]:
                     items = results[0]["findings"]
-                    
-                for item in items:
-                    remediation_findings.append(AgentFinding(
-                        agent_name="Remediation Engineer",
-                        finding_type=item.get("finding_type", "Remediation Plan"),
-                        description=item.get("description", ""),
-                        severity=VulnerabilitySeverity(item.get("severity", "info").lower()),
-                        location=item.get("location", "System"),
-                        suggestion=item.get("suggestion", "")
-                    ))
-            
-            return remediation_findings
+
+                for pos, item in enumerate(items):
+                    if not isinstance(item, dict):
+                        continue
+                    idx = item.get("index", pos)
+                    if not isinstance(idx, int) or not 0 <= idx < len(findings) or plans[idx] is not None:
+                        idx = pos
+                    if idx >= len(findings):
+                        continue
+                    plans[idx] = {
+                        "finding_type": item.get("finding_type", "Remediation Plan"),
+                        "description": item.get("description", ""),
+                        "suggestion": item.get("suggestion", ""),
+                    }
         except Exception as e:
             logger.error(f"Remediation analysis failed: {e}")
-            return []
+        return plans
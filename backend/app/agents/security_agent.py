@@ -1,16 +1,22 @@
 import logging
-from typing import List
-from app.models.schemas import AgentFinding, VulnerabilitySeverity
-from app.services.ai_service import ai_service
+from typing import List, Optional
+from app.models.schemas import AgentFinding
+from app.agents.streaming import ContentAgent, FindingCallback
 
 logger = logging.getLogger(__name__)
 
-class SecurityAgent:
+class SecurityAgent(ContentAgent):
     """
     The Logic Auditor (The Pentester): The 'Specialist'.
     Looks for vulnerabilities in code (SQLi, XSS, Logic bugs).
     """
-    async def analyze(self, content: str) -> List[AgentFinding]:
+    AGENT_NAME = "Logic Auditor"
+    DEFAULT_FINDING_TYPE = "Security Vulnerability"
+    DEFAULT_LOCATION = "Codebase"
+
+    async def analyze(
+        self, content: str, escalate: bool = False, on_finding: Optional[FindingCallback] = None
+    ) -> List[AgentFinding]:
         system_prompt = """
         You are an expert Security Audit Agent (The Logic Auditor).
         Your goal is to analyze code snippets and identify security vulnerabilities.
@@ -44,25 +50,7 @@ class SecurityAgent:
         """
         
         try:
-            results = await ai_service.analyze_content(system_prompt, content, response_schema)
-            
-            findings = []
-            if results and isinstance(results, list) and len(results) > 0:
-                items = results
-                if isinstance(results[0], dict) and "findings" in results[0]:
-                    items = results[0]["findings"]
-                    
-                for item in items:
-                    findings.append(AgentFinding(
-                        agent_name="Logic Auditor",
-                        finding_type=item.get("finding_type", "Security Vulnerability"),
-                        description=item.get("description", ""),
-                        severity=VulnerabilitySeverity(item.get("severity", "medium").lower()),
-                        location=item.get("location", "Codebase"),
-                        suggestion=item.get("suggestion", "")
-                    ))
-            
-            return findings
+            return await self._run(system_prompt, content, response_schema, escalate, on_finding)
         except Exception as e:
             logger.error(f"Security analysis failed: {e}")
             return []
@@ -1,16 +1,22 @@
 import logging
-from app.models.schemas import AgentFinding, VulnerabilitySeverity
-from typing import List
-from app.services.ai_service import ai_service
+from app.models.schemas import AgentFinding
+from typing import List, Optional
+from app.agents.streaming import ContentAgent, FindingCallback
 
 logger = logging.getLogger(__name__)
 
-class SOCIntelligenceAgent:
+class SOCIntelligenceAgent(ContentAgent):
     """
     The Detective (SOC Analyst): Analysis logs and traffic.
     Correlates disparate events to find complex attack patterns.
     """
-    async def analyze(self, content: str) -> List[AgentFinding]:
+    AGENT_NAME = "SOC Intelligence"
+    DEFAULT_FINDING_TYPE = "Security Incident"
+    DEFAULT_LOCATION = "Logs"
+
+    async def analyze(
+        self, content: str, escalate: bool = False, on_finding: Optional[FindingCallback] = None
+    ) -> List[AgentFinding]:
         system_prompt = """
         You are an expert SOC Analyst Agent (The Detective).
         Your goal is to analyze logs, alert streams, and network traffic data to identify security incidents.
@@ -43,25 +49,7 @@ class SOCIntelligenceAgent:
         """
         
         try:
-            results = await ai_service.analyze_content(system_prompt, content, response_schema)
-            
-            findings = []
-            if results and isinstance(results, list) and len(results) > 0:
-                items = results
-                if isinstance(results[0], dict) and "findings" in results[0]:
-                    items = results[0]["findings"]
-                    
-                for item in items:
-                    findings.append(AgentFinding(
-                        agent_name="SOC Intelligence",
-                        finding_type=item.get("finding_type", "Security Incident"),
-                        description=item.get("description", ""),
-                        severity=VulnerabilitySeverity(item.get("severity", "medium").lower()),
-                        location=item.get("location", "Logs"),
-                        suggestion=item.get("suggestion", "")
-                    ))
-            
-            return findings
+            return await self._run(system_prompt, content, response_schema, escalate, on_finding)
         except Exception as e:
             logger.error(f"SOC analysis failed: {e}")
             return []
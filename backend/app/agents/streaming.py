@@ -0,0 +1,87 @@
+"""
+Finding conversion and the streaming path shared by the content agents.
+When streaming, findings are converted and handed to `on_finding` as soon as
+the model closes each array element, instead of after the whole completion.
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.models.schemas import AgentFinding, normalize_severity
+from app.services.ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+FindingCallback = Callable[[AgentFinding], Awaitable[None]]
+
+
+async def stream_agent_findings(
+    system_prompt: str,
+    content: str,
+    response_schema: str,
+    escalate: bool,
+    to_finding: Callable[[Dict[str, Any]], AgentFinding],
+    on_finding: FindingCallback,
+) -> List[AgentFinding]:
+    """All findings of the streamed analysis; each is passed to `on_finding` as it arrives."""
+    findings: List[AgentFinding] = []
+    async for item in ai_service.stream_findings(system_prompt, content, response_schema, escalate=escalate):
+        if not isinstance(item, dict):
+            continue
+        try:
+            finding = to_finding(item)
+        except Exception as e:
+            logger.warning(f"Skipping malformed streamed finding: {e}")
+            continue
+        findings.append(finding)
+        try:
+            await on_finding(finding)
+        except Exception as e:
+            logger.error(f"on_finding callback failed: {e}")
+    return findings
+
+
+class ContentAgent:
+    """Base of the Threat/Security/SOC agents: model items -> findings, streamed or in one response."""
+
+    AGENT_NAME = ""
+    DEFAULT_FINDING_TYPE = ""
+    DEFAULT_LOCATION = ""
+
+    def _to_finding(self, item: Dict[str, Any]) -> AgentFinding:
+        return AgentFinding(
+            agent_name=self.AGENT_NAME,
+            finding_type=item.get("finding_type", self.DEFAULT_FINDING_TYPE),
+            description=item.get("description", ""),
+            severity=normalize_severity(item.get("severity")),
+            location=item.get("location", self.DEFAULT_LOCATION),
+            suggestion=item.get("suggestion", "")
+        )
+
+    async def _run(
+        self,
+        system_prompt: str,
+        content: str,
+        response_schema: str,
+        escalate: bool,
+        on_finding: Optional[FindingCallback],
+    ) -> List[AgentFinding]:
+        if on_finding is not None:
+            return await stream_agent_findings(
+                system_prompt, content, response_schema, escalate, self._to_finding, on_finding
+            )
+
+        results = await ai_service.analyze_content(
+            system_prompt, content, response_schema, escalate=escalate, escalate_on_severity=True
+        )
+        findings = []
+        if results and isinstance(results, list) and len(results) > 0:
+            # Handle root object being the list or wrapped in "findings" key
+            items = results
+            if isinstance(results[0], dict) and "findings" in results[0]:
+                items = results[0]["findings"]
+
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                findings.append(self._to_finding(item))
+        return findings
@@ -1,16 +1,22 @@
 import logging
-from typing import List
-from app.models.schemas import AgentFinding, VulnerabilitySeverity
-from app.services.ai_service import ai_service
+from typing import List, Optional
+from app.models.schemas import AgentFinding
+from app.agents.streaming import ContentAgent, FindingCallback
 
 logger = logging.getLogger(__name__)
 
-class ThreatAgent:
+class ThreatAgent(ContentAgent):
     """
     The Architect (Threat Modeler): Analyzes system designs.
     Identifies 'Trust Boundaries'—wherever user data meets a sensitive trading engine.
     """
-    async def analyze(self, content: str) -> List[AgentFinding]:
+    AGENT_NAME = "Threat Modeler"
+    DEFAULT_FINDING_TYPE = "Unknown Threat"
+    DEFAULT_LOCATION = "Architecture"
+
+    async def analyze(
+        self, content: str, escalate: bool = False, on_finding: Optional[FindingCallback] = None
+    ) -> List[AgentFinding]:
         system_prompt = """
         You are an expert Threat Modeling Agent (The Architect).
         Your goal is to analyze system architecture descriptions and identify security design flaws.
@@ -43,26 +49,7 @@ class ThreatAgent:
         """
         
         try:
-            results = await ai_service.analyze_content(system_prompt, content, response_schema)
-            
-            findings = []
-            if results and isinstance(results, list) and len(results) > 0:
-                # Handle root object being the list or wrapped in "findings" key
-                items = results
-                if isinstance(results[0], dict) and "findings" in results[0]:
-                    items = results[0]["findings"]
-                
-                for item in items:
-                    findings.append(AgentFinding(
-                        agent_name="Threat Modeler",
-                        finding_type=item.get("finding_type", "Unknown Threat"),
-                        description=item.get("description", ""),
-                        severity=VulnerabilitySeverity(item.get("severity", "medium").lower()),
-                        location=item.get("location", "Architecture"),
-                        suggestion=item.get("suggestion", "")
-                    ))
-            
-            return findings
+            return await self._run(system_prompt, content, response_schema, escalate, on_finding)
         except Exception as e:
             logger.error(f"Threat analysis failed: {e}")
             return []
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, HTTPException, WebSocket, UploadFile, File, BackgroundTasks
-from typing import List, Optional
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, WebSocket, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
 from app.core.config import settings
-from app.services.slack_service import send_soc_alert
-from app.services.slack_formatter import build_soc_alert
-from app.services.escalation_policy import should_notify_slack
+from app.services.slack_dispatcher import slack_dispatcher
+from app.services.alert_suppression import alert_suppression
+from app.services.escalation_policy import EscalationPolicy, should_notify_slack
+from app.services.policy_replay import load_history, replay
 from app.models.schemas import (
     AnalysisRequest, SecurityReport, AgentFinding,
     PDFBase64Request, PDFUrlRequest, GitHubArtifactRequest,
@@ -15,15 +15,34 @@ from app.agents.threat_agent import ThreatAgent
 from app.agents.security_agent import SecurityAgent
 from app.agents.soc_intelligence_agent import SOCIntelligenceAgent
 from app.agents.risk_agent import RiskAgent
-from app.agents.remediation_agent import RemediationAgent
+from app.agents.remediation_agent import RemediationAgent, AGENT_NAME as REMEDIATION_AGENT_NAME
+from app.agents.streaming import FindingCallback
 from app.services.pdf_extractor import extract_from_bytes, extract_from_url, pdf_to_agent_content
 from app.services.github_fetcher import fetch_github_artifact, github_to_agent_content
 from app.services.ml_analytics import run_ml_analytics
+from app.services.near_duplicate import near_duplicates
+from app.services.triage import triage_content
+from app.services.content_router import route_content
+from app.services.log_templates import mine_logs
+from app.services.finding_dedup import dedupe_findings
+from app.services.remediation_cache import remediation_cache
+from app.services.remediation_jobs import remediation_jobs
+from app.services.ai_service import ai_service
+from app.services.audit_writer import audit_writer
+from app.services.history_cache import history_cache
+from app.db.audit_store import HistoryQuery, decode_cursor, encode_cursor, get_audit_store
+from app.db.report_store import report_store
+from app.db.risk_rollups import GRANULARITIES, summarize, trend_series, window_bounds
+from app.services.degraded_analysis import REVIEW_REQUIRED, RISK_SIGNAL_TYPES, degraded_assessment, local_risk_evaluation
 import asyncio
 import base64
+import json
+import logging
 import uuid
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 threat_agent = ThreatAgent()
@@ -31,6 +50,7 @@ security_agent = SecurityAgent()
 soc_agent = SOCIntelligenceAgent()
 risk_agent = RiskAgent()
 remediation_agent = RemediationAgent()
+content_agents = {"threat": threat_agent, "security": security_agent, "soc": soc_agent}
 
 
 def _add_derived_from(findings: List[AgentFinding], label: Optional[str]) -> List[AgentFinding]:
@@ -50,31 +70,158 @@ async def _run_full_analysis(
     artifact_id: str,
     artifact_origin: Optional[str] = None,
     ml_output: Optional[dict] = None,
+    views: Optional[dict] = None,
+    on_finding: Optional[FindingCallback] = None,
 ) -> SecurityReport:
-    """Core analysis pipeline: all agents + optional ML signals."""
-    results = await asyncio.gather(
-        threat_agent.analyze(content),
-        security_agent.analyze(content),
-        soc_agent.analyze(content),
+    """
+    Core analysis pipeline: content agents + remediation + risk, with optional ML signals.
+    `views` maps agent key -> content slice; agents with an empty view are skipped.
+    With `on_finding`, content agents stream and each finding is passed on as it arrives.
+    """
+    fingerprint = (ml_output or {}).get("fingerprint")
+    hit = await _find_prior_report(fingerprint)
+    if hit:
+        report = _reuse_report(hit[0], hit[1], artifact_id, ml_output)
+        # Re-submissions still count in history, trends and alerting, marked as reused
+        pipeline = dict(report.pipeline or {})
+        _log_and_alert(
+            artifact_id, artifact_origin,
+            {"overall_score": report.overall_score, "summary": report.summary, "status": report.status},
+            report.findings, ml_output, fingerprint, pipeline, reused_from=hit[0].id,
+        )
+        report.pipeline = pipeline
+        if settings.REPORT_STORE_ENABLED:
+            await report_store.save(report)
+        return report
+
+    pipeline: dict = {}
+    missing_agents: List[str] = []
+    failed_agents: List[str] = []
+    remediation_status = None
+    results: List[List[AgentFinding]] = []
+    # While the LLM circuit is open, skip the agents and serve a local-only report
+    degraded = not ai_service.breaker.allow_request()
+    if not degraded:
+        if views is None or not any(views.values()):
+            views = {agent: content for agent in content_agents}
+        views = {agent: text for agent, text in views.items() if text}
+        pipeline["routing"] = {
+            "agents_run": list(views),
+            "agents_skipped": [a for a in content_agents if a not in views],
+        }
+        if settings.TRIAGE_ENABLED:
+            views, pipeline["triage"] = _triage_views(views)
+
+        # High ML risk skips the fast tier of the model cascade. So does a stream that can fire
+        # an early alert: streamed findings get no strong-tier confirmation afterwards
+        escalate = _ml_risk(ml_output) >= settings.CASCADE_ML_RISK_THRESHOLD or (
+            on_finding is not None and settings.EARLY_CRITICAL_ALERTS
+        )
+        agent_callback = _streaming_callback(on_finding, artifact_origin, ml_output, pipeline) if on_finding else None
+        outcomes = await asyncio.gather(*(
+            _with_deadline(
+                ai_service.run_tracked(content_agents[agent].analyze(text, escalate=escalate, on_finding=agent_callback)),
+                agent, missing_agents, ([], []),
+            )
+            for agent, text in views.items()
+        ))
+        # Each agent is judged by its own LLM calls: a failed one returned an outage, not a clean bill
+        for agent, (findings, failures) in zip(views, outcomes):
+            results.append(findings)
+            if failures:
+                failed_agents.append(agent)
+        if failed_agents:
+            pipeline["failed_agents"] = failed_agents
+        degraded = len(failed_agents) == len(views)
+
+    if degraded:
+        all_findings, risk_evaluation = degraded_assessment(content, ml_output)
+        all_findings = _add_derived_from(all_findings, artifact_origin)
+        risk_input = list(all_findings)
+        missing_agents = []
+    else:
+        all_findings = []
+        for res in results:
+            all_findings.extend(_add_derived_from(res, artifact_origin))
+        if failed_agents:
+            # Local secret scan and ML signals stand in for the agents that failed
+            missing_agents.extend(failed_agents)
+            local_findings, _ = degraded_assessment(content, ml_output)
+            all_findings.extend(_add_derived_from(local_findings, artifact_origin))
+            degraded = True
+
+        # Agent votes use every agent's own findings; downstream agents get the merged set
+        risk_input = list(all_findings)
+        merged_findings = all_findings
+        if settings.FINDING_DEDUP_ENABLED:
+            merged_findings, pipeline["dedup"] = dedupe_findings(all_findings, settings.FINDING_DEDUP_SIMILARITY)
+
+        remediation_status = settings.REMEDIATION_MODE
+        if remediation_status == "inline":
+            # Remediation and risk both only need the merged findings
+            remediation_findings, (risk_evaluation, risk_degraded) = await asyncio.gather(
+                _with_deadline(remediation_agent.analyze(merged_findings), "remediation", missing_agents, []),
+                _assess_risk(merged_findings, missing_agents, pipeline),
+            )
+            if remediation_findings:
+                all_findings.extend(_add_derived_from(remediation_findings, artifact_origin))
+        else:
+            async def build_remediation() -> List[AgentFinding]:
+                findings = _add_derived_from(await remediation_agent.analyze(merged_findings), artifact_origin)
+                if settings.REPORT_STORE_ENABLED:
+                    await asyncio.to_thread(report_store.attach_remediation, artifact_id, findings)
+                return findings
+
+            remediation_jobs.register(artifact_id, build_remediation, start=remediation_status == "background")
+            remediation_status = remediation_jobs.status(artifact_id)
+            risk_evaluation, risk_degraded = await _assess_risk(merged_findings, missing_agents, pipeline)
+        degraded = degraded or risk_degraded
+
+        # A content agent that timed out or failed hasn't reviewed the artifact: never GO
+        if risk_evaluation.get("status") == "GO" and any(a in content_agents for a in missing_agents):
+            risk_evaluation = {**risk_evaluation, "status": REVIEW_REQUIRED}
+
+    _log_and_alert(artifact_id, artifact_origin, risk_evaluation, risk_input, ml_output, fingerprint, pipeline)
+
+    report = SecurityReport(
+        id=artifact_id,
+        timestamp=datetime.utcnow(),
+        overall_score=risk_evaluation.get("overall_score", 0),
+        findings=all_findings,
+        summary=risk_evaluation.get("summary", "Analysis complete."),
+        status=risk_evaluation.get("status", "NO-GO"),
+        ml_signals=ml_output,
+        pipeline=pipeline,
+        remediation_status=remediation_status,
+        partial=bool(missing_agents),
+        missing_agents=missing_agents or None,
+        degraded=degraded,
     )
-    all_findings = []
-    for res in results:
-        all_findings.extend(_add_derived_from(res, artifact_origin))
-
-    remediation_findings = await remediation_agent.analyze(all_findings)
-    if remediation_findings:
-        all_findings.extend(_add_derived_from(remediation_findings, artifact_origin))
+    # A degraded or partial report must not stand in for a full analysis of a near-duplicate later
+    if fingerprint and settings.NEAR_DUP_ENABLED and not degraded and not missing_agents:
+        near_duplicates.remember(fingerprint, report)
+    if settings.REPORT_STORE_ENABLED:
+        await report_store.save(report)
+    return report
 
-    risk_input = [f for f in all_findings if f.agent_name != "Remediation Engineer"]
-    risk_evaluation = await risk_agent.analyze(risk_input)
 
-    # Slack notification after risk decision (failure must not affect API response)
+def _log_and_alert(
+    artifact_id: str,
+    artifact_origin: Optional[str],
+    risk_evaluation: dict,
+    risk_input: List[AgentFinding],
+    ml_output: Optional[dict],
+    fingerprint: Optional[dict],
+    pipeline: dict,
+    reused_from: Optional[str] = None,
+) -> None:
+    """Audit-log the outcome, then Slack-notify per the escalation policy (failures must not affect the API response)."""
     vulnerability_record = None  # Track for alert logging
     try:
         score = risk_evaluation.get("overall_score", 100)
         status = risk_evaluation.get("status", "GO")
         risk_level = "CRITICAL" if score < 40 else "HIGH" if score < 60 else "MEDIUM" if score < 80 else "LOW"
-        if status == "NO-GO" and risk_level == "LOW":
+        if status != "GO" and risk_level == "LOW":
             risk_level = "MEDIUM"
         consensus = {}
         for f in risk_input:
@@ -96,57 +243,232 @@ async def _run_full_analysis(
             summary=risk_evaluation.get("summary", "N/A"),
             status=status,
             overall_score=score,
+            reused_from=reused_from,
         )
         
-        if should_notify_slack(risk_level, avg_conf, consensus):
-            msg = build_soc_alert(
+        early_alert = pipeline.get("early_alert")
+        if early_alert is not None and risk_level == "CRITICAL":
+            # The streamed critical finding already went through admit(); this would repeat it
+            pipeline["alert_suppressed"] = {"risk": risk_level, "reason": "early_alert"}
+            if early_alert.get("sent") and vulnerability_record and vulnerability_record.get("id"):
+                log_alert(vulnerability_record["id"], channel="slack")
+            return
+
+        notify = should_notify_slack(risk_level, avg_conf, consensus)
+        repeats = 0
+        if notify and settings.ALERT_SUPPRESSION_ENABLED:
+            notify, repeats = alert_suppression.admit(fingerprint, risk_level)
+            if not notify:
+                pipeline["alert_suppressed"] = {"risk": risk_level, "repeats": repeats}
+        if notify:
+            summary = risk_evaluation.get("summary", "N/A")
+            if repeats:
+                summary += f"\n_{repeats} repeat alert(s) for this artifact were suppressed since the last one._"
+            queued = slack_dispatcher.enqueue_alert(
                 artifact_type="analysis",
                 risk_level=risk_level,
                 confidence=avg_conf,
-                agent_consensus_summary=risk_evaluation.get("summary", "N/A"),
+                agent_consensus_summary=summary,
                 derived_from=artifact_origin,
             )
-            send_soc_alert(msg)
             
             # Log alert to Supabase if vulnerability was logged
-            if vulnerability_record and vulnerability_record.get("id"):
+            if queued and vulnerability_record and vulnerability_record.get("id"):
                 log_alert(vulnerability_record["id"], channel="slack")
                 
     except Exception:
         pass  # Slack failure must not affect API response
 
 
-    return SecurityReport(
-        id=artifact_id,
-        timestamp=datetime.utcnow(),
-        overall_score=risk_evaluation.get("overall_score", 0),
-        findings=all_findings,
-        summary=risk_evaluation.get("summary", "Analysis complete."),
-        status=risk_evaluation.get("status", "NO-GO"),
-        ml_signals=ml_output,
+async def _find_prior_report(fingerprint: Optional[dict]) -> Optional[tuple]:
+    """(report, similarity) of an earlier analysis to reuse: identical content first, then near-duplicates."""
+    if not fingerprint:
+        return None
+    if settings.REPORT_STORE_ENABLED and fingerprint.get("content_hash"):
+        prior = await report_store.load_by_content_hash(fingerprint["content_hash"])
+        if prior is not None:
+            return prior, 1.0
+    if settings.NEAR_DUP_ENABLED:
+        return near_duplicates.lookup(fingerprint)
+    return None
+
+
+def _streaming_callback(on_finding: FindingCallback, artifact_origin: Optional[str], ml_output: Optional[dict], pipeline: dict) -> FindingCallback:
+    """Per-finding hook for streaming agents: label, early Slack alert on the first critical, forward."""
+    async def callback(finding: AgentFinding) -> None:
+        finding = _add_derived_from([finding], artifact_origin)[0]
+        if (
+            settings.EARLY_CRITICAL_ALERTS
+            and "early_alert" not in pipeline
+            and getattr(finding.severity, "value", finding.severity) == "critical"
+        ):
+            pipeline["early_alert"] = {"agent": finding.agent_name, "finding_type": finding.finding_type}
+            allowed, repeats = True, 0
+            if settings.ALERT_SUPPRESSION_ENABLED:
+                allowed, repeats = alert_suppression.admit((ml_output or {}).get("fingerprint"), "CRITICAL")
+            if allowed:
+                pipeline["early_alert"]["sent"] = _send_early_alert(finding, artifact_origin, ml_output, repeats)
+            else:
+                pipeline["early_alert"]["suppressed"] = True
+        await on_finding(finding)
+    return callback
+
+
+def _send_early_alert(
+    finding: AgentFinding, artifact_origin: Optional[str], ml_output: Optional[dict], repeats: int = 0
+) -> bool:
+    """Queue a CRITICAL alert for one streamed finding without waiting for risk scoring; True if queued."""
+    avg_conf = (ml_output or {}).get("analytics", {}).get("avg_confidence")
+    summary = (
+        f"Early warning from {finding.agent_name}: {finding.finding_type} "
+        f"at {finding.location or 'unknown location'} (analysis still running)"
+    )
+    if repeats:
+        summary += f"\n_{repeats} repeat alert(s) for this artifact were suppressed since the last one._"
+    return slack_dispatcher.enqueue_alert(
+        artifact_type="analysis",
+        risk_level="CRITICAL",
+        confidence=avg_conf if avg_conf is not None else 0.7,
+        agent_consensus_summary=summary,
+        derived_from=artifact_origin,
     )
 
 
+async def _assess_risk(findings: List[AgentFinding], missing: List[str], pipeline: dict) -> Tuple[dict, bool]:
+    """(evaluation, degraded): the Risk agent's, or a local deterministic one when it failed or timed out."""
+    evaluation, failures = await _with_deadline(
+        ai_service.run_tracked(risk_agent.analyze(findings)), "risk", missing, (None, ["deadline"])
+    )
+    if evaluation is not None and not failures:
+        return evaluation, False
+    pipeline["risk_fallback"] = failures[0]
+    return local_risk_evaluation(findings, (
+        f"Risk assessment unavailable ({failures[0]}); score computed locally from the severities of "
+        f"{len(findings)} finding(s). Review before deploying."
+    )), True
+
+
+async def _with_deadline(coro, agent: str, missing: List[str], default):
+    """Await an agent call within AGENT_DEADLINE_S; on timeout record it as missing and degrade to `default`."""
+    try:
+        return await asyncio.wait_for(coro, timeout=settings.AGENT_DEADLINE_S)
+    except asyncio.TimeoutError:
+        logger.warning(f"Agent '{agent}' missed its {settings.AGENT_DEADLINE_S}s deadline")
+        missing.append(agent)
+        return default
+
+
+def _ml_risk(ml_output: Optional[dict]) -> float:
+    """Highest confidence among risk-bearing ML signals (0 when there are none)."""
+    signals = (ml_output or {}).get("signals", [])
+    return max((s.get("confidence", 0) for s in signals if s.get("type") in RISK_SIGNAL_TYPES), default=0.0)
+
+
+def _route(normalized: dict, content: str, ml_output: Optional[dict]) -> Optional[dict]:
+    """Per-agent views for a normalized PDF/GitHub artifact (None when routing is disabled)."""
+    if not settings.CONTENT_ROUTING_ENABLED:
+        return None
+    return route_content(
+        normalized.get("artifact_type", ""),
+        content,
+        normalized,
+        (ml_output or {}).get("file_analytics"),
+    )
+
+
+def _triage_views(views: dict) -> tuple:
+    """Trim each agent's view to its token budget; returns (views, per-agent triage stats)."""
+    trimmed, stats = {}, {}
+    for agent, text in views.items():
+        budget = settings.TRIAGE_TOKEN_BUDGETS.get(agent)
+        if not budget:
+            trimmed[agent] = text
+            continue
+        result = triage_content(text, budget, agent, settings.TRIAGE_CONTEXT_LINES)
+        trimmed[agent] = result.pop("content")
+        stats[agent] = result
+    stats["tokens_saved"] = sum(s["tokens_saved"] for s in stats.values())
+    return trimmed, stats
+
+
+def _reuse_report(prior: SecurityReport, similarity: float, artifact_id: str, ml_output: Optional[dict]) -> SecurityReport:
+    """Serve a near-duplicate artifact from the earlier report, with fresh id and ML signals."""
+    remediation_jobs.alias(artifact_id, prior.id)
+    return prior.model_copy(update={
+        "id": artifact_id,
+        "timestamp": datetime.utcnow(),
+        "ml_signals": ml_output,
+        "duplicate_of": {"report_id": prior.id, "similarity": round(similarity, 3)},
+    })
+
+
 @router.get("/")
 async def api_health():
     return {"status": "ok", "message": "Sentinel API operational"}
 
 
+def _prepare_text_analysis(request: AnalysisRequest) -> tuple:
+    """(content, artifact_id, ml_output, views) for a text/code/architecture/logs request."""
+    content = request.content
+    aid = request.metadata.get("artifact_id", str(uuid.uuid4())) if request.metadata else str(uuid.uuid4())
+    # Run ML on text/code artifact
+    norm = {"artifact_id": aid, "artifact_type": getattr(request.artifact_type, "value", str(request.artifact_type)), "content": {"raw_text": content}, "metadata": {}}
+    ml_output = run_ml_analytics(norm)
+    views = route_content(norm["artifact_type"], content) if settings.CONTENT_ROUTING_ENABLED else None
+    if norm["artifact_type"] == "logs" and settings.LOG_MINING_ENABLED and content.count("\n") >= settings.LOG_MINING_MIN_LINES:
+        mined = mine_logs(content)
+        views = views or {"threat": content, "security": content, "soc": content}
+        views["soc"] = mined["summary"]
+        stats = mined["stats"]
+        ml_output["log_templates"] = {k: stats[k] for k in ("total_lines", "template_count", "time_buckets", "bursts")}
+    return content, aid, ml_output, views
+
+
 @router.post("/analyze", response_model=SecurityReport)
 async def analyze_artifact(request: AnalysisRequest):
     """Original analyze endpoint - text/code/architecture/logs. ML analytics applied."""
     try:
-        content = request.content
-        aid = request.metadata.get("artifact_id", str(uuid.uuid4())) if request.metadata else str(uuid.uuid4())
-        # Run ML on text/code artifact
-        norm = {"artifact_id": aid, "artifact_type": getattr(request.artifact_type, "value", str(request.artifact_type)), "content": {"raw_text": content}, "metadata": {}}
-        ml_output = run_ml_analytics(norm)
-        return await _run_full_analysis(content, aid, None, ml_output)
+        content, aid, ml_output, views = _prepare_text_analysis(request)
+        return await _run_full_analysis(content, aid, None, ml_output, views)
     except Exception as e:
         import traceback
         raise HTTPException(status_code=500, detail=str(e) + "\n" + traceback.format_exc())
 
 
+@router.post("/analyze/stream")
+async def analyze_artifact_stream(request: AnalysisRequest):
+    """
+    Streaming variant of /analyze (NDJSON). Emits {"event": "finding", "finding": ...} as each
+    content-agent finding is generated, then one {"event": "report", "report": ...} line
+    (or {"event": "error", "detail": ...}).
+    """
+    content, aid, ml_output, views = _prepare_text_analysis(request)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_finding(finding: AgentFinding) -> None:
+        await queue.put({"event": "finding", "finding": finding.model_dump(mode="json")})
+
+    async def run() -> None:
+        try:
+            report = await _run_full_analysis(content, aid, None, ml_output, views, on_finding=on_finding)
+            await queue.put({"event": "report", "report": report.model_dump(mode="json")})
+        except Exception as e:
+            logger.error(f"Streaming analysis failed: {e}")
+            await queue.put({"event": "error", "detail": str(e)})
+        finally:
+            await queue.put(None)
+
+    async def events():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await queue.get()) is not None:
+                yield json.dumps(event) + "\n"
+        finally:
+            task.cancel()  # no-op when finished; stops the pipeline if the client went away
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @router.post("/analyze/pdf/upload", response_model=SecurityReport)
 async def analyze_pdf_upload(file: UploadFile = File(...)):
     """Multipart PDF file upload. All agents + ML process the PDF."""
@@ -162,6 +484,7 @@ async def analyze_pdf_upload(file: UploadFile = File(...)):
             normalized["artifact_id"],
             "Derived from PDF Artifact",
             ml_output,
+            _route(normalized, content, ml_output),
         )
     except Exception as e:
         import traceback
@@ -181,6 +504,7 @@ async def analyze_pdf_base64(req: PDFBase64Request):
             normalized["artifact_id"],
             "Derived from PDF Artifact",
             ml_output,
+            _route(normalized, content, ml_output),
         )
     except Exception as e:
         import traceback
@@ -199,6 +523,7 @@ async def analyze_pdf_url(req: PDFUrlRequest):
             normalized["artifact_id"],
             "Derived from PDF Artifact",
             ml_output,
+            _route(normalized, content, ml_output),
         )
     except Exception as e:
         import traceback
@@ -210,13 +535,14 @@ async def analyze_github(req: GitHubArtifactRequest):
     """GitHub link (repo/file/commit/PR). All agents + ML process."""
     try:
         normalized = fetch_github_artifact(req.url)
-        content = github_to_agent_content(normalized)
         ml_output = run_ml_analytics(normalized)
+        content = github_to_agent_content(normalized, ml_output.get("file_analytics"))
         return await _run_full_analysis(
             content,
             normalized["artifact_id"],
             "Derived from GitHub Artifact",
             ml_output,
+            _route(normalized, content, ml_output),
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -225,32 +551,213 @@ async def analyze_github(req: GitHubArtifactRequest):
         raise HTTPException(status_code=500, detail=str(e) + "\n" + traceback.format_exc())
 
 
+@router.get("/reports/{report_id}/remediation")
+async def get_report_remediation(report_id: str):
+    """Remediation for a report analyzed in lazy/background mode; generated on first access, then memoized."""
+    status = remediation_jobs.status(report_id)
+    findings = await remediation_jobs.get(report_id)
+    if findings is None:
+        # Job state is in-memory; after eviction or a restart the stored report may still hold it
+        report = await report_store.load(report_id) if settings.REPORT_STORE_ENABLED else None
+        if report is None or report.remediation_status != "ready":
+            raise HTTPException(status_code=404, detail="No deferred remediation for this report")
+        findings = [f for f in report.findings if f.agent_name == REMEDIATION_AGENT_NAME]
+    return {"report_id": report_id, "status": "ready", "generated_on_request": status == "pending", "findings": findings}
+
+
+async def _load_report(report_id: str) -> SecurityReport:
+    report = await report_store.load(report_id) if settings.REPORT_STORE_ENABLED else None
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    # Deferred remediation may have moved on since the report was stored
+    if report.remediation_status in ("pending", "running"):
+        report = report.model_copy(update={"remediation_status": remediation_jobs.status(report_id)})
+    return report
+
+
+@router.get("/reports/{report_id}", response_model=SecurityReport)
+async def get_report(report_id: str):
+    """A stored analysis report, served without re-running the agents."""
+    return await _load_report(report_id)
+
+
+@router.get("/reports/{report_id}/findings")
+async def get_report_findings(report_id: str, severity: Optional[str] = None, agent: Optional[str] = None):
+    """
+    Findings of a stored report.
+    
+    Args:
+        severity: Optional filter (critical, high, medium, low, info)
+        agent: Optional filter by agent name
+    """
+    report = await _load_report(report_id)
+    findings = report.findings
+    if severity:
+        findings = [f for f in findings if getattr(f.severity, "value", f.severity) == severity.lower()]
+    if agent:
+        findings = [f for f in findings if (f.agent_name or "").lower() == agent.lower()]
+    return {"report_id": report_id, "count": len(findings), "findings": findings}
+
+
+@router.get("/metrics")
+async def get_pipeline_metrics():
+    """Runtime counters for the analysis pipeline's local caches and stages."""
+    return {
+        "remediation_cache": remediation_cache.stats(),
+        "report_store": report_store.stats(),
+        "llm": ai_service.metrics_snapshot(),
+        "audit_writer": audit_writer.stats(),
+        "history_cache": history_cache.stats(),
+        "slack": slack_dispatcher.stats(),
+        "alert_suppression": alert_suppression.stats(),
+    }
+
+
 @router.get("/vulnerabilities")
-async def get_vulnerabilities_history(limit: int = 100, risk_filter: Optional[str] = None):
+async def get_vulnerabilities_history(
+    limit: int = 100,
+    risk_filter: Optional[str] = None,
+    status: Optional[str] = None,
+    artifact: Optional[str] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
     """
-    Retrieve vulnerability history from Supabase.
+    Retrieve vulnerability history from the audit store (AUDIT_BACKEND), newest first.
     
     Args:
-        limit: Maximum number of records (default 100)
+        limit: Page size (default 100, capped at HISTORY_MAX_PAGE_SIZE)
         risk_filter: Optional filter by risk level (LOW, MEDIUM, HIGH, CRITICAL)
+        status: Optional filter by status (GO, NO-GO, REVIEW_REQUIRED)
+        artifact: Optional filter by artifact type
+        min_score / max_score: Optional overall_score range (inclusive)
+        since / until: Optional ISO timestamp window on created_at (since inclusive, until exclusive)
+        cursor: next_cursor from the previous page
+        fields: Comma-separated columns to return (id and created_at are always included)
     
     Returns:
-        List of vulnerability records from Supabase audit log
+        One page of vulnerability records, plus next_cursor when more may follow
     """
-    from app.services.supabase_logger import get_vulnerabilities
-    vulnerabilities = get_vulnerabilities(limit=limit, risk_filter=risk_filter)
+    try:
+        query = HistoryQuery(
+            limit=max(1, min(limit, settings.HISTORY_MAX_PAGE_SIZE)),
+            risk=risk_filter,
+            status=status,
+            artifact=artifact,
+            min_score=min_score,
+            max_score=max_score,
+            since=since,
+            until=until,
+            after=decode_cursor(cursor) if cursor else None,
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail="; ".join(err["msg"] for err in e.errors()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if settings.HISTORY_CACHE_ENABLED:
+            vulnerabilities = await history_cache.get(query, get_audit_store().query_vulnerabilities)
+        else:
+            vulnerabilities = await get_audit_store().query_vulnerabilities(query)
+    except Exception as e:
+        logger.error(f"❌ Failed to retrieve vulnerabilities: {e}")
+        vulnerabilities = []
     return {
         "count": len(vulnerabilities),
-        "vulnerabilities": vulnerabilities
+        "vulnerabilities": vulnerabilities,
+        "next_cursor": encode_cursor(vulnerabilities[-1]) if len(vulnerabilities) == query.limit else None,
     }
 
 
-@router.get("/ml/signals/{artifact_id}")
+@router.get("/analytics/risk-trends")
+async def get_risk_trends(
+    granularity: str = "hour",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    artifact: Optional[str] = None,
+):
+    """
+    Time-bucketed risk trends from the incrementally maintained rollups.
+    
+    Args:
+        granularity: "hour" or "day"
+        since / until: Optional ISO timestamp window (since inclusive, until exclusive);
+            defaults to the last TRENDS_DEFAULT_HOURS hours / TRENDS_DEFAULT_DAYS days
+        artifact: Optional filter by artifact type
+    
+    Returns:
+        One entry per bucket (oldest first) with total, by_risk, by_status,
+        by_artifact and avg_score, plus window totals
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    try:
+        start, end = window_bounds(granularity, since, until, settings.TRENDS_DEFAULT_HOURS, settings.TRENDS_DEFAULT_DAYS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if (end - start) / GRANULARITIES[granularity] > settings.TRENDS_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Window exceeds {settings.TRENDS_MAX_BUCKETS} {granularity} buckets")
+    try:
+        rows = await get_audit_store().query_rollups(granularity, start.isoformat(), end.isoformat(), artifact)
+    except Exception as e:
+        logger.error(f"❌ Failed to retrieve risk trends: {e}")
+        rows = []
+    series = trend_series(rows, granularity, start, end)
+    return {
+        "granularity": granularity,
+        "since": start.isoformat(),
+        "until": end.isoformat(),
+        "totals": summarize(series),
+        "buckets": series,
+    }
+
+
+class PolicyReplayRequest(BaseModel):
+    policies: List[EscalationPolicy] = []
+    since: Optional[str] = None
+    until: Optional[str] = None
+    limit: Optional[int] = None
+
+
+@router.post("/analytics/policy-replay")
+async def policy_replay(request: PolicyReplayRequest):
+    """
+    What-if replay of escalation policies over vulnerability history.
+    
+    Args (body):
+        policies: Candidate EscalationPolicy thresholds to evaluate
+        since / until: Optional ISO timestamp window on created_at
+        limit: Max records to replay (capped at POLICY_REPLAY_MAX_RECORDS)
+    
+    Returns:
+        Alerts each policy would have produced (total, rate, by_risk), with the
+        currently configured policy as baseline and each candidate's delta
+    """
+    limit = min(request.limit or settings.POLICY_REPLAY_MAX_RECORDS, settings.POLICY_REPLAY_MAX_RECORDS)
+    try:
+        data = await load_history(since=request.since, until=request.until, max_records=max(1, limit))
+    except Exception as e:
+        logger.error(f"❌ Failed to load history for policy replay: {e}")
+        raise HTTPException(status_code=503, detail="History unavailable")
+    return await asyncio.to_thread(replay, data, request.policies)
 
+
+@router.get("/ml/signals/{artifact_id}")
 async def get_ml_signals(artifact_id: str):
-    """ML signals are stored per-report; this endpoint would typically look up by artifact_id.
-    For now returns empty - signals are embedded in SecurityReport.ml_signals."""
-    return {"artifact_id": artifact_id, "signals": [], "message": "Check SecurityReport.ml_signals"}
+    """ML signals of a stored report, looked up by artifact_id (= report id)."""
+    report = await _load_report(artifact_id)
+    ml = report.ml_signals or {}
+    return {
+        "artifact_id": artifact_id,
+        "signals": ml.get("signals", []),
+        "analytics": ml.get("analytics"),
+        "report_timestamp": report.timestamp,
+    }
 
 
 @router.websocket("/ws/monitor")
@@ -265,44 +772,24 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.send_json({"agent": agent, "message": message, "status": "working"})
             await asyncio.sleep(random.uniform(2, 5))
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        logger.error(f"WebSocket error: {e}")
     finally:
         await websocket.close()
 
 
 # --- Slack Integration ---
 
-# Initialize Slack Client lazily/conditionally
-slack_client = WebClient(token=settings.SLACK_BOT_TOKEN) if hasattr(settings, "SLACK_BOT_TOKEN") and settings.SLACK_BOT_TOKEN else None
-
 class SlackMessage(BaseModel):
     channel: str
     text: str
 
-def send_slack_notification_task(channel: str, text: str):
-    """
-    Background task to send slack notification
-    """
-    if not slack_client:
-        print("Slack client not initialized. Missing SLACK_BOT_TOKEN.")
-        return
-
-    try:
-        response = slack_client.chat_postMessage(
-            channel=channel,
-            text=text
-        )
-        print(f"Slack message sent: {response['ts']}")
-    except SlackApiError as e:
-        print(f"Error sending slack message: {e.response['error']}")
-
 @router.post("/send-notification")
-async def send_notification(message: SlackMessage, background_tasks: BackgroundTasks):
+async def send_notification(message: SlackMessage):
     """
-    Send a notification to Slack asynchronously.
+    Send a notification to Slack asynchronously (queued on the Slack dispatcher).
     """
-    if not slack_client:
+    if not slack_dispatcher.enabled:
         raise HTTPException(status_code=503, detail="Slack integration not configured. Setup SLACK_BOT_TOKEN.")
-    
-    background_tasks.add_task(send_slack_notification_task, message.channel, message.text)
+    if not slack_dispatcher.enqueue_message(message.channel, {"text": message.text}):
+        raise HTTPException(status_code=503, detail="Slack notification queue is full")
     return {"status": "Notification queued"}
@@ -2,7 +2,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
-from app.services.slack_service import send_soc_alert
+from app.services.slack_dispatcher import slack_dispatcher
+from app.services.slack_service import default_channel
 from app.services.slack_formatter import build_soc_alert
 
 router = APIRouter(prefix="/internal", tags=["internal"])
@@ -26,5 +27,7 @@ async def test_slack(payload: SlackTestPayload):
         agent_consensus_summary=f"Threat: {consensus.get('threat', 'N/A')}, Security: {consensus.get('security', 'N/A')}, SOC: {consensus.get('soc', 'N/A')}",
         derived_from=payload.artifact_type,
     )
-    ok = send_soc_alert(msg)
+    # Bypasses digest coalescing so the result reflects an actual delivery
+    channel = default_channel()
+    ok = await slack_dispatcher.send_now(channel, msg) if channel else False
     return {"sent": ok, "message": "Check Slack channel"}
@@ -0,0 +1,403 @@
+"""
+Pluggable audit log storage behind log_vulnerability, log_alert and
+get_vulnerabilities. Selected by AUDIT_BACKEND:
+  "supabase" - Supabase REST (default)
+  "postgres" - direct Postgres on the async SQLAlchemy engine
+  "sqlite"   - embedded SQLite in WAL mode, for single-node/offline deployments
+"""
+import abc
+import json
+import uuid
+import base64
+import sqlite3
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, field_validator
+
+from app.core.config import settings
+from app.db.risk_rollups import ROLLUP_COUNTERS, ROLLUP_KEY, rollup_deltas
+
+logger = logging.getLogger(__name__)
+
+
+VULNERABILITY_FIELDS = (
+    "id", "artifact_id", "artifact", "risk", "confidence", "agent_votes", "summary", "status",
+    "overall_score", "reused_from", "created_at",
+)
+
+
+class HistoryQuery(BaseModel):
+    """
+    One page of vulnerability history, newest first, ordered by (created_at, id).
+    `after` is the keyset position of the previous page's last row; `fields` projects
+    columns (id and created_at are always included so the next cursor can be built).
+    """
+
+    limit: int = 100
+    risk: Optional[str] = None
+    status: Optional[str] = None
+    artifact: Optional[str] = None
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    since: Optional[str] = None  # ISO timestamp, inclusive
+    until: Optional[str] = None  # ISO timestamp, exclusive
+    after: Optional[Tuple[str, str]] = None
+    fields: Optional[List[str]] = None
+
+    @field_validator("risk", "status", "artifact")
+    @classmethod
+    def _upper(cls, v: Optional[str]) -> Optional[str]:
+        return v.upper() if v else None
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, v: Optional[List[str]]) -> Optional[List[str]]:
+        if v is None:
+            return None
+        unknown = [f for f in v if f not in VULNERABILITY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return v
+
+    def columns(self) -> List[str]:
+        if not self.fields:
+            return list(VULNERABILITY_FIELDS)
+        return [c for c in VULNERABILITY_FIELDS if c in self.fields or c in ("id", "created_at")]
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps([str(row["created_at"]), str(row["id"])]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Raises ValueError for malformed cursors. The cursor comes from the client and ends up
+    in filter strings (PostgREST or_()), so both parts are parsed and re-serialized.
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(str(created_at)).isoformat(), str(uuid.UUID(str(row_id)))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+class AuditStore(abc.ABC):
+    """Rows are the dicts built by supabase_logger (client-side ids, ISO timestamps)."""
+
+    name = "base"
+    # Whether the *_sync methods work (used when the write-behind writer isn't running)
+    supports_sync = False
+
+    @abc.abstractmethod
+    async def insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def query_vulnerabilities(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        ...
+
+    async def get_vulnerabilities(self, limit: int = 100, risk_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self.query_vulnerabilities(HistoryQuery(limit=limit, risk=risk_filter))
+
+    @abc.abstractmethod
+    async def query_rollups(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """risk_rollups rows for one granularity with bucket_start in [since, until)."""
+
+    def insert_rows_sync(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        raise NotImplementedError(f"{self.name} audit store is async-only")
+
+    def query_vulnerabilities_sync(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        raise NotImplementedError(f"{self.name} audit store is async-only")
+
+    def get_vulnerabilities_sync(self, limit: int = 100, risk_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.query_vulnerabilities_sync(HistoryQuery(limit=limit, risk=risk_filter))
+
+
+class _ThreadedStore(AuditStore):
+    """Store with a blocking client: async methods run the sync ones in a worker thread."""
+
+    supports_sync = True
+
+    async def insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(self.insert_rows_sync, table, rows)
+
+    async def query_vulnerabilities(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.query_vulnerabilities_sync, query)
+
+    async def query_rollups(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.query_rollups_sync, granularity, since, until, artifact)
+
+    @abc.abstractmethod
+    def insert_rows_sync(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def query_vulnerabilities_sync(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        ...
+
+    @abc.abstractmethod
+    def query_rollups_sync(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        ...
+
+
+class SupabaseAuditStore(_ThreadedStore):
+    name = "supabase"
+
+    # PostgREST caps rows per response; rollup reads page through in chunks of this size
+    PAGE_SIZE = 1000
+
+    def insert_rows_sync(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        from app.db.supabase_client import get_supabase
+        client = get_supabase()
+        # Idempotent: rows already stored (retried or replayed batches) are skipped, and only
+        # the rows actually inserted come back
+        inserted = client.table(table).upsert(rows, ignore_duplicates=True, on_conflict="id").execute().data
+        if table != "vulnerabilities" or not inserted:
+            return
+        # Separate round trip: a failed rollup update must not fail (and re-send) the insert
+        try:
+            client.rpc("increment_risk_rollups", {"deltas": rollup_deltas(inserted)}).execute()
+        except Exception as e:
+            logger.error(f"❌ Failed to update risk rollups for {len(rows)} rows: {e}")
+
+    def query_rollups_sync(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        from app.db.supabase_client import get_supabase
+        out: List[Dict[str, Any]] = []
+        while True:
+            q = (
+                get_supabase().table("risk_rollups").select("*")
+                .eq("granularity", granularity).gte("bucket_start", since).lt("bucket_start", until)
+            )
+            if artifact:
+                q = q.eq("artifact", artifact.upper())
+            page = q.order("bucket_start").range(len(out), len(out) + self.PAGE_SIZE - 1).execute().data or []
+            out.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return out
+
+    def query_vulnerabilities_sync(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        from app.db.supabase_client import get_supabase
+        q = (
+            get_supabase().table("vulnerabilities").select(",".join(query.columns()))
+            .order("created_at", desc=True).order("id", desc=True).limit(query.limit)
+        )
+        for column, value in (("risk", query.risk), ("status", query.status), ("artifact", query.artifact)):
+            if value:
+                q = q.eq(column, value)
+        if query.min_score is not None:
+            q = q.gte("overall_score", query.min_score)
+        if query.max_score is not None:
+            q = q.lte("overall_score", query.max_score)
+        if query.since:
+            q = q.gte("created_at", query.since)
+        if query.until:
+            q = q.lt("created_at", query.until)
+        if query.after:
+            created_at, row_id = query.after
+            q = q.or_(f"created_at.lt.{created_at},and(created_at.eq.{created_at},id.lt.{row_id})")
+        response = q.execute()
+        return response.data if response.data else []
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vulnerabilities (
+    id TEXT PRIMARY KEY,
+    artifact_id TEXT,
+    artifact TEXT NOT NULL,
+    risk TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    agent_votes TEXT NOT NULL,
+    summary TEXT,
+    status TEXT,
+    overall_score INTEGER,
+    reused_from TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_created_at_id ON vulnerabilities(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_risk_created_at ON vulnerabilities(risk, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_status_created_at ON vulnerabilities(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_artifact_created_at ON vulnerabilities(artifact, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_score ON vulnerabilities(overall_score);
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    vulnerability_id TEXT NOT NULL REFERENCES vulnerabilities(id),
+    channel TEXT NOT NULL,
+    sent_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_vulnerability_id ON alerts(vulnerability_id);
+CREATE TABLE IF NOT EXISTS risk_rollups (
+    granularity TEXT NOT NULL,
+    bucket_start TEXT NOT NULL,
+    risk TEXT NOT NULL,
+    status TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    score_sum INTEGER NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, risk, status, artifact)
+) WITHOUT ROWID;
+"""
+
+SQLITE_ROLLUP_UPSERT = (
+    f"INSERT INTO risk_rollups ({', '.join(ROLLUP_KEY + ROLLUP_COUNTERS)}) "
+    f"VALUES ({', '.join('?' * len(ROLLUP_KEY + ROLLUP_COUNTERS))}) "
+    f"ON CONFLICT ({', '.join(ROLLUP_KEY)}) DO UPDATE SET "
+    + ", ".join(f"{c} = {c} + excluded.{c}" for c in ROLLUP_COUNTERS)
+)
+
+SQLITE_COLUMNS = {
+    "vulnerabilities": ("id", "artifact_id", "artifact", "risk", "confidence", "agent_votes", "summary", "status",
+                        "overall_score", "reused_from", "created_at"),
+    "alerts": ("id", "vulnerability_id", "channel", "sent_at"),
+}
+
+
+class SQLiteAuditStore(_ThreadedStore):
+    """
+    One connection in WAL mode with synchronous=NORMAL: each batch is a single
+    transaction, and readers don't block the writer. Indexes mirror the
+    history query's keyset order (created_at, id), alone and behind each filter.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._migrate()
+        self._backfill_rollups()
+
+    def _migrate(self) -> None:
+        """Columns added after a database was created."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(vulnerabilities)")}
+        if "reused_from" not in columns:
+            self._conn.execute("ALTER TABLE vulnerabilities ADD COLUMN reused_from TEXT")
+
+    def _backfill_rollups(self) -> None:
+        """Databases created before rollups existed: build them once from the raw rows."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM risk_rollups LIMIT 1").fetchone():
+                return
+            rows = self._conn.execute("SELECT risk, status, artifact, overall_score, created_at FROM vulnerabilities").fetchall()
+            if not rows:
+                return
+            deltas = rollup_deltas(dict(r) for r in rows)
+            self._conn.execute("BEGIN")
+            self._conn.executemany(SQLITE_ROLLUP_UPSERT, [tuple(d[c] for c in ROLLUP_KEY + ROLLUP_COUNTERS) for d in deltas])
+            self._conn.execute("COMMIT")
+        logger.info(f"Backfilled risk rollups from {len(rows)} vulnerabilities")
+
+    def insert_rows_sync(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        columns = SQLITE_COLUMNS[table]
+        sql = f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                if table == "vulnerabilities":
+                    # Replayed spill rows may already be stored; only new rows count towards rollups
+                    ids = [r["id"] for r in rows]
+                    existing = set()
+                    for i in range(0, len(ids), 500):
+                        chunk = ids[i:i + 500]
+                        existing.update(
+                            row[0] for row in self._conn.execute(
+                                f"SELECT id FROM vulnerabilities WHERE id IN ({', '.join('?' * len(chunk))})", chunk,
+                            )
+                        )
+                    rows = [r for r in rows if r["id"] not in existing]
+                    deltas = rollup_deltas(rows)
+                    self._conn.executemany(
+                        SQLITE_ROLLUP_UPSERT, [tuple(d[c] for c in ROLLUP_KEY + ROLLUP_COUNTERS) for d in deltas],
+                    )
+                values = [
+                    tuple(json.dumps(r.get(c) or {}) if c == "agent_votes" else r.get(c) for c in columns)
+                    for r in rows
+                ]
+                self._conn.executemany(sql, values)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query_vulnerabilities_sync(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        columns = query.columns()
+        where: List[str] = []
+        params: List[Any] = []
+        for column, value in (("risk", query.risk), ("status", query.status), ("artifact", query.artifact)):
+            if value:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if query.min_score is not None:
+            where.append("overall_score >= ?")
+            params.append(query.min_score)
+        if query.max_score is not None:
+            where.append("overall_score <= ?")
+            params.append(query.max_score)
+        if query.since:
+            where.append("created_at >= ?")
+            params.append(query.since)
+        if query.until:
+            where.append("created_at < ?")
+            params.append(query.until)
+        if query.after:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(query.after)
+        sql = f"SELECT {', '.join(columns)} FROM vulnerabilities"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(query.limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        if "agent_votes" not in columns:
+            return [dict(r) for r in rows]
+        return [{**dict(r), "agent_votes": json.loads(r["agent_votes"])} for r in rows]
+
+    def query_rollups_sync(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM risk_rollups WHERE granularity = ? AND bucket_start >= ? AND bucket_start < ?"
+        params: List[Any] = [granularity, since, until]
+        if artifact:
+            sql += " AND artifact = ?"
+            params.append(artifact.upper())
+        with self._lock:
+            return [dict(r) for r in self._conn.execute(sql + " ORDER BY bucket_start", params)]
+
+
+_store: Optional[AuditStore] = None
+
+
+def get_audit_store() -> AuditStore:
+    global _store
+    if _store is None:
+        backend = settings.AUDIT_BACKEND
+        if backend == "postgres":
+            from app.db.postgres_audit import postgres_audit
+            _store = postgres_audit
+        elif backend == "sqlite":
+            _store = SQLiteAuditStore(settings.AUDIT_SQLITE_PATH)
+        else:
+            if backend != "supabase":
+                logger.warning(f"Unknown AUDIT_BACKEND '{backend}', using supabase")
+            _store = SupabaseAuditStore()
+        logger.info(f"Audit store: {_store.name}")
+    return _store
@@ -0,0 +1,199 @@
+"""
+Direct Postgres audit repository on the shared async SQLAlchemy engine.
+Alternative to the Supabase REST path (AUDIT_BACKEND="postgres"): pooled
+connections, cached prepared statements, COPY for large batches and
+executemany for small ones. Tables match supabase_schema.sql.
+"""
+import json
+import uuid
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, Index, Integer, MetaData, Table, Text, and_, select, tuple_
+from sqlalchemy.dialects.postgresql import JSONB, UUID, insert as pg_insert
+
+from app.core.config import settings
+from app.db.audit_store import AuditStore, HistoryQuery
+from app.db.risk_rollups import ROLLUP_COUNTERS, ROLLUP_KEY, rollup_deltas
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+vulnerabilities = Table(
+    "vulnerabilities", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("artifact_id", Text),
+    Column("artifact", Text, nullable=False),
+    Column("risk", Text, nullable=False),
+    Column("confidence", Float, nullable=False),
+    Column("agent_votes", JSONB, nullable=False),
+    Column("summary", Text),
+    Column("status", Text),
+    Column("overall_score", Integer),
+    Column("reused_from", Text),
+    Column("created_at", DateTime),
+)
+
+# Keyset pagination indexes: every history filter seeks on (filter, created_at, id)
+Index("idx_vulnerabilities_created_at_id", vulnerabilities.c.created_at.desc(), vulnerabilities.c.id.desc())
+Index("idx_vulnerabilities_risk_created_at", vulnerabilities.c.risk, vulnerabilities.c.created_at.desc(), vulnerabilities.c.id.desc())
+Index("idx_vulnerabilities_status_created_at", vulnerabilities.c.status, vulnerabilities.c.created_at.desc(), vulnerabilities.c.id.desc())
+Index("idx_vulnerabilities_artifact_created_at", vulnerabilities.c.artifact, vulnerabilities.c.created_at.desc(), vulnerabilities.c.id.desc())
+Index("idx_vulnerabilities_score", vulnerabilities.c.overall_score)
+
+alerts = Table(
+    "alerts", metadata,
+    Column("id", UUID(as_uuid=True), primary_key=True),
+    Column("vulnerability_id", UUID(as_uuid=True), nullable=False),
+    Column("channel", Text, nullable=False),
+    Column("sent_at", DateTime, nullable=False),
+)
+
+risk_rollups = Table(
+    "risk_rollups", metadata,
+    Column("granularity", Text, primary_key=True),
+    Column("bucket_start", DateTime, primary_key=True),
+    Column("risk", Text, primary_key=True),
+    Column("status", Text, primary_key=True),
+    Column("artifact", Text, primary_key=True),
+    Column("count", BigInteger, nullable=False, default=0),
+    Column("score_sum", BigInteger, nullable=False, default=0),
+    Column("score_count", BigInteger, nullable=False, default=0),
+)
+
+TABLES = {"vulnerabilities": vulnerabilities, "alerts": alerts}
+_UUID_COLUMNS = {"id", "vulnerability_id"}
+_TIME_COLUMNS = {"created_at", "sent_at"}
+
+
+def _coerce(row: Dict[str, Any], table: Table) -> Dict[str, Any]:
+    """Row dict as produced by supabase_logger -> typed values for the table's columns."""
+    out: Dict[str, Any] = {}
+    for col in table.columns:
+        value = row.get(col.name)
+        if value is None:
+            if col.name == "id":
+                value = uuid.uuid4()
+            elif col.name in _TIME_COLUMNS:
+                value = datetime.utcnow()
+        elif col.name in _UUID_COLUMNS and not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        elif col.name in _TIME_COLUMNS and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        out[col.name] = value
+    return out
+
+
+def _parse_time(value: str) -> datetime:
+    # Columns are naive UTC, like the rows supabase_logger writes
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class PostgresAuditRepository(AuditStore):
+    name = "postgres"
+
+    async def insert_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        """
+        Idempotent bulk insert (rows whose id exists are skipped, so retried batches are safe):
+        COPY via a staging table at DB_COPY_MIN_ROWS and above, one executemany below.
+        """
+        if not rows:
+            return
+        table = TABLES[table_name]
+        records = [_coerce(r, table) for r in rows]
+        async with engine.begin() as conn:
+            if len(records) >= settings.DB_COPY_MIN_ROWS:
+                # Runs before COPY on purpose: the asyncpg adapter opens the transaction lazily on the
+                # first statement, and a COPY issued first would autocommit outside it
+                staging = f"_staging_{table_name}"
+                await conn.exec_driver_sql(
+                    f"CREATE TEMP TABLE {staging} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                columns = [c.name for c in table.columns]
+                raw = (await conn.get_raw_connection()).driver_connection
+                # asyncpg's COPY codec takes JSONB as text
+                tuples = [
+                    tuple(json.dumps(r[c]) if c == "agent_votes" else r[c] for c in columns)
+                    for r in records
+                ]
+                await raw.copy_records_to_table(staging, records=tuples, columns=columns)
+                result = await conn.exec_driver_sql(
+                    f"INSERT INTO {table_name} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {staging} "
+                    f"ON CONFLICT DO NOTHING RETURNING id"
+                )
+            else:
+                result = await conn.execute(pg_insert(table).on_conflict_do_nothing().returning(table.c.id), records)
+            inserted = {row[0] for row in result}
+            if len(inserted) < len(records):
+                logger.info(f"Postgres audit: skipped {len(records) - len(inserted)} {table_name} rows already stored")
+            if table_name == "vulnerabilities" and inserted:
+                # Same transaction as the insert and only for new rows, so rollups never drift from the raw rows
+                new = [r for r in records if r["id"] in inserted]
+                deltas = [{**d, "bucket_start": _parse_time(d["bucket_start"])} for d in rollup_deltas(new)]
+                stmt = pg_insert(risk_rollups)
+                await conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=list(ROLLUP_KEY),
+                        set_={c: risk_rollups.c[c] + stmt.excluded[c] for c in ROLLUP_COUNTERS},
+                    ),
+                    deltas,
+                )
+
+    async def query_vulnerabilities(self, query: HistoryQuery) -> List[Dict[str, Any]]:
+        c = vulnerabilities.c
+        conditions = []
+        for column, value in ((c.risk, query.risk), (c.status, query.status), (c.artifact, query.artifact)):
+            if value:
+                conditions.append(column == value)
+        if query.min_score is not None:
+            conditions.append(c.overall_score >= query.min_score)
+        if query.max_score is not None:
+            conditions.append(c.overall_score <= query.max_score)
+        if query.since:
+            conditions.append(c.created_at >= _parse_time(query.since))
+        if query.until:
+            conditions.append(c.created_at < _parse_time(query.until))
+        if query.after:
+            created_at, row_id = query.after
+            conditions.append(tuple_(c.created_at, c.id) < tuple_(_parse_time(created_at), uuid.UUID(row_id)))
+        stmt = (
+            select(*(c[name] for name in query.columns()))
+            .order_by(c.created_at.desc(), c.id.desc())
+            .limit(query.limit)
+        )
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+        async with engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return [
+                {k: (str(v) if isinstance(v, uuid.UUID) else v.isoformat() if isinstance(v, datetime) else v)
+                 for k, v in row._mapping.items()}
+                for row in result
+            ]
+
+    async def query_rollups(
+        self, granularity: str, since: str, until: str, artifact: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        c = risk_rollups.c
+        stmt = (
+            select(risk_rollups)
+            .where(c.granularity == granularity, c.bucket_start >= _parse_time(since), c.bucket_start < _parse_time(until))
+            .order_by(c.bucket_start)
+        )
+        if artifact:
+            stmt = stmt.where(c.artifact == artifact.upper())
+        async with engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return [
+                {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row._mapping.items()}
+                for row in result
+            ]
+
+
+postgres_audit = PostgresAuditRepository()
@@ -0,0 +1,171 @@
+"""
+Persistent store of full analysis reports.
+Reports are zlib-compressed JSON blobs in an embedded SQLite database (WAL),
+keyed by report id (= artifact_id) and indexed by content hash, with an
+in-memory LRU of recently used reports in front. Lets past reports, their
+findings and ML signals be served without re-running the agents, and lets an
+exact re-submission reuse an earlier report after restarts or LRU eviction.
+"""
+import zlib
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.models.schemas import AgentFinding, SecurityReport
+
+logger = logging.getLogger(__name__)
+
+REPORT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    content_hash TEXT,
+    reusable INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    raw_size INTEGER NOT NULL,
+    blob BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_content_hash ON reports(content_hash, created_at DESC) WHERE reusable = 1;
+"""
+
+
+def _content_hash(report: SecurityReport) -> Optional[str]:
+    return ((report.ml_signals or {}).get("fingerprint") or {}).get("content_hash")
+
+
+class ReportStore:
+    def __init__(self, path: str, cache_size: int, compression_level: int = 6):
+        self.path = path
+        self.cache_size = cache_size
+        self.compression_level = compression_level
+        self._hot: "OrderedDict[str, SecurityReport]" = OrderedDict()
+        # Deferred remediation that finished before its report was saved
+        self._early_remediation: "OrderedDict[str, List[AgentFinding]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hot_hits = 0
+        self.disk_hits = 0
+        self.not_found = 0
+        self.bytes_raw = 0
+        self.bytes_stored = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(REPORT_SCHEMA)
+        return self._conn
+
+    def _remember(self, report: SecurityReport) -> None:
+        self._hot[report.id] = report
+        self._hot.move_to_end(report.id)
+        while len(self._hot) > self.cache_size:
+            self._hot.popitem(last=False)
+
+    def put(self, report: SecurityReport) -> None:
+        """Save (or replace) a report: hot tier immediately, compressed blob on disk."""
+        early = self._early_remediation.pop(report.id, None)
+        if early is not None:
+            report = self._with_remediation(report, early)
+        self._remember(report)
+        raw = report.model_dump_json().encode("utf-8")
+        blob = zlib.compress(raw, self.compression_level)
+        reusable = not (report.degraded or report.partial)
+        with self._lock:
+            self._db().execute(
+                "INSERT OR REPLACE INTO reports (id, content_hash, reusable, created_at, raw_size, blob) VALUES (?, ?, ?, ?, ?, ?)",
+                (report.id, _content_hash(report), int(reusable), report.timestamp.isoformat(), len(raw), blob),
+            )
+        self.bytes_raw += len(raw)
+        self.bytes_stored += len(blob)
+
+    def get(self, report_id: str) -> Optional[SecurityReport]:
+        report = self._hot.get(report_id)
+        if report is not None:
+            self._hot.move_to_end(report_id)
+            self.hot_hits += 1
+            return report
+        with self._lock:
+            row = self._db().execute("SELECT blob FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row is None:
+            self.not_found += 1
+            return None
+        report = SecurityReport.model_validate_json(zlib.decompress(row[0]))
+        self._remember(report)
+        self.disk_hits += 1
+        return report
+
+    def get_reusable(self, report_id: str) -> Optional[SecurityReport]:
+        """The report if it may stand in for a new analysis (non-degraded, non-partial)."""
+        report = self.get(report_id)
+        if report is None or report.degraded or report.partial:
+            return None
+        return report
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[SecurityReport]:
+        """Latest complete (non-degraded, non-partial) report of identical content."""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT id FROM reports WHERE content_hash = ? AND reusable = 1 ORDER BY created_at DESC LIMIT 1",
+                (content_hash,),
+            ).fetchone()
+        return self.get(row[0]) if row else None
+
+    @staticmethod
+    def _with_remediation(report: SecurityReport, findings: List[AgentFinding]) -> SecurityReport:
+        return report.model_copy(update={
+            "findings": list(report.findings) + list(findings),
+            "remediation_status": "ready",
+        })
+
+    def attach_remediation(self, report_id: str, findings: List[AgentFinding]) -> None:
+        """Fold deferred remediation into the stored report once it has been generated."""
+        report = self.get(report_id)
+        if report is None:
+            self._early_remediation[report_id] = findings
+            while len(self._early_remediation) > self.cache_size:
+                self._early_remediation.popitem(last=False)
+            return
+        if report.remediation_status != "ready":
+            self.put(self._with_remediation(report, findings))
+
+    async def save(self, report: SecurityReport) -> None:
+        try:
+            await asyncio.to_thread(self.put, report)
+        except Exception as e:
+            # Persisting must never fail the analysis response
+            logger.error(f"❌ Failed to store report {report.id}: {e}")
+
+    async def load(self, report_id: str) -> Optional[SecurityReport]:
+        if report_id in self._hot:
+            return self.get(report_id)
+        return await asyncio.to_thread(self.get, report_id)
+
+    async def load_by_content_hash(self, content_hash: str) -> Optional[SecurityReport]:
+        try:
+            return await asyncio.to_thread(self.find_by_content_hash, content_hash)
+        except Exception as e:
+            logger.error(f"❌ Report lookup by content hash failed: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        found = self.hot_hits + self.disk_hits
+        return {
+            "hot_entries": len(self._hot),
+            "hot_hits": self.hot_hits,
+            "disk_hits": self.disk_hits,
+            "not_found": self.not_found,
+            "hot_hit_rate": round(self.hot_hits / found, 3) if found else 0.0,
+            "compression_ratio": round(self.bytes_raw / self.bytes_stored, 2) if self.bytes_stored else None,
+        }
+
+
+report_store = ReportStore(
+    path=settings.REPORT_STORE_PATH,
+    cache_size=settings.REPORT_CACHE_SIZE,
+    compression_level=settings.REPORT_COMPRESSION_LEVEL,
+)
@@ -0,0 +1,143 @@
+"""
+Time-bucketed risk trend rollups, maintained incrementally as vulnerabilities
+are written. Each audit store turns a batch of vulnerability rows into one
+delta per (granularity, bucket_start, risk, status, artifact) and adds it to
+the risk_rollups table with an upsert, so the analytics endpoint reads
+O(buckets) rows instead of aggregating raw history.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+ROLLUP_KEY = ("granularity", "bucket_start", "risk", "status", "artifact")
+ROLLUP_COUNTERS = ("count", "score_sum", "score_count")
+# Rows logged without a status still need a concrete key column
+NO_STATUS = "UNKNOWN"
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _parse(value: Any) -> datetime:
+    """Naive UTC, like the rows supabase_logger writes (offsets are converted, not dropped)."""
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def rollup_deltas(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Aggregate a batch of vulnerability rows into rollup increments (bucket_start as ISO string)."""
+    acc: Dict[Tuple, List[int]] = defaultdict(lambda: [0, 0, 0])
+    for row in rows:
+        created_at = _parse(row.get("created_at") or datetime.utcnow())
+        score = row.get("overall_score")
+        for granularity in GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(created_at, granularity).isoformat(),
+                row["risk"],
+                row.get("status") or NO_STATUS,
+                row["artifact"],
+            )
+            counters = acc[key]
+            counters[0] += 1
+            if score is not None:
+                counters[1] += int(score)
+                counters[2] += 1
+    return [
+        {**dict(zip(ROLLUP_KEY, key)), **dict(zip(ROLLUP_COUNTERS, counters))}
+        for key, counters in acc.items()
+    ]
+
+
+def default_window(granularity: str, hours: int, days: int) -> Tuple[datetime, datetime]:
+    """[since, until) covering the last `hours` hourly or `days` daily buckets, including the current one."""
+    step = GRANULARITIES[granularity]
+    until = bucket_start(datetime.utcnow(), granularity) + step
+    return until - step * (hours if granularity == "hour" else days), until
+
+
+def trend_series(
+    rows: List[Dict[str, Any]],
+    granularity: str,
+    since: datetime,
+    until: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    Rollup rows -> one entry per bucket in [since, until), oldest first,
+    with empty buckets filled in so charts get a continuous series.
+    """
+    step = GRANULARITIES[granularity]
+    buckets: Dict[str, Dict[str, Any]] = {}
+    start = bucket_start(since, granularity)
+    if start < since:
+        start += step
+    t = start
+    while t < until:
+        buckets[t.isoformat()] = {
+            "bucket_start": t.isoformat(),
+            "total": 0,
+            "by_risk": {},
+            "by_status": {},
+            "by_artifact": {},
+            "avg_score": None,
+            "_score_sum": 0,
+            "_score_count": 0,
+        }
+        t += step
+
+    for row in rows:
+        bucket = buckets.get(_parse(row["bucket_start"]).isoformat())
+        if bucket is None:
+            continue
+        count = int(row["count"])
+        bucket["total"] += count
+        for field, dim in (("by_risk", "risk"), ("by_status", "status"), ("by_artifact", "artifact")):
+            bucket[field][row[dim]] = bucket[field].get(row[dim], 0) + count
+        bucket["_score_sum"] += int(row["score_sum"])
+        bucket["_score_count"] += int(row["score_count"])
+
+    series = []
+    for bucket in buckets.values():
+        score_sum, score_count = bucket.pop("_score_sum"), bucket.pop("_score_count")
+        if score_count:
+            bucket["avg_score"] = round(score_sum / score_count, 2)
+        series.append(bucket)
+    return series
+
+
+def summarize(series: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Window totals over a trend series."""
+    totals: Dict[str, Any] = {"total": 0, "by_risk": {}, "by_status": {}, "by_artifact": {}}
+    for bucket in series:
+        totals["total"] += bucket["total"]
+        for field in ("by_risk", "by_status", "by_artifact"):
+            for k, v in bucket[field].items():
+                totals[field][k] = totals[field].get(k, 0) + v
+    return totals
+
+
+def window_bounds(
+    granularity: str,
+    since: Optional[str],
+    until: Optional[str],
+    default_hours: int,
+    default_days: int,
+) -> Tuple[datetime, datetime]:
+    """Parse an optional ISO [since, until) window; missing ends fall back to the default window."""
+    default_since, default_until = default_window(granularity, default_hours, default_days)
+    end = _parse(until) if until else default_until
+    if since:
+        start = _parse(since)
+    elif until:
+        start = end - (default_until - default_since)
+    else:
+        start = default_since
+    if start >= end:
+        raise ValueError("since must be before until")
+    return start, end
@@ -7,7 +7,20 @@ DATABASE_URL = settings.DATABASE_URL
 if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# SQLAlchemy's asyncpg dialect caches prepared statements per connection; size set via the URL
+if DATABASE_URL and "prepared_statement_cache_size" not in DATABASE_URL:
+    DATABASE_URL += ("&" if "?" in DATABASE_URL else "?") + f"prepared_statement_cache_size={settings.DB_STATEMENT_CACHE_SIZE}"
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=settings.DB_ECHO,
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_S,
+    pool_recycle=settings.DB_POOL_RECYCLE_S,
+    pool_pre_ping=True,
+)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
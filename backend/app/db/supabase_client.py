@@ -1,7 +1,10 @@
 """
 Supabase client configuration and initialization.
 This module provides a single source of truth for Supabase database access.
+The client is created on first use, so the backend can start (e.g. with the
+SQLite audit backend) without Supabase credentials.
 """
+from typing import Optional
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
@@ -9,8 +12,21 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase client
-supabase: Client = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+_client: Optional[Client] = None
+
+
+def get_supabase() -> Client:
+    global _client
+    if _client is None:
+        _client = create_client(
+            os.getenv("SUPABASE_URL"),
+            os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+        )
+    return _client
+
+
+def __getattr__(name: str):
+    # Keeps `from app.db.supabase_client import supabase` working, lazily
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(name)
@@ -18,6 +18,31 @@ class VulnerabilitySeverity(str, Enum):
     LOW = "low"
     INFO = "info"
 
+_SEVERITY_ALIASES = {
+    "crit": "critical", "severe": "high", "important": "high", "moderate": "medium", "med": "medium",
+    "warning": "medium", "minor": "low", "informational": "info", "information": "info", "none": "info",
+}
+
+
+def normalize_severity(value: Any, default: VulnerabilitySeverity = VulnerabilitySeverity.MEDIUM) -> VulnerabilitySeverity:
+    """Map model-provided severities (any case, common synonyms, CVSS scores) onto VulnerabilitySeverity."""
+    if isinstance(value, VulnerabilitySeverity):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        score = float(value)
+        return (VulnerabilitySeverity.CRITICAL if score >= 9 else VulnerabilitySeverity.HIGH if score >= 7
+                else VulnerabilitySeverity.MEDIUM if score >= 4 else VulnerabilitySeverity.LOW if score > 0
+                else VulnerabilitySeverity.INFO)
+    text = str(value or "").strip().lower()
+    text = _SEVERITY_ALIASES.get(text, text)
+    try:
+        return VulnerabilitySeverity(text)
+    except ValueError:
+        try:
+            return normalize_severity(float(text), default)
+        except ValueError:
+            return default
+
 class AnalysisRequest(BaseModel):
     artifact_type: ArtifactType
     content: str
@@ -54,6 +79,7 @@ class AgentFinding(BaseModel):
     location: Optional[str] = None
     suggestion: Optional[str] = None
     derived_from: Optional[str] = None  # "Derived from PDF Artifact" etc.
+    contributing_agents: Optional[List[str]] = None  # set on canonical findings merged across agents
 
 class SecurityReport(BaseModel):
     id: str
@@ -63,6 +89,12 @@ class SecurityReport(BaseModel):
     summary: str
     status: str
     ml_signals: Optional[Dict[str, Any]] = None
+    pipeline: Optional[Dict[str, Any]] = None  # local pre-processing stats (triage, ...)
+    partial: bool = False  # True when an agent missed its deadline or its LLM calls failed
+    missing_agents: Optional[List[str]] = None
+    degraded: bool = False  # True when any part (agent findings or risk score) was computed locally because the LLM failed
+    remediation_status: Optional[str] = None  # "inline", or "pending"/"running"/"ready" when deferred
+    duplicate_of: Optional[Dict[str, Any]] = None  # {"report_id", "similarity"} when a prior report was reused
 
 class AgentMessage(BaseModel):
     agent: str
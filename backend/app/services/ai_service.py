@@ -1,17 +1,28 @@
-from openai import AsyncOpenAI
-import json
+import time
 import logging
 import asyncio
-from typing import List, Dict, Any, Optional
+from collections import deque
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Tuple
 from app.core.config import settings
+from app.services.llm_pool import LLMPool
+from app.services.json_repair import parse_llm_json
+from app.services.stream_parser import FindingsStreamParser
+from app.models.schemas import normalize_severity
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# LLM calls that produced no answer, collected per agent run (see AIService.run_tracked)
+_failed_calls: ContextVar[Optional[List[str]]] = ContextVar("llm_failed_calls", default=None)
+
+
 class AIService:
     """
-    Shared service for interacting with AI models via OpenRouter (OpenAI-compatible API).
+    Shared service for interacting with AI models via OpenRouter (OpenAI-compatible API),
+    or a pool of OpenAI-compatible endpoints configured in LLM_ENDPOINTS.
     Handles configuration, prompting, and response parsing.
     """
     
@@ -19,92 +30,300 @@ class AIService:
         self.api_key = settings.OPENROUTER_API_KEY
         self.base_url = settings.OPENROUTER_BASE_URL
         self.model_name = settings.MODEL_NAME
+        self.fast_model_name = settings.FAST_MODEL_NAME or settings.MODEL_NAME
+        self.metrics: Dict[str, Any] = {"analyses": 0, "calls": {}, "escalations": {}, "requests": 0, "hedges": 0, "hedge_wins": 0, "json_repairs": 0}
+        self._latencies: Dict[str, deque] = {}
+        self.breaker = CircuitBreaker("llm", settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_S)
         
-        if not self.api_key:
+        if not self.api_key and not settings.LLM_ENDPOINTS:
             logger.warning("OPENROUTER_API_KEY is not set. AI agents will fail.")
         
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url,
-        )
+        self.pool = LLMPool.from_settings()
         
-    async def analyze_content(self, 
-                             system_prompt: str, 
-                             user_content: str, 
-                             response_schema: str = "JSON") -> List[Dict[str, Any]]:
+    async def run_tracked(self, coro: Awaitable[Any]) -> Tuple[Any, List[str]]:
+        """
+        Await `coro` (one agent's work) and return (result, failures): the LLM calls it
+        made that ended without an answer. Agents swallow errors and return empty results,
+        so this is how the pipeline tells an outage from a clean bill.
+        """
+        failures: List[str] = []
+        token = _failed_calls.set(failures)
+        try:
+            return await coro, failures
+        finally:
+            _failed_calls.reset(token)
+
+    @staticmethod
+    def _note_failure(reason: str) -> None:
+        failures = _failed_calls.get()
+        if failures is not None:
+            failures.append(reason)
+
+    def _build_messages(self, system_prompt: str, user_content: str, response_schema: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": f"{system_prompt}\n\nOUTPUT FORMAT:\nThe output must be valid JSON matching this schema:\n{response_schema}\n\nProvide ONLY the JSON output. Do not include markdown formatting."},
+            {"role": "user", "content": f"CONTENT TO ANALYZE:\n{user_content}"}
+        ]
+
+    async def _complete(self, model: str, messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        One chat completion with rate-limit retries. Returns the raw text, or None on empty response.
+        Every failed attempt counts against the circuit breaker; once it opens, remaining
+        attempts (here and in concurrent calls) fail fast with CircuitOpenError.
+        """
+        response = None
+        max_retries = 3
+        base_delay = 2
+
+        for attempt in range(max_retries):
+            self.breaker.check()
+            try:
+                chat_completion = await self._hedged_request(model, messages)
+                response = chat_completion
+                self.breaker.record_success()
+                break
+            except Exception as e:
+                self.breaker.record_failure()
+                logger.warning(f"Attempt {attempt+1} failed: {e}")
+                if "429" in str(e) or "rate limit" in str(e).lower():
+                    if attempt < max_retries - 1:
+                        delay = base_delay * (2 ** attempt)
+                        logger.warning(f"Rate limit hit. Retrying in {delay}s...")
+                        await asyncio.sleep(delay)
+                        continue
+
+                if attempt == max_retries - 1:
+                    logger.error(f"OpenAI API error after retries: {e}")
+                    raise e
+
+        if not response or not response.choices:
+            logger.error("Failed to generate content or empty response")
+            return None
+        return response.choices[0].message.content
+
+    async def _request(self, model: str, messages: List[Dict[str, str]]):
+        """
+        Single API call (routed by the endpoint pool) bounded by LLM_CALL_TIMEOUT_S; records latency on success.
+        Requests JSON mode when enabled; the pool drops it for endpoints that reject it.
+        """
+        start = time.monotonic()
+        extra = {"response_format": {"type": "json_object"}} if settings.LLM_JSON_MODE else {}
+        chat_completion = await self.pool.create(
+            model=model,
+            messages=messages,
+            timeout=settings.LLM_CALL_TIMEOUT_S,
+            **extra,
+        )
+        self._latencies.setdefault(model, deque(maxlen=200)).append(time.monotonic() - start)
+        return chat_completion
+
+    def _hedge_delay(self, model: str) -> float:
+        """Observed p95 latency for the model (default until enough samples)."""
+        samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < 20:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_S
+        return max(settings.LLM_HEDGE_MIN_DELAY_S, samples[int(len(samples) * 0.95) - 1])
+
+    async def _hedged_request(self, model: str, messages: List[Dict[str, str]]):
+        """
+        Fire a duplicate request if the first hasn't returned by ~p95 latency and
+        take whichever finishes first; the loser is cancelled. Hedges are capped
+        at LLM_HEDGE_BUDGET of all requests so they can't double provider load.
+        """
+        self.metrics["requests"] += 1
+        first = asyncio.create_task(self._request(model, messages))
+        tasks = [first]
+        try:
+            within_budget = self.metrics["hedges"] < settings.LLM_HEDGE_BUDGET * self.metrics["requests"]
+            if not settings.LLM_HEDGE_ENABLED or not within_budget:
+                return await first
+
+            done, _ = await asyncio.wait({first}, timeout=self._hedge_delay(model))
+            if done:
+                return first.result()
+
+            self.metrics["hedges"] += 1
+            second = asyncio.create_task(self._request(model, messages))
+            tasks.append(second)
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.metrics["hedge_wins"] += 1
+                        return task.result()
+                    if not pending:
+                        raise task.exception()
+        finally:
+            # Also when the caller is cancelled (agent deadline): no request outlives the call holding a connection
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def _parse_response(self, response_text: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Parse model output into a list, repairing fences/prose/truncation. None means nothing usable."""
+        if response_text is None:
+            return None
+
+        data, repaired = parse_llm_json(response_text)
+        if data is None:
+            logger.error("Failed to parse JSON response")
+            logger.error(f"Raw response: {response_text}")
+            return None
+        if repaired:
+            self.metrics["json_repairs"] += 1
+            logger.warning("Model output was not valid JSON; using repaired parse")
+        # Ensure it's a list
+        if isinstance(data, list):
+            return data
+        if not isinstance(data, dict):
+            logger.error(f"Unexpected JSON format: {type(data)}")
+        return [data]
+
+    def _escalation_reason(self, results: Optional[List[Dict[str, Any]]], check_severity: bool = True) -> Optional[str]:
+        """Why a fast-tier result needs the strong model, or None if it can be trusted."""
+        if results is None:
+            return "invalid_json"
+        if not check_severity:
+            return None
+        items: List[Any] = []
+        for r in results:
+            if isinstance(r, dict) and isinstance(r.get("findings"), list):
+                items.extend(r["findings"])
+            else:
+                items.append(r)
+        escalate_on = {s.lower() for s in settings.CASCADE_ESCALATE_SEVERITIES}
+        for item in items:
+            if isinstance(item, dict) and normalize_severity(item.get("severity")).value in escalate_on:
+                return "high_severity"
+        return None
+
+    def _record(self, tier: str, reason: Optional[str] = None) -> None:
+        self.metrics["calls"][tier] = self.metrics["calls"].get(tier, 0) + 1
+        if reason:
+            self.metrics["escalations"][reason] = self.metrics["escalations"].get(reason, 0) + 1
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        analyses = self.metrics["analyses"]
+        escalated = sum(self.metrics["escalations"].values())
+        return {
+            "cascade_enabled": settings.MODEL_CASCADE_ENABLED,
+            "tiers": {"fast": self.fast_model_name, "strong": self.model_name},
+            "analyses": analyses,
+            "calls": dict(self.metrics["calls"]),
+            "escalations": dict(self.metrics["escalations"]),
+            "escalation_rate": round(escalated / analyses, 3) if analyses else 0.0,
+            "requests": self.metrics["requests"],
+            "hedges": self.metrics["hedges"],
+            "hedge_wins": self.metrics["hedge_wins"],
+            "hedge_delay_s": {m: round(self._hedge_delay(m), 3) for m in self._latencies},
+            "json_repairs": self.metrics["json_repairs"],
+            "circuit": self.breaker.stats(),
+            "pool": self.pool.stats(),
+        }
+
+    async def analyze_content(self,
+                             system_prompt: str,
+                             user_content: str,
+                             response_schema: str = "JSON",
+                             escalate: bool = False,
+                             escalate_on_severity: bool = False) -> List[Dict[str, Any]]:
         """
         Sends content to OpenRouter and returns structured JSON analysis.
+        With the model cascade enabled, the fast tier answers first and the strong
+        model is only called when the fast result is invalid, when it reports high
+        severity and `escalate_on_severity` is set (content agents; remediation and
+        risk only echo severities they were given), or when the caller passes
+        `escalate` (e.g. high ML risk).
         """
         try:
-            # Construct the messages
-            messages = [
-                {"role": "system", "content": f"{system_prompt}\n\nOUTPUT FORMAT:\nThe output must be valid JSON matching this schema:\n{response_schema}\n\nProvide ONLY the JSON output. Do not include markdown formatting."},
-                {"role": "user", "content": f"CONTENT TO ANALYZE:\n{user_content}"}
-            ]
-            
-            # Generate response with retry logic
-            response = None
-            max_retries = 3
-            base_delay = 2
-            
-            for attempt in range(max_retries):
+            messages = self._build_messages(system_prompt, user_content, response_schema)
+            self.metrics["analyses"] += 1
+
+            if settings.MODEL_CASCADE_ENABLED and not escalate:
                 try:
-                    chat_completion = await self.client.chat.completions.create(
-                        model=self.model_name,
-                        messages=messages
-                    )
-                    response = chat_completion
-                    break
+                    results = self._parse_response(await self._complete(self.fast_model_name, messages))
+                    reason = self._escalation_reason(results, escalate_on_severity)
                 except Exception as e:
-                    logger.warning(f"Attempt {attempt+1} failed: {e}")
-                    if "429" in str(e) or "rate limit" in str(e).lower():
-                        if attempt < max_retries - 1:
-                            delay = base_delay * (2 ** attempt)
-                            logger.warning(f"Rate limit hit. Retrying in {delay}s...")
-                            await asyncio.sleep(delay)
-                            continue
-                    
-                    if attempt == max_retries - 1:
-                        logger.error(f"OpenAI API error after retries: {e}")
-                        raise e
-            
-            if not response or not response.choices:
-                logger.error("Failed to generate content or empty response")
-                return []
-
-            response_text = response.choices[0].message.content
-            
-            # Clean up response if it contains markdown code blocks
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.startswith("```"):
-                response_text = response_text[3:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
-                
-            response_text = response_text.strip()
-            
-            # Parse JSON
+                    logger.warning(f"Fast tier ({self.fast_model_name}) failed: {e}")
+                    results, reason = None, "fast_error"
+                self._record("fast")
+                if reason is None:
+                    return results
+                logger.info(f"Escalating to {self.model_name}: {reason}")
+                fast_results = results
+            else:
+                reason = "ml_risk" if settings.MODEL_CASCADE_ENABLED else None
+                fast_results = None
+
+            self._record("strong", reason)
             try:
-                data = json.loads(response_text)
-                # Ensure it's a list
-                if isinstance(data, dict):
-                    return [data]
-                elif isinstance(data, list):
-                    return data
-                else:
-                    logger.error(f"Unexpected JSON format: {type(data)}")
-                    # Try to see if it's wrapped in a key like 'findings'
-                    # But the caller usually expects a list or dict they can parse
-                    return [data] # Wrap dict in list if expected
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON response: {e}")
-                logger.error(f"Raw response: {response_text}")
-                return []
-                
+                results = self._parse_response(await self._complete(self.model_name, messages))
+            except Exception:
+                if not fast_results:
+                    raise
+                results = None
+            # A failed escalation still keeps a valid fast-tier answer
+            return results if results is not None else (fast_results or [])
+
+        except CircuitOpenError as e:
+            logger.warning(f"AI Analysis skipped: {e}")
+            self._note_failure("circuit_open")
+            return []
         except Exception as e:
             logger.error(f"AI Analysis failed: {e}")
+            self._note_failure("error")
             return []
 
+    async def stream_findings(self,
+                              system_prompt: str,
+                              user_content: str,
+                              response_schema: str = "JSON",
+                              escalate: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streamed completion that yields each element of the "findings" array as soon as it
+        is complete. No cascade or hedging here: a stream commits to one model up front, so
+        the fast tier is used unless `escalate` (or the cascade is disabled). Errors end the
+        stream after whatever was already yielded. The endpoint slot is held until the
+        stream ends or this generator is closed.
+        """
+        cascade = settings.MODEL_CASCADE_ENABLED and not escalate
+        model = self.fast_model_name if cascade else self.model_name
+        messages = self._build_messages(system_prompt, user_content, response_schema)
+        parser = FindingsStreamParser()
+        self.metrics["analyses"] += 1
+        self._record("fast" if cascade else "strong")
+        stream = None
+        try:
+            self.breaker.check()
+            extra = {"response_format": {"type": "json_object"}} if settings.LLM_JSON_MODE else {}
+            stream = await self.pool.create(
+                model=model,
+                messages=messages,
+                timeout=settings.LLM_CALL_TIMEOUT_S,
+                stream=True,
+                **extra,
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                for item in parser.feed(delta or ""):
+                    yield item
+            self.breaker.record_success()
+        except CircuitOpenError as e:
+            logger.warning(f"AI stream skipped: {e}")
+            self._note_failure("circuit_open")
+            return
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.error(f"AI stream failed after {parser.emitted} findings: {e}")
+            self._note_failure("stream_error")
+        finally:
+            if stream is not None:
+                await stream.aclose()
+        for item in parser.remainder():
+            yield item
+
+
 # Singleton instance
 ai_service = AIService()
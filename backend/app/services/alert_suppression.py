@@ -0,0 +1,182 @@
+"""
+Alert suppression.
+Repeat alerts for the same artifact at the same risk level are suppressed
+for a per-risk window, so re-scanning a repository on every CI run alerts
+(and writes an alerts row) once per incident. Artifacts are identified by
+their MinHash fingerprint: a re-scan with small changes joins the identity
+of the earlier scan through an LSH lookup. Suppressed repeats are counted
+and folded into the next alert once the window has passed. State lives in
+memory, optionally snapshotted to a JSON file across restarts.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.near_duplicate import NUM_PERM, LSHIndex
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSuppression:
+    def __init__(
+        self,
+        windows_s: Dict[str, float],
+        similarity: float,
+        max_entries: int,
+        path: str = "",
+        save_interval_s: float = 30.0,
+    ):
+        self.windows_s = {k.upper(): v for k, v in windows_s.items()}
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.path = path
+        self.save_interval_s = save_interval_s
+        self._index = LSHIndex()
+        # identity -> MinHash signature (list), kept for persistence
+        self._signatures: Dict[str, list] = {}
+        # "identity|RISK" -> {"last_alert_at", "suppressed"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._last_save = time.time()
+        self._dirty = False
+        self.allowed = 0
+        self.suppressed = 0
+
+    def _identity(self, fingerprint: Optional[Dict[str, Any]], register: bool) -> Optional[str]:
+        """Identity of an artifact: the earliest similar artifact's content hash."""
+        fingerprint = fingerprint or {}
+        sig = np.asarray(fingerprint.get("minhash") or [], dtype=np.uint32)
+        content_hash = fingerprint.get("content_hash")
+        if sig.size != NUM_PERM or not content_hash:
+            return content_hash
+        matches = self._index.query(sig, self.similarity)
+        if matches:
+            return matches[0][0]
+        if register:
+            self._index.add(content_hash, sig)
+            self._signatures[content_hash] = sig.tolist()
+        return content_hash
+
+    def _window(self, risk_level: str) -> float:
+        return self.windows_s.get(risk_level.upper(), 0.0)
+
+    def admit(self, fingerprint: Optional[Dict[str, Any]], risk_level: str) -> Tuple[bool, int]:
+        """
+        (allowed, repeats). Allowed: `repeats` suppressed alerts are folded into this one.
+        Suppressed: `repeats` is the count so far in the current window.
+        """
+        window = self._window(risk_level)
+        identity = self._identity(fingerprint, register=window > 0)
+        if identity is None or window <= 0:
+            return True, 0
+        key = f"{identity}|{risk_level.upper()}"
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry["last_alert_at"] < window:
+            entry["suppressed"] += 1
+            self.suppressed += 1
+            self._dirty = True
+            return False, entry["suppressed"]
+
+        folded = entry["suppressed"] if entry else 0
+        self._entries[key] = {"last_alert_at": now, "suppressed": 0}
+        self.allowed += 1
+        self._dirty = True
+        self._prune(now)
+        self._maybe_save()
+        return True, folded
+
+    def _prune(self, now: float) -> None:
+        if len(self._entries) <= self.max_entries:
+            return
+        expired = [
+            k for k, e in self._entries.items()
+            if now - e["last_alert_at"] >= self._window(k.rsplit("|", 1)[1]) and not e["suppressed"]
+        ]
+        for k in expired:
+            del self._entries[k]
+        # Still over the bound: drop the oldest incidents
+        if len(self._entries) > self.max_entries:
+            for k in sorted(self._entries, key=lambda k: self._entries[k]["last_alert_at"])[:len(self._entries) - self.max_entries]:
+                del self._entries[k]
+        # Identities without incidents leave the LSH index too, so memory follows max_entries
+        live = {k.rsplit("|", 1)[0] for k in self._entries}
+        for identity in [i for i in self._signatures if i not in live]:
+            del self._signatures[identity]
+            self._index.remove(identity)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        identities = {k.rsplit("|", 1)[0] for k in self._entries}
+        return {
+            "entries": dict(self._entries),
+            "signatures": {i: s for i, s in self._signatures.items() if i in identities},
+        }
+
+    def _write(self, snapshot: Dict[str, Any]) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(snapshot, fh)
+        os.replace(tmp, self.path)
+
+    def _maybe_save(self) -> None:
+        if not self.path or time.time() - self._last_save < self.save_interval_s:
+            return
+        self._last_save = time.time()
+        self._dirty = False
+        snapshot = self._snapshot()
+        try:
+            asyncio.get_running_loop().run_in_executor(None, self._write, snapshot)
+        except RuntimeError:
+            self._write(snapshot)
+
+    def save(self) -> None:
+        if not self.path or not self._dirty:
+            return
+        try:
+            self._write(self._snapshot())
+            self._dirty = False
+            self._last_save = time.time()
+        except OSError as e:
+            logger.error(f"Saving alert suppression state to {self.path} failed: {e}")
+
+    def load(self) -> None:
+        """Restore state, dropping incidents whose window has passed with nothing suppressed."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                snapshot = json.load(fh)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Loading alert suppression state from {self.path} failed: {e}")
+            return
+        now = time.time()
+        self._entries = {
+            k: e for k, e in snapshot.get("entries", {}).items()
+            if e["suppressed"] or now - e["last_alert_at"] < self._window(k.rsplit("|", 1)[1])
+        }
+        identities = {k.rsplit("|", 1)[0] for k in self._entries}
+        for identity, sig in snapshot.get("signatures", {}).items():
+            if identity in identities:
+                self._index.add(identity, np.asarray(sig, dtype=np.uint32))
+                self._signatures[identity] = sig
+        logger.info(f"Alert suppression: restored {len(self._entries)} incidents")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "incidents": len(self._entries),
+            "allowed": self.allowed,
+            "suppressed": self.suppressed,
+        }
+
+
+alert_suppression = AlertSuppression(
+    windows_s=settings.ALERT_SUPPRESSION_WINDOWS_S,
+    similarity=settings.ALERT_SUPPRESSION_SIMILARITY,
+    max_entries=settings.ALERT_SUPPRESSION_MAX_ENTRIES,
+    path=settings.ALERT_SUPPRESSION_PATH,
+)
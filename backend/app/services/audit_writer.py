@@ -0,0 +1,220 @@
+"""
+Write-behind audit log writer.
+log_vulnerability/log_alert enqueue rows here instead of writing to the audit
+store in the request path. A background task coalesces them into bulk inserts,
+flushed by size or interval. The buffer is bounded: overflow and rows that
+cannot be written at shutdown spill to a local JSONL file, which is replayed
+on the next start. Stores skip rows they already hold, so retries are safe;
+rows that keep failing are retried one by one and then dead-lettered.
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.audit_store import get_audit_store
+
+logger = logging.getLogger(__name__)
+
+# Flush order: alerts reference vulnerabilities
+TABLES = ("vulnerabilities", "alerts")
+
+# Async bulk insert of rows into a table (sync functions are run in a worker thread)
+InsertFn = Callable[[str, List[Dict[str, Any]]], Any]
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        insert_fn: InsertFn,
+        flush_rows: int,
+        flush_interval_s: float,
+        max_buffer: int,
+        spill_path: str,
+        max_attempts: int = 5,
+        dead_letter_path: str = "",
+    ):
+        self.insert_fn = insert_fn
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        self.max_buffer = max_buffer
+        self.spill_path = spill_path
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+        # Row id -> failed flushes so far
+        self._attempts: Dict[str, int] = {}
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {t: [] for t in TABLES}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.spilled = 0
+        self.flush_errors = 0
+        self.dead_lettered = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def buffered(self) -> int:
+        return sum(len(rows) for rows in self._buffers.values())
+
+    def enqueue(self, table: str, row: Dict[str, Any]) -> None:
+        """Never blocks: rows beyond the buffer bound go straight to the spill file."""
+        if self.buffered() >= self.max_buffer:
+            self._spill([(table, row)])
+            return
+        self._buffers[table].append(row)
+        if self._wake is not None and self.buffered() >= self.flush_rows:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._replay_spill()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Audit write-behind writer started")
+
+    async def stop(self) -> None:
+        """Final flush; anything still unwritten is spilled to disk."""
+        self._stopping = True
+        if self._task is not None:
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        leftover = [(t, r) for t in TABLES for r in self._buffers[t]]
+        if leftover:
+            self._spill(leftover)
+            self._buffers = {t: [] for t in TABLES}
+        logger.info(f"Audit writer stopped: {self.written} written, {self.spilled} spilled")
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        for table in TABLES:
+            rows, self._buffers[table] = self._buffers[table], []
+            if not rows:
+                continue
+            start = time.perf_counter()
+            try:
+                await self._insert(table, rows)
+                self.written += len(rows)
+                for r in rows:
+                    self._attempts.pop(self._key(r), None)
+                logger.info(f"Audit flush: {len(rows)} {table} rows in {(time.perf_counter() - start) * 1000:.0f}ms")
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Audit flush of {len(rows)} {table} rows failed: {e}")
+                rows = await self._retire_exhausted(table, rows)
+                # Requeue ahead of newer rows while there is room, spill the rest
+                room = max(0, self.max_buffer - self.buffered())
+                self._buffers[table][:0] = rows[:room]
+                if rows[room:]:
+                    self._spill([(table, r) for r in rows[room:]])
+                if table == "vulnerabilities" and rows:
+                    break  # alerts may reference rows that did not land
+
+    async def _insert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if asyncio.iscoroutinefunction(self.insert_fn):
+            await self.insert_fn(table, rows)
+        else:
+            await asyncio.to_thread(self.insert_fn, table, rows)
+
+    @staticmethod
+    def _key(row: Dict[str, Any]) -> str:
+        return str(row.get("id") or id(row))
+
+    async def _retire_exhausted(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Count a failed flush against each row. Rows out of attempts are inserted one by one,
+        so a poison row can't hold back the rest; those that still fail are dead-lettered.
+        Returns the rows to requeue.
+        """
+        retry: List[Dict[str, Any]] = []
+        dead: List[tuple] = []
+        for r in rows:
+            key = self._key(r)
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            if self._attempts[key] < self.max_attempts:
+                retry.append(r)
+                continue
+            del self._attempts[key]
+            try:
+                await self._insert(table, [r])
+                self.written += 1
+            except Exception as e:
+                logger.error(f"Audit {table} row {key} failed {self.max_attempts} flushes, dead-lettering: {e}")
+                dead.append((table, r))
+        if dead:
+            self._write_jsonl(self.dead_letter_path, dead)
+            self.dead_lettered += len(dead)
+        return retry
+
+    def _write_jsonl(self, path: str, items: List[tuple]) -> bool:
+        if not path:
+            logger.error(f"No audit file configured, {len(items)} rows lost")
+            return False
+        try:
+            with open(path, "a", encoding="utf-8") as fh:
+                for table, row in items:
+                    fh.write(json.dumps({"table": table, "row": row}, default=str) + "\n")
+            return True
+        except OSError as e:
+            logger.error(f"Audit write to {path} failed, {len(items)} rows lost: {e}")
+            return False
+
+    def _spill(self, items: List[tuple]) -> None:
+        if self._write_jsonl(self.spill_path, items):
+            self.spilled += len(items)
+
+    def _replay_spill(self) -> None:
+        if not os.path.exists(self.spill_path):
+            return
+        replay_path = f"{self.spill_path}.replay"
+        os.replace(self.spill_path, replay_path)
+        count = 0
+        with open(replay_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if item.get("table") in self._buffers:
+                    self.enqueue(item["table"], item["row"])
+                    count += 1
+        os.remove(replay_path)
+        logger.info(f"Audit writer replaying {count} spilled rows")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "buffered": self.buffered(),
+            "written": self.written,
+            "spilled": self.spilled,
+            "flush_errors": self.flush_errors,
+            "dead_lettered": self.dead_lettered,
+        }
+
+
+audit_writer = AuditWriter(
+    insert_fn=get_audit_store().insert_rows,
+    flush_rows=settings.AUDIT_FLUSH_ROWS,
+    flush_interval_s=settings.AUDIT_FLUSH_INTERVAL_S,
+    max_buffer=settings.AUDIT_MAX_BUFFER,
+    spill_path=settings.AUDIT_SPILL_PATH,
+    max_attempts=settings.AUDIT_MAX_FLUSH_ATTEMPTS,
+    dead_letter_path=settings.AUDIT_DEAD_LETTER_PATH,
+)
@@ -0,0 +1,94 @@
+"""
+Circuit breaker for the LLM backend.
+Consecutive failures/timeouts open the circuit so callers fail fast instead of
+paying retries against a dead provider; after a cool-down one probe is let
+through (half-open) and its outcome closes or re-opens the circuit.
+"""
+import time
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout_s: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.trips = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            self._state = HALF_OPEN
+            self._probe_started = None
+            logger.info(f"Circuit '{self.name}' half-open: next request probes the backend")
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Admission for a unit of work (one analysis). Closed: always; open: never;
+        half-open: only the single probe (a stale probe is replaced after the cool-down).
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            now = time.monotonic()
+            if self._probe_started is None or now - self._probe_started >= self.reset_timeout_s:
+                self._probe_started = now
+                return True
+        self.rejected += 1
+        return False
+
+    def check(self) -> None:
+        """Fail fast for an individual backend call while open."""
+        if self.state == OPEN:
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            logger.info(f"Circuit '{self.name}' closed: backend recovered")
+        self._state = CLOSED
+        self._failures = 0
+        self._probe_started = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+            self._trip()
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self.trips += 1
+        logger.warning(
+            f"Circuit '{self.name}' opened after {self._failures} consecutive failures; "
+            f"retrying in {self.reset_timeout_s}s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in_s": round(max(0.0, self._opened_at + self.reset_timeout_s - time.monotonic()), 1) if state == OPEN else 0.0,
+        }
@@ -0,0 +1,291 @@
+"""
+Security-focused code slicing.
+Keeps only the functions/classes that touch security sinks or sources (SQL
+execution, subprocess, auth, secrets, deserialization...) plus the call sites
+that reach them. Python is parsed with `ast`; other languages use a
+brace/indent tokenizer fallback. Slices are cached per file content hash.
+"""
+import ast
+import re
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.secret_scanner import scan_line
+
+logger = logging.getLogger(__name__)
+
+# Calls that are sinks by their final attribute alone
+SINK_CALLS = {
+    "execute", "executemany", "executescript", "raw",  # SQL
+    "system", "popen", "Popen", "check_call", "check_output", "spawn", "spawnv",  # processes
+    "eval", "exec", "__import__", "unsafe_load",  # code execution / unsafe parsing
+    "urlopen", "send_file", "render_template_string", "mark_safe",
+}
+# Calls that are only sinks with a known receiver (dict.get/str.text etc. are not)
+QUALIFIED_SINKS = {
+    "subprocess.run", "subprocess.call", "os.execv", "os.execvp", "pickle.loads", "pickle.load", "marshal.loads",
+    "yaml.load", "shelve.open", "requests.get", "requests.post", "requests.request", "httpx.get",
+    "httpx.post", "sqlalchemy.text", "jwt.decode", "hashlib.md5", "hashlib.sha1", "random.random",
+}
+
+# Identifiers/strings hinting at sources, auth and secrets
+SOURCE_RE = re.compile(
+    r"(?i)(request\.|argv|input\(|environ|getenv|password|passwd|secret|token|api_?key|jwt|auth|login|session|cookie|"
+    r"crypt|hash|verify|permission|admin|balance|withdraw|transfer)"
+)
+# Tokenizer fallback: sinks for non-Python sources
+FALLBACK_SINK_RE = re.compile(
+    r"(?i)(\.query\(|\.exec(?:ute)?\(|child_process|\bexec\(|\beval\(|spawn\(|Runtime\.getRuntime|ProcessBuilder|"
+    r"os/exec|sql\.|innerHTML|dangerouslySetInnerHTML|document\.write|\bsystem\(|popen|deserializ|unserialize|"
+    r"readObject|password|secret|token|api_?key|jwt|auth)"
+)
+_FALLBACK_START_RE = re.compile(
+    r"^\s*(?:export\s+)?(?:async\s+)?(?:function\b|class\b|func\b|fn\b|def\b|"
+    r"(?:public|private|protected|static|internal)\b|(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?\(|\w+\s*\([^;]*\)\s*\{)"
+)
+
+MAX_CACHE_ENTRIES = 2048
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _call_name(node: ast.Call) -> str:
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return ""
+
+
+def _sink_name(node: ast.AST) -> Optional[str]:
+    """Sink label for a call node, or None."""
+    if not isinstance(node, ast.Call):
+        return None
+    name = _call_name(node)
+    if name in SINK_CALLS:
+        return name
+    func = node.func
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        qualified = f"{func.value.id}.{func.attr}"
+        if qualified in QUALIFIED_SINKS:
+            return qualified
+    return None
+
+
+def _sinks(node: ast.AST) -> List[str]:
+    return sorted({s for s in map(_sink_name, ast.walk(node)) if s})
+
+
+def _python_units(tree: ast.AST) -> List[Tuple[ast.AST, str]]:
+    """Top-level and nested function/class definitions with dotted names."""
+    units: List[Tuple[ast.AST, str]] = []
+
+    def visit(node: ast.AST, prefix: str) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                name = f"{prefix}{child.name}"
+                units.append((child, name))
+                visit(child, name + ".")
+            else:
+                visit(child, prefix)
+
+    visit(tree, "")
+    return units
+
+
+def _slice_python(source: str) -> Optional[List[Dict[str, Any]]]:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    lines = source.splitlines()
+    units = _python_units(tree)
+    relevant: Dict[str, Dict[str, Any]] = {}
+
+    for node, name in units:
+        if isinstance(node, ast.ClassDef):
+            continue
+        sinks = _sinks(node)
+        segment = "\n".join(lines[node.lineno - 1:node.end_lineno])
+        sources = sorted({m.group(1).lower() for m in SOURCE_RE.finditer(segment)})
+        if sinks or sources:
+            relevant[name] = {"node": node, "name": name, "sinks": sinks, "sources": sources[:8]}
+
+    # Module-level statements that hit sinks (scripts without functions)
+    top_level = [
+        n for n in getattr(tree, "body", [])
+        if not isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Import, ast.ImportFrom,
+                              ast.Assign, ast.AnnAssign))
+        and _sinks(n)
+    ]
+
+    # Module- and class-level assignments: secrets/config, or sinks (never inside functions)
+    assignments: List[Tuple[ast.AST, str, List[str]]] = []
+
+    def collect_assignments(body: List[ast.stmt], scope: str) -> None:
+        for n in body:
+            if isinstance(n, ast.ClassDef):
+                collect_assignments(n.body, f"{scope}.{n.name}" if scope != "<module>" else n.name)
+            elif isinstance(n, (ast.Assign, ast.AnnAssign)):
+                segment = "\n".join(lines[n.lineno - 1:n.end_lineno])
+                hits = {m.group(1).lower() for m in SOURCE_RE.finditer(segment)}
+                hits.update(f"secret:{h['type']}" for line in segment.splitlines() for h in scan_line(line))
+                if hits or _sinks(n):
+                    assignments.append((n, scope, sorted(hits)[:8]))
+
+    collect_assignments(getattr(tree, "body", []), "<module>")
+
+    # Call-site context: functions that call a relevant function
+    short_names = {name.rsplit(".", 1)[-1]: name for name in relevant}
+    callers: Dict[str, List[str]] = {}
+    for node, name in units:
+        if isinstance(node, ast.ClassDef) or name in relevant:
+            continue
+        for call in (n for n in ast.walk(node) if isinstance(n, ast.Call)):
+            target = short_names.get(_call_name(call))
+            if target:
+                callers.setdefault(target, []).append(f"{name} (line {call.lineno}): {lines[call.lineno - 1].strip()}")
+
+    slices = []
+    for name, info in relevant.items():
+        node = info["node"]
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        slices.append({
+            "name": name,
+            "start_line": start,
+            "end_line": node.end_lineno,
+            "sinks": info["sinks"],
+            "sources": info["sources"],
+            "callers": callers.get(name, [])[:5],
+            "code": "\n".join(lines[start - 1:node.end_lineno]),
+        })
+    for n in top_level:
+        slices.append({
+            "name": "<module>",
+            "start_line": n.lineno,
+            "end_line": n.end_lineno,
+            "sinks": _sinks(n),
+            "sources": [],
+            "callers": [],
+            "code": "\n".join(lines[n.lineno - 1:n.end_lineno]),
+        })
+    for n, scope, hits in assignments:
+        slices.append({
+            "name": scope,
+            "start_line": n.lineno,
+            "end_line": n.end_lineno,
+            "sinks": _sinks(n),
+            "sources": hits,
+            "callers": [],
+            "code": "\n".join(lines[n.lineno - 1:n.end_lineno]),
+        })
+    slices.sort(key=lambda s: (s["start_line"], -s["end_line"]))
+    # Nested units inside an already-kept unit are redundant
+    kept: List[Dict[str, Any]] = []
+    for s in slices:
+        if kept and s["end_line"] <= kept[-1]["end_line"]:
+            continue
+        kept.append(s)
+    return kept
+
+
+def _block_end(lines: List[str], start: int) -> int:
+    """End (exclusive) of a brace- or indent-delimited block starting at `start`."""
+    depth, opened = 0, False
+    for i in range(start, len(lines)):
+        stripped = re.sub(r"(\"[^\"]*\"|'[^']*'|`[^`]*`|//.*$)", "", lines[i])
+        depth += stripped.count("{") - stripped.count("}")
+        opened = opened or "{" in stripped
+        if opened and depth <= 0:
+            return i + 1
+        if not opened and i > start + 2:
+            break
+    # No braces: indentation block (Ruby/Python-like)
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    for i in range(start + 1, len(lines)):
+        if lines[i].strip() and len(lines[i]) - len(lines[i].lstrip()) <= indent:
+            return i
+    return len(lines)
+
+
+def _slice_tokens(source: str) -> List[Dict[str, Any]]:
+    lines = source.splitlines()
+    slices = []
+    i = 0
+    while i < len(lines):
+        if _FALLBACK_START_RE.match(lines[i]):
+            end = _block_end(lines, i)
+            block = "\n".join(lines[i:end])
+            hits = sorted({m.group(1).lower() for m in FALLBACK_SINK_RE.finditer(block)})
+            if hits:
+                slices.append({
+                    "name": lines[i].strip()[:80],
+                    "start_line": i + 1,
+                    "end_line": end,
+                    "sinks": hits[:8],
+                    "sources": [],
+                    "callers": [],
+                    "code": block,
+                })
+                i = end
+                continue
+        else:
+            # Lines outside kept blocks: hardcoded secrets at file/class level
+            secrets = scan_line(lines[i])
+            if secrets:
+                slices.append({
+                    "name": "<top-level>",
+                    "start_line": i + 1,
+                    "end_line": i + 1,
+                    "sinks": [],
+                    "sources": sorted({f"secret:{h['type']}" for h in secrets}),
+                    "callers": [],
+                    "code": lines[i],
+                })
+        i += 1
+    return slices
+
+
+def slice_code(path: str, source: str) -> Dict[str, Any]:
+    """
+    Security-relevant slices of one file: {"language", "slices", "total_lines", "sliced_lines"}.
+    Cached by content hash; callers must not mutate the result.
+    """
+    key = hashlib.sha256(f"{path.rsplit('.', 1)[-1]}\0{source}".encode("utf-8", errors="ignore")).hexdigest()
+    cached = _cache.get(key)
+    if cached is not None:
+        _cache.move_to_end(key)
+        return cached
+
+    slices = _slice_python(source) if path.endswith(".py") else None
+    language = "python" if slices is not None else "tokenized"
+    if slices is None:
+        slices = _slice_tokens(source)
+    result = {
+        "language": language,
+        "slices": slices,
+        "total_lines": source.count("\n") + 1,
+        "sliced_lines": sum(s["end_line"] - s["start_line"] + 1 for s in slices),
+    }
+    _cache[key] = result
+    if len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+    return result
+
+
+def render_slices(path: str, sliced: Dict[str, Any]) -> str:
+    """Agent-facing rendering of a file's slices with line numbers and call sites."""
+    parts = [f"[SLICED: {len(sliced['slices'])} security-relevant units, {sliced['sliced_lines']}/{sliced['total_lines']} lines of {path}]"]
+    for s in sliced["slices"]:
+        meta = []
+        if s["sinks"]:
+            meta.append("sinks: " + ", ".join(s["sinks"]))
+        if s["sources"]:
+            meta.append("sources: " + ", ".join(s["sources"]))
+        parts.append(f"\n# {s['name']} (lines {s['start_line']}-{s['end_line']}; {'; '.join(meta)})")
+        for caller in s["callers"]:
+            parts.append(f"# called from {caller}")
+        parts.append(s["code"])
+    return "\n".join(parts)
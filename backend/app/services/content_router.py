@@ -0,0 +1,119 @@
+"""
+Per-agent content routing.
+Splits an artifact into the views each agent actually needs:
+Threat Modeler -> architecture/design/config, Logic Auditor -> code/config,
+SOC Intelligence -> logs/traffic. Agents with an empty view are skipped.
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.services.code_slicer import slice_code, render_slices
+from app.services.github_fetcher import github_to_agent_content, _get_file_extension
+from app.services.pdf_extractor import _source_type_matches
+
+logger = logging.getLogger(__name__)
+
+AGENTS = ("threat", "security", "soc")
+
+# Explicit artifact types (AnalysisRequest.artifact_type / normalized artifact_type)
+TYPE_ROUTES = {
+    "code": ("security",),
+    "architecture": ("threat",),
+    "logs": ("soc",),
+    "api_spec": ("threat", "security"),
+}
+
+# PDF document types (from _source_type_matches); used only when exactly one type matches
+PDF_SOURCE_ROUTES = {
+    "architecture": ("threat",),
+    "logs": ("soc",),
+    "documentation": ("threat", "security"),
+}
+
+CODE_EXTENSIONS = {".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".rs", ".java", ".kt", ".rb", ".php", ".c", ".cpp", ".h", ".cs", ".sh", ".sql", ".html"}
+CONFIG_EXTENSIONS = {".json", ".yaml", ".yml", ".toml", ".ini", ".env", ".tf"}
+DOC_EXTENSIONS = {".md", ".txt", ".rst"}
+LOG_EXTENSIONS = {".log"}
+# Code files that define entry points / trust boundaries are also useful to the threat model
+THREAT_PATH_HINTS = ("auth", "login", "api", "route", "gateway", "middleware", "security", "admin")
+
+
+def _file_agents(path: str) -> List[str]:
+    ext = _get_file_extension(path)
+    lower = path.lower()
+    if ext in LOG_EXTENSIONS or "/logs/" in f"/{lower}":
+        return ["soc"]
+    if ext in CONFIG_EXTENSIONS or "dockerfile" in lower:
+        return ["threat", "security"]
+    if ext in DOC_EXTENSIONS:
+        return ["threat"]
+    if ext in CODE_EXTENSIONS:
+        return ["security", "threat"] if any(h in lower for h in THREAT_PATH_HINTS) else ["security"]
+    return list(AGENTS)
+
+
+def slice_for_security(path: str, source: str) -> str:
+    """Security-relevant slices of a code file; small files and files without slices pass through."""
+    if not settings.CODE_SLICING_ENABLED or source.count("\n") < settings.CODE_SLICING_MIN_LINES:
+        return source
+    sliced = slice_code(path, source)
+    if not sliced["slices"]:
+        return source
+    return render_slices(path, sliced)
+
+
+def route_github(normalized: Dict[str, Any], file_analytics: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """Split a GitHub artifact by file extension/path into per-agent views."""
+    files = normalized.get("content", {}).get("files", [])
+    buckets: Dict[str, List[Dict[str, Any]]] = {a: [] for a in AGENTS}
+    for f in files:
+        path = f.get("path", "")
+        for agent in _file_agents(path):
+            if agent == "security" and _get_file_extension(path) in CODE_EXTENSIONS:
+                buckets[agent].append({**f, "content": slice_for_security(path, f.get("content", ""))})
+            else:
+                buckets[agent].append(f)
+    views = {}
+    for agent, agent_files in buckets.items():
+        if not agent_files:
+            views[agent] = ""
+            continue
+        subset = {**normalized, "content": {**normalized.get("content", {}), "files": agent_files}}
+        views[agent] = github_to_agent_content(subset, file_analytics)
+    return views
+
+
+def _pdf_targets(text: str) -> tuple:
+    """Agents for a PDF: a single clear document type routes narrowly; mixed or unknown goes to all."""
+    matches = _source_type_matches(text)
+    if len(matches) != 1:
+        return AGENTS
+    return PDF_SOURCE_ROUTES.get(matches[0], AGENTS)
+
+
+def route_content(
+    artifact_type: str,
+    content: str,
+    normalized: Optional[Dict[str, Any]] = None,
+    file_analytics: Optional[Dict[str, Any]] = None,
+) -> Dict[str, str]:
+    """
+    Per-agent views {"threat", "security", "soc"} for an artifact.
+    Unknown or ambiguous artifacts fall back to sending every agent the full content.
+    """
+    kind = (artifact_type or "").lower()
+    if kind == "code_repository" and normalized:
+        views = route_github(normalized, file_analytics)
+    else:
+        if kind == "pdf_document":
+            targets = _pdf_targets((normalized or {}).get("content", {}).get("raw_text") or content)
+        else:
+            targets = TYPE_ROUTES.get(kind, AGENTS)
+        views = {a: content if a in targets else "" for a in AGENTS}
+        if kind == "code" and views["security"]:
+            # Snippets have no path: try Python's parser first, tokenizer otherwise
+            views["security"] = slice_for_security("snippet.py", content)
+
+    logger.info(f"Routed {kind or 'unknown'} artifact to: {[a for a, v in views.items() if v] or 'none'}")
+    return views
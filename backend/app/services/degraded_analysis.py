@@ -0,0 +1,91 @@
+"""
+Degraded local-only analysis.
+Used while the LLM circuit is open: findings come from the local secret
+scanner and risk-bearing ML signals, and the score is computed with the same
+severity weights the Risk agent is prompted with. No network calls. It never
+approves a deployment: without severe findings the status is REVIEW_REQUIRED.
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.models.schemas import AgentFinding, VulnerabilitySeverity
+from app.services.secret_scanner import scan_secrets
+
+logger = logging.getLogger(__name__)
+
+LOCAL_AGENT_NAME = "Local Scanner"
+SEVERITY_PENALTY = {"critical": 25, "high": 15, "medium": 5}
+# ML signal types that indicate security risk (complexity alone does not)
+RISK_SIGNAL_TYPES = {"security_pattern_frequency", "github_signal", "file_anomaly"}
+MAX_LOCATIONS = 10
+# Status of a degraded report with nothing blocking found: not reviewed, so not a GO
+REVIEW_REQUIRED = "REVIEW_REQUIRED"
+
+
+def _secret_severity(confidence: float) -> VulnerabilitySeverity:
+    if confidence >= 0.95:
+        return VulnerabilitySeverity.CRITICAL
+    if confidence >= 0.8:
+        return VulnerabilitySeverity.HIGH
+    return VulnerabilitySeverity.MEDIUM
+
+
+def secret_findings(content: str) -> List[AgentFinding]:
+    """One finding per secret type, listing the lines it was seen on."""
+    by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for hit in scan_secrets(content):
+        by_type[hit["type"]].append(hit)
+    findings = []
+    for kind, hits in by_type.items():
+        lines = ", ".join(str(h["line"]) for h in hits[:MAX_LOCATIONS]) + (" …" if len(hits) > MAX_LOCATIONS else "")
+        findings.append(AgentFinding(
+            agent_name=LOCAL_AGENT_NAME,
+            finding_type=f"Exposed Secret: {kind.replace('_', ' ')}",
+            description=f"{len(hits)} occurrence(s) detected locally, e.g. {hits[0]['preview']}",
+            severity=_secret_severity(max(h["confidence"] for h in hits)),
+            location=f"line {lines}",
+            suggestion="Revoke and rotate the credential, then load it from a secret manager or environment variable.",
+        ))
+    return findings
+
+
+def signal_findings(ml_output: Optional[Dict[str, Any]]) -> List[AgentFinding]:
+    """Risk-bearing ML signals as medium/low findings (heuristics never rank above medium)."""
+    findings = []
+    for s in (ml_output or {}).get("signals", []):
+        if s.get("type") not in RISK_SIGNAL_TYPES:
+            continue
+        findings.append(AgentFinding(
+            agent_name=LOCAL_AGENT_NAME,
+            finding_type=f"ML Signal: {s.get('subtype') or s['type']}",
+            description=s.get("evidence", ""),
+            severity=VulnerabilitySeverity.MEDIUM if s.get("confidence", 0) >= 0.75 else VulnerabilitySeverity.LOW,
+            location="Codebase",
+        ))
+    return findings
+
+
+def deterministic_score(findings: List[AgentFinding]) -> int:
+    """100 - 25 per critical - 15 per high - 5 per medium, floored at 0."""
+    penalty = sum(SEVERITY_PENALTY.get(getattr(f.severity, "value", str(f.severity)), 0) for f in findings)
+    return max(0, 100 - penalty)
+
+
+def local_risk_evaluation(findings: List[AgentFinding], summary: str) -> Dict[str, Any]:
+    """Risk evaluation without the Risk agent: deterministic score, never GO."""
+    score = deterministic_score(findings)
+    severe = any(getattr(f.severity, "value", "") in ("critical", "high") for f in findings)
+    status = "NO-GO" if score < 80 or severe else REVIEW_REQUIRED
+    return {"overall_score": score, "summary": summary, "status": status}
+
+
+def degraded_assessment(content: str, ml_output: Optional[Dict[str, Any]]) -> Tuple[List[AgentFinding], Dict[str, Any]]:
+    """(findings, risk evaluation) computed locally; the evaluation mirrors RiskAgent's output."""
+    findings = secret_findings(content) + signal_findings(ml_output)
+    evaluation = local_risk_evaluation(findings, (
+        f"LLM analysis unavailable; degraded local-only assessment from secret scanning and ML signals "
+        f"({len(findings)} finding(s)). Re-run once the AI backend recovers for a full review."
+    ))
+    logger.info(f"Degraded analysis: {len(findings)} local findings, score={evaluation['overall_score']}")
+    return findings, evaluation
@@ -2,7 +2,32 @@
 Escalation policy - decides when to notify Slack.
 Does not modify agent outputs.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+from pydantic import BaseModel, field_validator
+
+from app.core.config import settings
+
+
+class EscalationPolicy(BaseModel):
+    """Thresholds of should_notify_slack; the live policy comes from settings."""
+
+    notify_levels: List[str] = ["HIGH", "CRITICAL"]
+    disagreement_threshold: float = 0.4
+    medium_confidence_threshold: float = 0.6
+
+    @field_validator("notify_levels")
+    @classmethod
+    def _upper(cls, v: List[str]) -> List[str]:
+        return [level.strip().upper() for level in v if level.strip()]
+
+    @classmethod
+    def from_settings(cls) -> "EscalationPolicy":
+        return cls(
+            notify_levels=settings.ESCALATION_NOTIFY_LEVELS,
+            disagreement_threshold=settings.ESCALATION_DISAGREEMENT_THRESHOLD,
+            medium_confidence_threshold=settings.ESCALATION_MEDIUM_CONFIDENCE_THRESHOLD,
+        )
 
 
 def _severity_to_score(s: str) -> int:
@@ -31,21 +56,23 @@ def should_notify_slack(
     risk_level: str,
     confidence: float,
     consensus: Optional[Dict[str, str]] = None,
+    policy: Optional[EscalationPolicy] = None,
 ) -> bool:
     """
-    Rules:
+    Rules (thresholds from `policy`, default the configured one):
     - HIGH / CRITICAL → Slack
     - Disagreement > 0.4 → Slack
     - MEDIUM + confidence < 0.6 → Slack
     """
+    policy = policy or EscalationPolicy.from_settings()
     risk_upper = (risk_level or "").upper()
     consensus = consensus or {}
     disagreement = _compute_disagreement(consensus)
 
-    if risk_upper in ("HIGH", "CRITICAL"):
+    if risk_upper in policy.notify_levels:
         return True
-    if disagreement > 0.4:
+    if disagreement > policy.disagreement_threshold:
         return True
-    if risk_upper == "MEDIUM" and confidence < 0.6:
+    if risk_upper == "MEDIUM" and confidence < policy.medium_confidence_threshold:
         return True
     return False
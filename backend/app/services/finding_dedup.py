@@ -0,0 +1,149 @@
+"""
+Cross-agent finding deduplication.
+Threat, Security and SOC agents often describe the same issue differently.
+Findings from different agents are clustered by normalized type/location
+and TF-IDF cosine similarity (local only), and each cluster collapses into
+one canonical finding that lists its contributing agents.
+"""
+import re
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.models.schemas import AgentFinding
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_RANK = {"critical": 4, "high": 3, "medium": 2, "low": 1, "info": 0}
+SIMILARITY_THRESHOLD = 0.5
+
+# Agent default locations carry no information about where the issue is
+GENERIC_LOCATIONS = {"", "codebase", "architecture", "logs", "system", "n/a", "unknown", "application", "document", "general"}
+_STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "to", "for", "and", "or", "is", "are", "be", "can", "may", "with", "by",
+    "via", "from", "this", "that", "it", "detected", "potential", "possible", "vulnerability", "issue", "risk",
+    "found", "lack", "missing", "insecure",
+}
+_SYNONYMS = {
+    "sqli": "sql injection", "xss": "cross site scripting", "csrf": "cross site request forgery",
+    "rce": "remote code execution", "ssrf": "server side request forgery", "idor": "insecure direct object reference",
+    "creds": "credentials", "credential": "credentials", "secrets": "secret", "passwords": "password",
+    "hardcoded": "hard coded", "authn": "authentication", "authz": "authorization",
+}
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+
+def _severity(f: AgentFinding) -> str:
+    return getattr(f.severity, "value", str(f.severity or "info")).lower()
+
+
+def _tokens(text: str) -> List[str]:
+    words = []
+    for w in _WORD_RE.findall((text or "").lower().replace("-", " ")):
+        w = _SYNONYMS.get(w, w)
+        words.extend(t for t in w.split() if t not in _STOPWORDS)
+    return words
+
+
+def normalize_type(finding_type: str) -> str:
+    return " ".join(sorted(set(_tokens(finding_type))))
+
+
+def normalize_location(location: str, keep_lines: bool = True) -> str:
+    loc = (location or "").lower()
+    if not keep_lines:
+        loc = re.sub(r"\d+", "0", loc)
+    loc = re.sub(r"[()\[\]{}'\"`]", "", loc).strip()
+    return "" if loc in GENERIC_LOCATIONS else loc
+
+
+def _locations_compatible(a: str, b: str) -> bool:
+    """Same place: equal, unknown, or one contained in the other at word/path boundaries ("app/x.py" ~ "app/x.py:10")."""
+    if not a or not b or a == b:
+        return True
+    short, long = sorted((a, b), key=len)
+    idx = long.find(short)
+    while idx != -1:
+        end = idx + len(short)
+        if (idx == 0 or not long[idx - 1].isalnum()) and (end == len(long) or not long[end].isalnum()):
+            return True
+        idx = long.find(short, idx + 1)
+    return False
+
+
+def _tfidf_cosine(docs: List[List[str]]) -> np.ndarray:
+    """Pairwise cosine similarity of unigram+bigram TF-IDF vectors."""
+    grams = [w + [" ".join(p) for p in zip(w, w[1:])] for w in docs]
+    vocab: Dict[str, int] = {}
+    for g in grams:
+        for t in g:
+            vocab.setdefault(t, len(vocab))
+    if not vocab:
+        return np.zeros((len(docs), len(docs)))
+    tf = np.zeros((len(docs), len(vocab)))
+    for i, g in enumerate(grams):
+        for t, c in Counter(g).items():
+            tf[i, vocab[t]] = c
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1
+    vecs = tf * idf
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vecs /= norms
+    return vecs @ vecs.T
+
+
+def cluster_findings(findings: List[AgentFinding], threshold: float = SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """
+    Greedy complete-linkage clusters of finding indices. A finding joins the first
+    cluster whose every member it matches (same normalized type or similar text) and
+    is location-compatible with (a generic location can't bridge two specific ones),
+    provided its agent isn't already in the cluster (only cross-agent duplicates merge).
+    """
+    types = [normalize_type(f.finding_type) for f in findings]
+    locs = [normalize_location(f.location) for f in findings]
+    sims = _tfidf_cosine([_tokens(f"{f.finding_type} {f.finding_type} {f.description}") for f in findings])
+
+    def similar(i: int, j: int) -> bool:
+        return bool(types[i] and types[i] == types[j]) or sims[i, j] >= threshold
+
+    clusters: List[List[int]] = []
+    for i, f in enumerate(findings):
+        for cluster in clusters:
+            if any(findings[j].agent_name == f.agent_name for j in cluster):
+                continue
+            if all(similar(i, j) and _locations_compatible(locs[i], locs[j]) for j in cluster):
+                cluster.append(i)
+                break
+        else:
+            clusters.append([i])
+    return clusters
+
+
+def _merge(group: List[AgentFinding]) -> AgentFinding:
+    if len(group) == 1:
+        return group[0]
+    base = max(group, key=lambda f: (SEVERITY_RANK.get(_severity(f), 0), len(f.description or "")))
+    location = max((f.location or "" for f in group), key=lambda l: len(normalize_location(l))) or base.location
+    agents = sorted({f.agent_name for f in group})
+    return base.model_copy(update={
+        "location": location,
+        "suggestion": base.suggestion or next((f.suggestion for f in group if f.suggestion), None),
+        "contributing_agents": agents,
+    })
+
+
+def dedupe_findings(
+    findings: List[AgentFinding], threshold: float = SIMILARITY_THRESHOLD
+) -> Tuple[List[AgentFinding], Dict[str, int]]:
+    """Collapse duplicate findings across agents. Order follows each cluster's first member."""
+    if len(findings) < 2:
+        return list(findings), {"input": len(findings), "output": len(findings), "merged": 0}
+    clusters = sorted(cluster_findings(findings, threshold), key=lambda c: c[0])
+    merged = [_merge([findings[i] for i in c]) for c in clusters]
+    stats = {"input": len(findings), "output": len(merged), "merged": len(findings) - len(merged)}
+    if stats["merged"]:
+        logger.info(f"Dedup: {stats['input']} findings -> {stats['output']}")
+    return merged, stats
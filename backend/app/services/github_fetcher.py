@@ -13,6 +13,8 @@ logger = logging.getLogger(__name__)
 # Limits
 MAX_FILES = 50
 MAX_FILE_SIZE = 500_000  # bytes per file
+AGENT_FILE_CHARS = 8000  # max chars per file sent to agents
+AGENT_FILE_MIN_CHARS = 2000  # floor for low-risk files when a ranking is available
 LANGUAGE_WHITELIST = {"python", "javascript", "typescript", "go", "rust", "java", "kotlin", "ruby", "php", "c", "cpp", "csharp", "json", "yaml", "yml", "md", "txt", "sh", "sql"}
 SUPPORTED_EXTENSIONS = {".py", ".js", ".ts", ".jsx", ".tsx", ".go", ".rs", ".java", ".kt", ".rb", ".php", ".c", ".cpp", ".h", ".cs", ".json", ".yaml", ".yml", ".md", ".txt", ".sh", ".sql", ".html", ".css"}
 
@@ -143,12 +145,22 @@ def fetch_github_artifact(url: str) -> Dict[str, Any]:
     }
 
 
-def github_to_agent_content(normalized: Dict[str, Any]) -> str:
-    """Convert normalized GitHub artifact to string for agents."""
+def github_to_agent_content(normalized: Dict[str, Any], file_analytics: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Convert normalized GitHub artifact to string for agents.
+    With per-file ML scores, riskiest files come first and low-risk files get a smaller budget.
+    """
     files = normalized.get("content", {}).get("files", [])
     meta = normalized.get("metadata", {})
+    scores = (file_analytics or {}).get("file_scores") or {}
+    if scores:
+        files = sorted(files, key=lambda f: -scores.get(f.get("path", ""), 0.0))
     parts = [f"[GitHub Repository: {meta.get('repo', '')}]"]
     for f in files:
+        budget = AGENT_FILE_CHARS
+        if scores:
+            score = scores.get(f.get("path", ""), 0.0)
+            budget = AGENT_FILE_MIN_CHARS + int(score * (AGENT_FILE_CHARS - AGENT_FILE_MIN_CHARS))
         parts.append(f"\n--- FILE: {f.get('path', '')} ({f.get('language', '')}) ---\n")
-        parts.append(f.get("content", "")[:8000])
+        parts.append(f.get("content", "")[:budget])
     return "\n".join(parts) + "\n\n[Derived from GitHub Artifact]"
@@ -0,0 +1,173 @@
+"""
+Read-through cache for vulnerability history pages (GET /vulnerabilities).
+Keyed on the full HistoryQuery (filters, cursor, projection) with a short TTL;
+concurrent identical queries share one store round trip. New rows logged on
+this instance are patched into cached first pages they belong to, and merged
+into freshly loaded first pages for a short window (covering rows still in
+the write-behind buffer, not yet visible to the store). Later
+(cursor) pages are keyset-stable and unaffected by new rows, so writes never
+have to throw them away; rows written by other instances show up once the
+TTL expires.
+"""
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.db.audit_store import HistoryQuery
+
+logger = logging.getLogger(__name__)
+
+Rows = List[Dict[str, Any]]
+
+
+def _ts(value: Any) -> datetime:
+    parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def row_matches(query: HistoryQuery, row: Dict[str, Any]) -> bool:
+    """Whether `row` satisfies the query's filters (same semantics as the stores' WHERE clause)."""
+    for column, value in (("risk", query.risk), ("status", query.status), ("artifact", query.artifact)):
+        if value and (row.get(column) or "").upper() != value:
+            return False
+    score = row.get("overall_score")
+    if query.min_score is not None and (score is None or score < query.min_score):
+        return False
+    if query.max_score is not None and (score is None or score > query.max_score):
+        return False
+    created_at = _ts(row["created_at"])
+    if query.since and created_at < _ts(query.since):
+        return False
+    if query.until and created_at >= _ts(query.until):
+        return False
+    return True
+
+
+class HistoryCache:
+    def __init__(self, ttl_s: float, max_entries: int, recent_window_s: float, max_recent: int = 1000):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.recent_window_s = recent_window_s
+        # key -> (expires_at, query, rows)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # (written_at, row) of rows logged here that the store may not return yet
+        self._recent: deque = deque(maxlen=max_recent)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.patched = 0
+        self.invalidated = 0
+
+    @staticmethod
+    def _key(query: HistoryQuery) -> str:
+        return query.model_dump_json()
+
+    async def get(self, query: HistoryQuery, loader: Callable[[HistoryQuery], Awaitable[Rows]]) -> Rows:
+        key = self._key(query)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, query, loader))
+            self._inflight[key] = task
+        # Shield: a caller disconnecting must not cancel the load others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, query: HistoryQuery, loader: Callable[[HistoryQuery], Awaitable[Rows]]) -> Rows:
+        try:
+            rows = self._merge_recent(query, await loader(query))
+        finally:
+            self._inflight.pop(key, None)
+        self._store(key, query, rows)
+        return rows
+
+    def _merge_recent(self, query: HistoryQuery, rows: Rows) -> Rows:
+        if query.after is not None or not self._recent:
+            return rows
+        cutoff = time.monotonic() - self.recent_window_s
+        while self._recent and self._recent[0][0] < cutoff:
+            self._recent.popleft()
+        present = {str(r.get("id")) for r in rows}
+        for _, row in list(self._recent):
+            if str(row["id"]) in present:
+                continue
+            try:
+                if row_matches(query, row):
+                    rows = self._patch(query, rows, row) or rows
+            except (KeyError, TypeError, ValueError):
+                continue
+        return rows
+
+    def _store(self, key: str, query: HistoryQuery, rows: Rows) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_s, query, rows)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def on_write(self, row: Dict[str, Any]) -> None:
+        """A vulnerability row was logged: patch it into the cached first pages it belongs to."""
+        self._recent.append((time.monotonic(), row))
+        for key, (expires_at, query, rows) in list(self._entries.items()):
+            if query.after is not None:
+                continue
+            try:
+                if not row_matches(query, row):
+                    continue
+                patched = self._patch(query, rows, row)
+            except (KeyError, TypeError, ValueError):
+                # Can't tell where the row goes (odd timestamps); drop the entry instead
+                del self._entries[key]
+                self.invalidated += 1
+                continue
+            if patched is not None:
+                self._entries[key] = (expires_at, query, patched)
+                self.patched += 1
+
+    @staticmethod
+    def _patch(query: HistoryQuery, rows: Rows, row: Dict[str, Any]) -> Optional[Rows]:
+        """New page with `row` in (created_at, id) DESC position, or None if it falls past a full page."""
+        projected = {c: row.get(c) for c in query.columns()}
+        position = (_ts(row["created_at"]), str(row["id"]))
+        index = 0
+        while index < len(rows) and (_ts(rows[index]["created_at"]), str(rows[index]["id"])) > position:
+            index += 1
+        if index >= query.limit:
+            return None
+        # Copy-on-write: responses already built from the old list stay untouched
+        return (rows[:index] + [projected] + rows[index:])[:query.limit]
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "patched": self.patched,
+            "invalidated": self.invalidated,
+            "hit_rate": round((self.hits + self.coalesced) / total, 3) if total else 0.0,
+        }
+
+
+history_cache = HistoryCache(
+    ttl_s=settings.HISTORY_CACHE_TTL_S,
+    max_entries=settings.HISTORY_CACHE_MAX_ENTRIES,
+    # Long enough for a write-behind flush (and a retry) to land
+    recent_window_s=settings.HISTORY_CACHE_TTL_S + 2 * settings.AUDIT_FLUSH_INTERVAL_S,
+)
@@ -0,0 +1,122 @@
+"""
+Tolerant JSON parsing for LLM output.
+Handles markdown fences, prose before/after the JSON, trailing commas, raw
+newlines inside strings and truncated output (the longest prefix ending on a
+complete element is kept and its open brackets are closed).
+"""
+import re
+import json
+import logging
+from typing import Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)(?:```|$)", re.S)
+_CLOSERS = {"{": "}", "[": "]"}
+_RAW_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+MAX_REPAIR_ATTEMPTS = 64
+
+
+def _strip_fences(text: str) -> str:
+    m = _FENCE_RE.search(text)
+    return m.group(1) if m else text
+
+
+def _scan(text: str) -> Tuple[str, List[str], List[Tuple[int, Tuple[str, ...]]], bool]:
+    """
+    Single pass over the JSON starting at text[0]: returns (cleaned text, open closers,
+    cut points, complete). Cut points are (offset, closers) where the prefix ends on a
+    complete element; cleaning drops trailing commas and escapes raw newlines in strings.
+    """
+    out: List[str] = []  # single characters, so len(out) is an offset into the result
+    stack: List[str] = []
+    cuts: List[Tuple[int, Tuple[str, ...]]] = []
+    in_str = escaped = False
+    for ch in text:
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+            elif ch in "\n\r\t":
+                out.extend(_RAW_ESCAPES[ch])
+                continue
+            out.append(ch)
+            continue
+        if ch == '"':
+            in_str = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch in "}]":
+            if not stack:
+                break
+            while out and out[-1] in " \t\r\n,":
+                out.pop()
+            out.append(stack.pop())  # trusts nesting over a mismatched bracket
+            if not stack:
+                return "".join(out), [], cuts, True
+            cuts.append((len(out), tuple(stack)))
+            continue
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(ch)
+    return "".join(out), stack, cuts, False
+
+
+def _inside_array_element(closers) -> bool:
+    """Whether a cut with these open closers (outermost first) falls inside an object nested in an array."""
+    closers = list(closers)
+    return "]" in closers and "}" in closers[closers.index("]") + 1:]
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
+def parse_llm_json(text: Optional[str]) -> Tuple[Optional[Any], bool]:
+    """
+    Best-effort parse of a model response. Returns (value, repaired); value is None
+    when nothing usable was found.
+    """
+    if not text:
+        return None, False
+    body = _strip_fences(text).strip()
+    value = _loads(body)
+    if value is not None:
+        return value, False
+
+    starts = [i for i in (body.find("{"), body.find("[")) if i >= 0]
+    if not starts:
+        return None, False
+    body = body[min(starts):]
+
+    # Complete JSON followed by prose
+    try:
+        value, _ = json.JSONDecoder().raw_decode(body)
+        return value, True
+    except json.JSONDecodeError:
+        pass
+
+    cleaned, stack, cuts, complete = _scan(body)
+    if complete:
+        value = _loads(cleaned)
+        if value is not None:
+            return value, True
+    elif not _inside_array_element(stack):
+        value = _loads(cleaned.rstrip().rstrip(",") + "".join(reversed(stack)))
+        if value is not None:
+            return value, True
+
+    # Truncated or malformed: back off to the last complete element. Objects that are
+    # array elements are kept whole or dropped, never cut down to their first keys.
+    cuts = [(offset, closers) for offset, closers in cuts if not _inside_array_element(closers)]
+    for offset, closers in reversed(cuts[-MAX_REPAIR_ATTEMPTS:]):
+        value = _loads(cleaned[:offset].rstrip().rstrip(",") + "".join(reversed(closers)))
+        if value is not None:
+            return value, True
+    return None, False
@@ -0,0 +1,221 @@
+"""
+Pool of OpenAI-compatible LLM endpoints.
+Each endpoint has its own base URL, key, model override, weight and
+concurrency limit. Requests go to the endpoint with the lowest expected wait
+(outstanding requests x EWMA latency / weight) and fail over to the next one
+when an endpoint errors; failing endpoints cool down with backoff. A streamed
+response keeps its endpoint slot until the stream is consumed or closed.
+"""
+import re
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Set
+
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EWMA_ALPHA = 0.2
+# Errors that are the request's fault; another endpoint would reject it the same way
+NON_RETRYABLE_STATUS = {400, 404, 413, 422}
+# 400s that mean "no JSON mode here" rather than a bad request (context length etc.)
+_JSON_MODE_ERROR_RE = re.compile(r"(?i)response_format|json_object|json[ _]mode")
+
+
+class LLMEndpoint:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        api_key: str,
+        model: Optional[str] = None,
+        fast_model: Optional[str] = None,
+        weight: float = 1.0,
+        max_concurrency: int = 16,
+        json_mode: bool = True,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.fast_model = fast_model
+        self.weight = max(weight, 0.01)
+        self.max_concurrency = max_concurrency
+        self.json_mode = json_mode
+        # Retries are handled by failover here and by AIService, not inside the SDK
+        self.client = AsyncOpenAI(api_key=api_key or "none", base_url=base_url, max_retries=0)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def resolve_model(self, model: str) -> str:
+        """Map the service's strong/fast model names onto this endpoint's own models."""
+        if model == settings.FAST_MODEL_NAME and self.fast_model:
+            return self.fast_model
+        if model in (settings.MODEL_NAME, settings.FAST_MODEL_NAME) and self.model:
+            return self.model
+        return model
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def expected_wait(self) -> float:
+        # Unmeasured endpoints look fast so they get sampled
+        latency = self.ewma_latency if self.ewma_latency is not None else 0.5
+        load = (self.outstanding + 1) / self.max_concurrency
+        return latency * (1 + load) * (self.outstanding + 1) / self.weight
+
+    def record_success(self, latency: float) -> None:
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.ewma_latency = latency if self.ewma_latency is None else (
+            EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+        )
+
+    def record_failure(self) -> None:
+        self.errors += 1
+        self.failures += 1
+        backoff = min(settings.LLM_ENDPOINT_COOLDOWN_S * 2 ** (self.failures - 1), settings.LLM_ENDPOINT_MAX_COOLDOWN_S)
+        self.cooldown_until = time.monotonic() + backoff
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "max_concurrency": self.max_concurrency,
+            "outstanding": self.outstanding,
+            "ewma_latency_s": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "requests": self.requests,
+            "errors": self.errors,
+            "healthy": self.healthy(time.monotonic()),
+        }
+
+
+class HeldStream:
+    """Streamed response that holds its endpoint's slot and outstanding count until exhausted or closed."""
+
+    def __init__(self, endpoint: LLMEndpoint, stream: Any):
+        self._endpoint = endpoint
+        self._stream = stream
+        self._chunks = stream.__aiter__()
+        self._released = False
+
+    def __aiter__(self) -> "HeldStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self._chunks.__anext__()
+        except BaseException:
+            # End of stream, error or cancellation: the endpoint is free either way
+            await self.aclose()
+            raise
+
+    async def aclose(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._endpoint._slots.release()
+        self._endpoint.outstanding -= 1
+        close = getattr(self._stream, "close", None) or getattr(self._stream, "aclose", None)
+        if close is not None:
+            await close()
+
+
+class LLMPool:
+    def __init__(self, endpoints: List[LLMEndpoint]):
+        if not endpoints:
+            raise ValueError("LLMPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.failovers = 0
+
+    @classmethod
+    def from_settings(cls) -> "LLMPool":
+        """LLM_ENDPOINTS when configured, otherwise the single OpenRouter endpoint."""
+        if not settings.LLM_ENDPOINTS:
+            return cls([LLMEndpoint("openrouter", settings.OPENROUTER_BASE_URL, settings.OPENROUTER_API_KEY)])
+        endpoints = []
+        for i, cfg in enumerate(settings.LLM_ENDPOINTS):
+            endpoints.append(LLMEndpoint(
+                name=cfg.get("name") or f"endpoint-{i}",
+                base_url=cfg["base_url"],
+                api_key=cfg.get("api_key") or settings.OPENROUTER_API_KEY,
+                model=cfg.get("model"),
+                fast_model=cfg.get("fast_model"),
+                weight=float(cfg.get("weight", 1.0)),
+                max_concurrency=int(cfg.get("max_concurrency", 16)),
+                json_mode=bool(cfg.get("json_mode", True)),
+            ))
+        return cls(endpoints)
+
+    def select(self, exclude: Set[str]) -> Optional[LLMEndpoint]:
+        """Least expected wait among healthy endpoints; cooling-down ones only if nothing else is left."""
+        candidates = [e for e in self.endpoints if e.name not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [e for e in candidates if e.healthy(now)] or candidates
+        return min(healthy, key=LLMEndpoint.expected_wait)
+
+    async def create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        """
+        Chat completion on the best endpoint, failing over to the others on error.
+        With stream=True the result is an async iterator of chunks that holds the
+        endpoint's slot until it is exhausted or closed (failover only before the first chunk).
+        """
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            endpoint = self.select(tried)
+            if endpoint is None:
+                raise last_error
+            tried.add(endpoint.name)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            start = time.monotonic()
+            params = kwargs if endpoint.json_mode else {k: v for k, v in kwargs.items() if k != "response_format"}
+            acquired = handed_off = False
+            try:
+                await endpoint._slots.acquire()
+                acquired = True
+                response = await endpoint.client.chat.completions.create(
+                    model=endpoint.resolve_model(model), messages=messages, **params
+                )
+                endpoint.record_success(time.monotonic() - start)
+                if kwargs.get("stream"):
+                    handed_off = True
+                    return HeldStream(endpoint, response)
+                return response
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if (
+                    getattr(e, "status_code", None) == 400 and "response_format" in params
+                    and _JSON_MODE_ERROR_RE.search(f"{e} {getattr(e, 'body', '') or ''}")
+                ):
+                    # Backend has no JSON mode: remember that and resend plain to the same endpoint
+                    logger.info(f"LLM endpoint '{endpoint.name}' rejected response_format; disabling JSON mode")
+                    endpoint.json_mode = False
+                    tried.discard(endpoint.name)
+                    continue
+                if getattr(e, "status_code", None) in NON_RETRYABLE_STATUS:
+                    raise
+                endpoint.record_failure()
+                last_error = e
+                if len(tried) < len(self.endpoints):
+                    self.failovers += 1
+                    logger.warning(f"LLM endpoint '{endpoint.name}' failed ({e}); failing over")
+            finally:
+                if not handed_off:
+                    if acquired:
+                        endpoint._slots.release()
+                    endpoint.outstanding -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"failovers": self.failovers, "endpoints": {e.name: e.stats() for e in self.endpoints}}
@@ -0,0 +1,272 @@
+"""
+Streaming log template mining (Drain-style).
+Clusters log lines into templates with <*> parameter slots, keeps per-minute
+frequencies, rare lines and bursts, and renders a compact summary for the SOC
+agent instead of the raw log text. The most frequent values of each <*> slot
+are kept, so masked IPs/usernames can still be correlated.
+"""
+import re
+import heapq
+import math
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+PARAM = "<*>"
+# Values tracked per slot (Space-Saving); beyond this, value counts are upper bounds
+MAX_SLOT_VALUES = 1000
+
+# Leading timestamp; group 1 is truncated to the minute for bucketing
+_TS_RE = re.compile(
+    r"^\[?((?:\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2})|(?:[A-Z][a-z]{2}\s+\d{1,2} \d{2}:\d{2}))"
+    r"[\d:.,]*(?:Z|[+-]\d{2}:?\d{2})?\]?\s*"
+)
+# Tokens that are parameters, not template text: anything with a digit, hex ids, quoted values
+_VAR_RE = re.compile(r"(?<![\w<])(?:\S*\d\S*|[0-9a-f]{8,}|\"[^\"]*\"|'[^']*')(?![\w>])", re.I)
+_KV_RE = re.compile(r"(\w+)=(?!<\*>)\S+")
+_LEVEL_RE = re.compile(r"\b(ERROR|ERR|FATAL|CRIT(?:ICAL)?|WARN(?:ING)?|FAIL(?:ED|URE)?|DENIED|UNAUTHORI[SZ]ED|FORBIDDEN)\b", re.I)
+
+
+class LogCluster:
+    __slots__ = ("id", "tokens", "count", "example", "buckets", "slot_values")
+
+    def __init__(self, cluster_id: int, tokens: List[str], example: str):
+        self.id = cluster_id
+        self.tokens = tokens
+        self.count = 0
+        self.example = example
+        self.buckets: Counter = Counter()
+        self.slot_values: Dict[int, SpaceSaving] = {}
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+    def record_values(self, raw_tokens: List[str]) -> None:
+        """Count the raw value under each slot (lines whose tokens don't align are skipped)."""
+        if len(raw_tokens) != len(self.tokens):
+            return
+        for i, tok in enumerate(self.tokens):
+            if PARAM in tok:
+                self._slot(i).add(_slot_value(tok, raw_tokens[i]))
+
+    def _slot(self, i: int) -> "SpaceSaving":
+        if i not in self.slot_values:
+            self.slot_values[i] = SpaceSaving(MAX_SLOT_VALUES)
+        return self.slot_values[i]
+
+    def top_values(self, k: int) -> Dict[int, List[tuple]]:
+        return {i: values.most_common(k) for i, values in sorted(self.slot_values.items()) if values.counts}
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters: at most `capacity` counters; a new value evicts the
+    smallest counter and inherits its count, so any value more frequent than
+    total/capacity is always tracked. Counts are exact until the first eviction,
+    upper bounds after it. The min-heap is lazy (stale entries skipped on pop).
+    """
+
+    __slots__ = ("capacity", "counts", "evictions", "_heap")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.evictions = 0
+        self._heap: List[tuple] = []
+
+    def add(self, value: str, n: int = 1) -> None:
+        counts = self.counts
+        if value in counts:
+            counts[value] += n
+        elif len(counts) < self.capacity:
+            counts[value] = n
+        else:
+            floor = self._pop_min()
+            counts[value] = floor + n
+            self.evictions += 1
+        heapq.heappush(self._heap, (counts[value], value))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, v) for v, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> int:
+        while True:
+            c, v = heapq.heappop(self._heap)
+            if self.counts.get(v) == c:
+                del self.counts[v]
+                return c
+
+    def most_common(self, k: int) -> List[tuple]:
+        return heapq.nlargest(k, self.counts.items(), key=lambda item: item[1])
+
+
+def _slot_value(template_token: str, raw_token: str) -> str:
+    """The part of `raw_token` under the slot, e.g. "alice" for "user=<*>" / "user=alice"."""
+    prefix, _, suffix = template_token.partition(PARAM)
+    if raw_token.startswith(prefix) and raw_token.endswith(suffix) and len(raw_token) >= len(prefix) + len(suffix):
+        return raw_token[len(prefix):len(raw_token) - len(suffix)]
+    return raw_token
+
+
+class LogTemplateMiner:
+    """
+    Fixed-depth parse tree keyed by (token count, first token); leaves hold
+    clusters compared by positional token similarity. An exact-match cache on
+    the masked line makes repeated templates O(1).
+    """
+
+    def __init__(self, similarity: float = 0.5, max_children: int = 100, max_clusters: int = 5000):
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.clusters: List[LogCluster] = []
+        self._tree: Dict[tuple, List[LogCluster]] = {}
+        self._cache: Dict[str, LogCluster] = {}
+        self.total_lines = 0
+        self.bucket_totals: Counter = Counter()
+
+    @staticmethod
+    def _mask(line: str) -> str:
+        return _VAR_RE.sub(PARAM, _KV_RE.sub(r"\1=<*>", line))
+
+    def add_line(self, line: str) -> Optional[LogCluster]:
+        line = line.rstrip()
+        if not line:
+            return None
+        self.total_lines += 1
+        bucket = None
+        m = _TS_RE.match(line)
+        if m:
+            bucket = m.group(1).replace(" ", "T", 1) if m.group(1)[0].isdigit() else m.group(1)
+            line = line[m.end():]
+        masked = self._mask(line)
+
+        cluster = self._cache.get(masked)
+        if cluster is None:
+            cluster = self._match(masked.split(), line)
+            if len(self._cache) < 200_000:
+                self._cache[masked] = cluster
+        cluster.count += 1
+        cluster.record_values(line.split())
+        if bucket:
+            cluster.buckets[bucket] += 1
+            self.bucket_totals[bucket] += 1
+        return cluster
+
+    def _match(self, tokens: List[str], raw: str) -> LogCluster:
+        first = tokens[0] if tokens else ""
+        key = (len(tokens), first)
+        leaf = self._tree.get(key)
+        if leaf is None:
+            # Too many distinct first tokens for this length: share a wildcard leaf
+            siblings = sum(1 for k in self._tree if k[0] == len(tokens))
+            if siblings >= self.max_children:
+                key = (len(tokens), PARAM)
+            leaf = self._tree.setdefault(key, [])
+
+        best, best_sim = None, -1.0
+        for cluster in leaf:
+            same = sum(1 for a, b in zip(cluster.tokens, tokens) if a == b or a == PARAM)
+            sim = same / max(1, len(tokens))
+            if sim > best_sim:
+                best, best_sim = cluster, sim
+        if best is not None and best_sim >= self.similarity:
+            for i, (a, b) in enumerate(zip(best.tokens, tokens)):
+                if a != b and a != PARAM and PARAM not in a:
+                    # A literal becoming a slot: every line so far carried it
+                    best._slot(i).add(a, best.count)
+            best.tokens = [a if a == b else PARAM for a, b in zip(best.tokens, tokens)]
+            return best
+        if len(self.clusters) >= self.max_clusters and best is not None:
+            return best
+
+        cluster = LogCluster(len(self.clusters), tokens, raw[:300])
+        self.clusters.append(cluster)
+        leaf.append(cluster)
+        return cluster
+
+    def add_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.add_line(line)
+
+    def bursts(self, min_count: int = 5, sigmas: float = 3.0) -> List[Dict[str, Any]]:
+        """Per-template minute buckets far above that template's own baseline."""
+        all_buckets = sorted(self.bucket_totals)
+        if len(all_buckets) < 3:
+            return []
+        n = len(all_buckets)
+        found = []
+        for cluster in self.clusters:
+            if not cluster.buckets:
+                continue
+            counts = cluster.buckets.values()
+            mean = sum(counts) / n
+            var = sum((c - mean) ** 2 for c in counts) / n + mean ** 2 * (n - len(cluster.buckets)) / n
+            limit = mean + sigmas * math.sqrt(var)
+            for bucket, c in cluster.buckets.items():
+                if c >= min_count and c > limit:
+                    found.append({
+                        "bucket": bucket, "template_id": cluster.id, "template": cluster.template,
+                        "count": c, "baseline": round(mean, 2),
+                    })
+        return sorted(found, key=lambda b: -b["count"] / max(b["baseline"], 0.01))
+
+    def stats(self, top: int = 25, rare_max: int = 2, top_values: int = 5) -> Dict[str, Any]:
+        ordered = sorted(self.clusters, key=lambda c: -c.count)
+
+        def entry(c: LogCluster) -> Dict[str, Any]:
+            return {"id": c.id, "count": c.count, "template": c.template, "values": c.top_values(top_values)}
+
+        return {
+            "total_lines": self.total_lines,
+            "template_count": len(self.clusters),
+            "time_buckets": len(self.bucket_totals),
+            "top_templates": [entry(c) for c in ordered[:top]],
+            "alert_templates": [entry(c) for c in ordered if _LEVEL_RE.search(c.template)][:top],
+            "rare_lines": [{"id": c.id, "count": c.count, "example": c.example} for c in ordered if c.count <= rare_max][:top],
+            "bursts": self.bursts()[:top],
+        }
+
+
+def _render_templates(templates: List[Dict[str, Any]]) -> List[str]:
+    lines = []
+    for t in templates:
+        lines.append(f"{t['count']:>8} | #{t['id']} {t['template']}")
+        for i, values in t.get("values", {}).items():
+            shown = ", ".join(f"{v[:60]} x{n}" for v, n in values)
+            lines.append(f"{'':>8}   slot {i}: {shown}")
+    return lines
+
+
+def render_summary(stats: Dict[str, Any]) -> str:
+    """Compact text summary of mined logs for agent consumption."""
+    parts = [
+        "[ARTIFACT TYPE: LOGS - TEMPLATE SUMMARY]",
+        f"{stats['total_lines']} lines -> {stats['template_count']} templates across {stats['time_buckets']} one-minute buckets.",
+        "Variable fields are shown as <*>, with each slot's most frequent values (slot = token position). "
+        f"Template counts are exact; value counts are upper bounds for slots with over {MAX_SLOT_VALUES} distinct values.",
+        "\n--- TOP TEMPLATES (count | template) ---",
+    ]
+    parts += _render_templates(stats["top_templates"])
+    if stats["alert_templates"]:
+        parts.append("\n--- ERROR / WARNING / AUTH-FAILURE TEMPLATES ---")
+        parts += _render_templates(stats["alert_templates"])
+    if stats["bursts"]:
+        parts.append("\n--- BURSTS (minute | count vs per-minute baseline | template) ---")
+        parts += [f"{b['bucket']} | {b['count']} vs {b['baseline']} | #{b['template_id']} {b['template']}" for b in stats["bursts"]]
+    if stats["rare_lines"]:
+        parts.append("\n--- RARE LINES (verbatim example) ---")
+        parts += [f"{r['count']:>8} | {r['example']}" for r in stats["rare_lines"]]
+    return "\n".join(parts)
+
+
+def mine_logs(text: str) -> Dict[str, Any]:
+    """Mine a log blob; returns {"summary": str, "stats": dict}."""
+    miner = LogTemplateMiner()
+    miner.add_lines(text.splitlines())
+    stats = miner.stats()
+    logger.info(f"Log mining: {stats['total_lines']} lines -> {stats['template_count']} templates")
+    return {"summary": render_summary(stats), "stats": stats}
@@ -1,15 +1,21 @@
 """
 Local ML Analytics Engine
-Signals: complexity anomaly, security pattern frequency.
+Signals: complexity anomaly, security pattern frequency, per-file risk.
 Applied to PDF, code, logs, GitHub artifacts.
 Outputs are immutable; agents may reference but not modify.
 """
 import re
 import math
+import time
 import uuid
 import logging
+from collections import Counter
 from typing import Dict, Any, List, Optional
 
+import numpy as np
+
+from app.services.near_duplicate import artifact_fingerprint
+
 logger = logging.getLogger(__name__)
 
 # Security keywords for pattern frequency
@@ -29,6 +35,42 @@ TOKEN_DENSITY_BASELINE = 0.3
 PAGE_COUNT_P90 = 50
 
 
+def _trie_pattern(words: List[str]) -> str:
+    """Prefix-factored alternation, so the regex engine branches once per character."""
+    trie: Dict[str, Any] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# Single pass counts every keyword
+_KEYWORD_RE = re.compile(r"\b(" + _trie_pattern(SECURITY_KEYWORDS) + r")\b")
+_KEYWORD_INDEX = {kw: i for i, kw in enumerate(SECURITY_KEYWORDS)}
+
+# Path fragments that mark security-sensitive files, with their risk weight
+PATH_RISK_WEIGHTS = {
+    "auth": 1.0, "login": 0.9, "secret": 1.0, "credential": 1.0, ".env": 1.0,
+    "admin": 0.8, "password": 0.9, "token": 0.8, "session": 0.7, "crypto": 0.7,
+    "payment": 0.8, "wallet": 0.8, "trade": 0.7, "order": 0.5, "config": 0.6,
+    "settings": 0.5, "api": 0.4, "middleware": 0.4, "security": 0.8,
+}
+
+# Per-file analytics limits
+TOP_RISK_FILES = 10
+FILE_ANOMALY_THRESHOLD = 0.8
+
+
 def _token_count(text: str) -> int:
     return max(1, len(text.split()) + len(re.findall(r"\b\w+\b", text)) // 2)
 
@@ -42,14 +84,141 @@ def _entropy(s: str) -> float:
 
 
 def _keyword_counts(text: str) -> Dict[str, int]:
-    text_lower = text.lower()
-    counts = {}
-    for kw in SECURITY_KEYWORDS:
-        pattern = r"\b" + re.escape(kw) + r"\b"
-        counts[kw] = len(re.findall(pattern, text_lower))
+    counts = dict.fromkeys(SECURITY_KEYWORDS, 0)
+    counts.update(Counter(_KEYWORD_RE.findall(text.lower())))
     return counts
 
 
+def _byte_entropy(data: bytes) -> float:
+    """Shannon entropy over bytes (0-8), computed with a single bincount."""
+    if not data:
+        return 0.0
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    probs = counts[counts > 0] / len(data)
+    return float(-(probs * np.log2(probs)).sum())
+
+
+def _path_risk(path: str) -> float:
+    path_lower = path.lower()
+    return min(1.0, sum(w for k, w in PATH_RISK_WEIGHTS.items() if k in path_lower))
+
+
+def _robust_z(column: np.ndarray) -> np.ndarray:
+    """Median/MAD z-score per column; robust to the handful of outliers we look for."""
+    median = np.median(column, axis=0)
+    mad = np.median(np.abs(column - median), axis=0) * 1.4826
+    mad[mad == 0] = 1.0
+    return (column - median) / mad
+
+
+def build_file_feature_matrix(files: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build a sparse file x keyword matrix (CSR triplets) plus dense size,
+    entropy and path-risk columns for a CODE_REPOSITORY artifact.
+    """
+    indptr = [0]
+    indices: List[int] = []
+    data: List[int] = []
+    sizes = np.zeros(len(files), dtype=np.float64)
+    entropies = np.zeros(len(files), dtype=np.float64)
+    path_risk = np.zeros(len(files), dtype=np.float64)
+    tokens = np.ones(len(files), dtype=np.float64)
+
+    for row, f in enumerate(files):
+        text = f.get("content", "") or ""
+        raw = text.encode("utf-8", errors="ignore")
+        for kw, c in Counter(_KEYWORD_RE.findall(text.lower())).items():
+            indices.append(_KEYWORD_INDEX[kw])
+            data.append(c)
+        indptr.append(len(indices))
+        sizes[row] = len(raw)
+        entropies[row] = _byte_entropy(raw)
+        path_risk[row] = _path_risk(f.get("path", ""))
+        tokens[row] = max(1, text.count(" ") + text.count("\n"))
+
+    return {
+        "paths": [f.get("path", "") for f in files],
+        "columns": list(SECURITY_KEYWORDS),
+        "indptr": np.asarray(indptr, dtype=np.int64),
+        "indices": np.asarray(indices, dtype=np.int64),
+        "data": np.asarray(data, dtype=np.float64),
+        "size": sizes,
+        "entropy": entropies,
+        "path_risk": path_risk,
+        "tokens": tokens,
+    }
+
+
+def score_file_matrix(matrix: Dict[str, Any]) -> np.ndarray:
+    """Per-file anomaly score in [0, 1] from the feature matrix, computed column-wise."""
+    n = len(matrix["paths"])
+    if n == 0:
+        return np.zeros(0)
+    dense = np.zeros((n, len(matrix["columns"])), dtype=np.float64)
+    rows = np.repeat(np.arange(n), np.diff(matrix["indptr"]))
+    dense[rows, matrix["indices"]] = matrix["data"]
+
+    # Keyword hits per 1k tokens, so large files are not anomalous by size alone
+    density = dense.sum(axis=1) / matrix["tokens"] * 1000
+    features = np.column_stack([density, np.log1p(matrix["size"]), matrix["entropy"]])
+    z = np.clip(_robust_z(features), 0, None) if n > 2 else np.zeros_like(features)
+    raw = z @ np.array([0.5, 0.2, 0.3]) + 2.0 * matrix["path_risk"] + np.log1p(density) * 0.5
+    return 1.0 - np.exp(-raw / 3.0)
+
+
+def per_file_analytics(artifact: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Batched per-file analytics for CODE_REPOSITORY artifacts. None for other types."""
+    files = artifact.get("content", {}).get("files", [])
+    if not files:
+        return None
+
+    start = time.perf_counter()
+    matrix = build_file_feature_matrix(files)
+    scores = score_file_matrix(matrix)
+    order = np.argsort(-scores, kind="stable")
+    hits = np.diff(matrix["indptr"])
+
+    top = []
+    for i in order[:TOP_RISK_FILES]:
+        kw_slice = slice(matrix["indptr"][i], matrix["indptr"][i + 1])
+        kw = sorted(
+            zip(matrix["indices"][kw_slice], matrix["data"][kw_slice]), key=lambda x: -x[1]
+        )[:5]
+        top.append({
+            "path": matrix["paths"][i],
+            "score": round(float(scores[i]), 3),
+            "keyword_hits": int(matrix["data"][kw_slice].sum()),
+            "distinct_keywords": int(hits[i]),
+            "top_keywords": [matrix["columns"][k] for k, _ in kw],
+            "size": int(matrix["size"][i]),
+            "entropy": round(float(matrix["entropy"][i]), 2),
+            "path_risk": round(float(matrix["path_risk"][i]), 2),
+        })
+
+    return {
+        "file_count": len(files),
+        "top_risk_files": top,
+        "file_scores": {matrix["paths"][i]: round(float(scores[i]), 3) for i in order},
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def per_file_anomaly_signal(file_analytics: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Surface the highest-scoring files as ML signals."""
+    if not file_analytics:
+        return []
+    return [
+        {
+            "type": "file_anomaly",
+            "subtype": "per_file_risk",
+            "confidence": min(0.95, f["score"]),
+            "evidence": f"{f['path']} score={f['score']} ({', '.join(f['top_keywords']) or 'path risk'})",
+        }
+        for f in file_analytics["top_risk_files"]
+        if f["score"] >= FILE_ANOMALY_THRESHOLD
+    ]
+
+
 def complexity_anomaly_signal(artifact: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Artifact Complexity & Size Anomaly detection."""
     signals = []
@@ -199,6 +368,8 @@ def run_ml_analytics(artifact: Dict[str, Any]) -> Dict[str, Any]:
     signals.extend(complexity_anomaly_signal(artifact))
     signals.extend(security_pattern_frequency_signal(artifact))
     signals.extend(github_specific_signal(artifact))
+    file_analytics = per_file_analytics(artifact)
+    signals.extend(per_file_anomaly_signal(file_analytics))
 
     # Enrich with analytics for frontend charts
     content = artifact.get("content", {})
@@ -221,7 +392,7 @@ def run_ml_analytics(artifact: Dict[str, Any]) -> Dict[str, Any]:
         else: confidence_buckets["0.9-1.0"] += 1
     histogram_data = [{"range": k, "count": v} for k, v in confidence_buckets.items()]
 
-    return {
+    output = {
         "engine": "local_ml",
         "artifact_id": artifact_id,
         "signals": signals,
@@ -233,3 +404,8 @@ def run_ml_analytics(artifact: Dict[str, Any]) -> Dict[str, Any]:
             "avg_confidence": round(sum(s.get("confidence", 0) for s in signals) / len(signals), 3) if signals else 0,
         },
     }
+    if file_analytics:
+        output["file_analytics"] = file_analytics
+    if raw_text:
+        output["fingerprint"] = artifact_fingerprint(raw_text)
+    return output
@@ -0,0 +1,279 @@
+"""
+Near-duplicate artifact detection.
+MinHash signatures over normalized word shingles, indexed with banded LSH so
+slightly edited re-submissions (new timestamps, re-exported PDFs, one changed
+file) can reuse the report of an earlier analysis.
+"""
+import re
+import zlib
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.report_store import report_store
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32
+_CHUNK = 4096  # shingles per vectorized block, bounds temporary memory
+
+_rng = np.random.default_rng(0x5E17)
+# Fixed permutation parameters: signatures must stay comparable across restarts
+_PERM_A = _rng.integers(1, 2**32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 2**31, size=NUM_PERM, dtype=np.uint64)
+
+_TOKEN_RE = re.compile(r"\w+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """32-bit hashes of word n-grams. Digits are masked so timestamps/ids don't break matches."""
+    tokens = _TOKEN_RE.findall(_DIGITS_RE.sub("0", text.lower()))
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64)
+    if len(tokens) < SHINGLE_SIZE:
+        grams = [" ".join(tokens)]
+    else:
+        grams = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM x uint32) of a text."""
+    sig = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    hashes = _shingle_hashes(text)
+    for start in range(0, len(hashes), _CHUNK):
+        block = hashes[start:start + _CHUNK]
+        permuted = (np.outer(_PERM_A, block) + _PERM_B[:, None]) % _PRIME
+        np.minimum(sig, permuted.min(axis=1), out=sig)
+    return (sig & _MAX_HASH).astype(np.uint32)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures.
+    Each band is a sorted uint64 key array (searchsorted lookup) plus a small
+    dict for recent inserts that is merged in once it grows, so memory stays
+    at ~12 bytes per band entry even at millions of stored artifacts. Removed
+    keys are tombstoned and the arrays are rebuilt once tombstones outnumber
+    live entries.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = 16, merge_every: int = 50_000):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.merge_every = merge_every
+        self._fold = np.random.default_rng(0xB4D5).integers(1, 2**63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._reset()
+
+    def _reset(self) -> None:
+        self._keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._alive = np.zeros(1024, dtype=bool)
+        self._signatures = np.zeros((1024, self.num_perm), dtype=np.uint32)
+        self._band_keys = [np.zeros(0, dtype=np.uint64) for _ in range(self.bands)]
+        self._band_ids = [np.zeros(0, dtype=np.uint32) for _ in range(self.bands)]
+        self._pending: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+        self._pending_count = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def _hash_bands(self, signatures: np.ndarray) -> np.ndarray:
+        """(n, num_perm) signatures -> (n, bands) uint64 band keys (wrapping multiply-add)."""
+        shaped = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return (shaped * self._fold).sum(axis=2)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._signatures):
+            return
+        size = max(needed, len(self._signatures) * 2)
+        grown = np.zeros((size, self.num_perm), dtype=np.uint32)
+        grown[:len(self._keys)] = self._signatures[:len(self._keys)]
+        self._signatures = grown
+        alive = np.zeros(size, dtype=bool)
+        alive[:len(self._keys)] = self._alive[:len(self._keys)]
+        self._alive = alive
+
+    def add_many(self, keys: List[str], signatures: np.ndarray) -> None:
+        """Bulk insert; rows of `signatures` align with `keys`."""
+        if not keys:
+            return
+        for key in keys:
+            if key in self._ids:
+                self.remove(key)
+        start = len(self._keys)
+        self._grow(start + len(keys))
+        self._signatures[start:start + len(keys)] = signatures
+        self._alive[start:start + len(keys)] = True
+        self._ids.update((key, start + i) for i, key in enumerate(keys))
+        self._keys.extend(keys)
+        band_keys = self._hash_bands(signatures)
+        ids = np.arange(start, start + len(keys), dtype=np.uint32)
+        if len(keys) >= self.merge_every:
+            for b in range(self.bands):
+                self._merge_band(b, band_keys[:, b], ids)
+            return
+        for b in range(self.bands):
+            pending = self._pending[b]
+            for k, i in zip(band_keys[:, b].tolist(), ids.tolist()):
+                pending.setdefault(k, []).append(i)
+        self._pending_count += len(keys)
+        if self._pending_count >= self.merge_every:
+            self._flush_pending()
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        self.add_many([key], np.asarray(signature, dtype=np.uint32).reshape(1, -1))
+
+    def remove(self, key: str) -> None:
+        i = self._ids.pop(key, None)
+        if i is None:
+            return
+        self._alive[i] = False
+        dead = len(self._keys) - len(self._ids)
+        if dead >= 1024 and dead > len(self._ids):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild from the live entries, dropping tombstones."""
+        live = np.flatnonzero(self._alive[:len(self._keys)])
+        keys = [self._keys[i] for i in live.tolist()]
+        signatures = self._signatures[live]
+        self._reset()
+        if keys:
+            self._grow(len(keys))
+            self.add_many(keys, signatures)
+            self._flush_pending()
+
+    def _merge_band(self, b: int, new_keys: np.ndarray, new_ids: np.ndarray) -> None:
+        keys = np.concatenate([self._band_keys[b], new_keys])
+        ids = np.concatenate([self._band_ids[b], new_ids])
+        order = np.argsort(keys, kind="stable")
+        self._band_keys[b], self._band_ids[b] = keys[order], ids[order]
+
+    def _flush_pending(self) -> None:
+        for b, pending in enumerate(self._pending):
+            if not pending:
+                continue
+            ks = np.fromiter((k for k, v in pending.items() for _ in v), dtype=np.uint64)
+            ids = np.fromiter((i for v in pending.values() for i in v), dtype=np.uint32)
+            self._merge_band(b, ks, ids)
+            self._pending[b] = {}
+        self._pending_count = 0
+
+    def candidates(self, signature: np.ndarray) -> set:
+        band_keys = self._hash_bands(np.asarray(signature, dtype=np.uint32).reshape(1, -1))[0]
+        found = set()
+        for b, k in enumerate(band_keys.tolist()):
+            found.update(self._pending[b].get(k, ()))
+            sorted_keys = self._band_keys[b]
+            lo = np.searchsorted(sorted_keys, np.uint64(k), side="left")
+            hi = np.searchsorted(sorted_keys, np.uint64(k), side="right")
+            if hi > lo:
+                found.update(self._band_ids[b][lo:hi].tolist())
+        return found
+
+    def query(self, signature: np.ndarray, threshold: float) -> List[Tuple[str, float]]:
+        """Stored keys whose estimated Jaccard similarity >= threshold, best first."""
+        ids = self.candidates(signature)
+        if not ids:
+            return []
+        idx = np.fromiter(ids, dtype=np.int64, count=len(ids))
+        idx = idx[self._alive[idx]]
+        sims = (self._signatures[idx] == np.asarray(signature, dtype=np.uint32)).mean(axis=1)
+        keep = sims >= threshold
+        ranked = sorted(zip(idx[keep].tolist(), sims[keep].tolist()), key=lambda x: -x[1])
+        return [(self._keys[i], s) for i, s in ranked]
+
+
+class NearDuplicateCache:
+    """
+    LSH index of analyzed artifacts plus a bounded map of their reports for reuse.
+    Reports evicted from the map are fetched through `fallback` (the report store);
+    the index itself keeps the newest `max_indexed` artifacts (only `max_reports`
+    without a fallback).
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_reports: int,
+        fallback: Optional[Callable[[str], Any]] = None,
+        max_indexed: int = 0,
+    ):
+        self.threshold = threshold
+        self.max_reports = max_reports
+        self.fallback = fallback
+        self.max_indexed = max(max_reports, max_indexed) if fallback is not None else max_reports
+        self.index = LSHIndex()
+        self._reports: "OrderedDict[str, Any]" = OrderedDict()
+        self._indexed: "OrderedDict[str, None]" = OrderedDict()
+
+    def lookup(self, fingerprint: Dict[str, Any]) -> Optional[Tuple[Any, float]]:
+        """Best stored report whose artifact is a near-duplicate, with its similarity."""
+        sig = np.asarray(fingerprint.get("minhash") or [], dtype=np.uint32)
+        if sig.size != NUM_PERM:
+            return None
+        for key, sim in self.index.query(sig, self.threshold):
+            report = self._reports.get(key)
+            if report is not None:
+                self._reports.move_to_end(key)
+                return report, sim
+            if self.fallback is not None:
+                report = self.fallback(key)
+                if report is not None:
+                    return report, sim
+        return None
+
+    def remember(self, fingerprint: Dict[str, Any], report: Any) -> None:
+        sig = np.asarray(fingerprint.get("minhash") or [], dtype=np.uint32)
+        if sig.size != NUM_PERM:
+            return
+        key = report.id
+        self.index.add(key, sig)
+        self._indexed[key] = None
+        self._indexed.move_to_end(key)
+        self._reports[key] = report
+        while len(self._reports) > self.max_reports:
+            self._reports.popitem(last=False)
+        while len(self._indexed) > self.max_indexed:
+            evicted, _ = self._indexed.popitem(last=False)
+            self.index.remove(evicted)
+            self._reports.pop(evicted, None)
+
+
+def artifact_fingerprint(text: str) -> Dict[str, Any]:
+    """Exact content hash plus MinHash signature, attached to ML analytics output."""
+    return {
+        "content_hash": content_hash(text),
+        "minhash": minhash_signature(text).tolist(),
+    }
+
+
+near_duplicates = NearDuplicateCache(
+    threshold=settings.NEAR_DUP_THRESHOLD,
+    max_reports=settings.NEAR_DUP_MAX_REPORTS,
+    fallback=report_store.get_reusable if settings.REPORT_STORE_ENABLED else None,
+    max_indexed=settings.NEAR_DUP_MAX_INDEXED,
+)
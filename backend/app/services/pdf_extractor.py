@@ -3,6 +3,7 @@ PDF Artifact Extraction Pipeline
 Extracts text, sections, tables from PDFs for analysis by all agents.
 """
 import io
+import re
 import uuid
 import logging
 from typing import Dict, Any, List, Optional
@@ -100,16 +101,24 @@ def extract_from_url(url: str) -> Optional[Dict[str, Any]]:
         raise
 
 
+# Checked in order; whole words only ("log" must not match "login" or "catalog")
+SOURCE_TYPE_PATTERNS = {
+    "architecture": re.compile(r"\b(?:architecture|microservices?|api gateway|data flows?)\b"),
+    "logs": re.compile(r"\b(?:errors?|exceptions?|logs?|traces?|debug)\b"),
+    "documentation": re.compile(r"\b(?:endpoints?|requests?|responses?|openapi|swagger)\b"),
+}
+
+
+def _source_type_matches(text: str) -> List[str]:
+    """Every document type whose keywords appear in the text, in SOURCE_TYPE_PATTERNS order."""
+    text_lower = text.lower()
+    return [source_type for source_type, pattern in SOURCE_TYPE_PATTERNS.items() if pattern.search(text_lower)]
+
+
 def _infer_source_type(text: str) -> str:
     """Infer document type from content."""
-    text_lower = text.lower()
-    if any(k in text_lower for k in ["architecture", "microservice", "api gateway", "data flow"]):
-        return "architecture"
-    if any(k in text_lower for k in ["error", "exception", "log", "trace", "debug"]):
-        return "logs"
-    if any(k in text_lower for k in ["endpoint", "request", "response", "openapi", "swagger"]):
-        return "documentation"
-    return "unknown"
+    matches = _source_type_matches(text)
+    return matches[0] if matches else "unknown"
 
 
 def pdf_to_agent_content(normalized: Dict[str, Any]) -> str:
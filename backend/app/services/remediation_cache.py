@@ -0,0 +1,89 @@
+"""
+Remediation plan cache.
+Keyed by a normalized fingerprint of a finding (type, severity, location
+pattern, code snippet hash) so recurring findings reuse earlier advice
+instead of another LLM round trip. Findings with neither a location nor a
+snippet are also keyed by their description, so unrelated findings of the
+same type never share a plan.
+"""
+import re
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from app.core.config import settings
+from app.models.schemas import AgentFinding
+from app.services.finding_dedup import normalize_type, normalize_location
+
+logger = logging.getLogger(__name__)
+
+_SNIPPET_RE = re.compile(r"`{1,3}([^`]+)`{1,3}")
+
+
+def _snippet_hash(finding: AgentFinding) -> str:
+    """Hash of inline code quoted in the finding, whitespace-normalized; '' when there is none."""
+    snippets = _SNIPPET_RE.findall(f"{finding.description or ''}\n{finding.suggestion or ''}")
+    if not snippets:
+        return ""
+    normalized = " ".join(" ".join(s.split()) for s in snippets)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _text_hash(text: Optional[str]) -> str:
+    return hashlib.sha1(" ".join((text or "").lower().split()).encode()).hexdigest()[:12]
+
+
+def finding_fingerprint(finding: AgentFinding) -> str:
+    severity = getattr(finding.severity, "value", str(finding.severity or "info")).lower()
+    location = normalize_location(finding.location, keep_lines=False)
+    snippet = _snippet_hash(finding)
+    parts = [normalize_type(finding.finding_type), severity, location, snippet]
+    if not location and not snippet:
+        # Generic location ("N/A", "document") and no code: type + severity alone says too little
+        parts.append(_text_hash(finding.description))
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+class RemediationCache:
+    """In-memory LRU with TTL. Values are plan dicts: finding_type, description, suggestion."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, plan: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, plan)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+remediation_cache = RemediationCache(
+    max_entries=settings.REMEDIATION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.REMEDIATION_CACHE_TTL_S,
+)
@@ -0,0 +1,93 @@
+"""
+Deferred remediation.
+Reports can be returned before remediation is generated; the plan is then
+computed in the background or on first access and memoized per report.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.models.schemas import AgentFinding
+
+logger = logging.getLogger(__name__)
+
+RemediationFactory = Callable[[], Awaitable[List[AgentFinding]]]
+
+
+class RemediationJobs:
+    """Per-report remediation: pending factory -> running task -> memoized result (bounded LRU)."""
+
+    def __init__(self, max_reports: int = 1000):
+        self.max_reports = max_reports
+        self._pending: "OrderedDict[str, RemediationFactory]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._results: "OrderedDict[str, List[AgentFinding]]" = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+
+    def _resolve(self, report_id: str) -> str:
+        return self._aliases.get(report_id, report_id)
+
+    def register(self, report_id: str, factory: RemediationFactory, start: bool = False) -> None:
+        """Record how to build a report's remediation; `start` schedules it immediately."""
+        self._pending[report_id] = factory
+        while len(self._pending) > self.max_reports:
+            self._pending.popitem(last=False)
+        if start:
+            self._start(report_id)
+
+    def alias(self, report_id: str, source_id: str) -> None:
+        """Serve `report_id` from another report's remediation (near-duplicate reuse)."""
+        source_id = self._resolve(source_id)
+        if source_id != report_id and self.status(source_id) != "unknown":
+            self._aliases[report_id] = source_id
+            while len(self._aliases) > self.max_reports:
+                self._aliases.pop(next(iter(self._aliases)))
+
+    def _start(self, report_id: str) -> Optional[asyncio.Task]:
+        task = self._tasks.get(report_id)
+        if task is not None:
+            return task
+        factory = self._pending.pop(report_id, None)
+        if factory is None:
+            return None
+        task = asyncio.create_task(self._run(report_id, factory))
+        self._tasks[report_id] = task
+        return task
+
+    async def _run(self, report_id: str, factory: RemediationFactory) -> List[AgentFinding]:
+        try:
+            findings = await factory()
+        except Exception as e:
+            logger.error(f"Deferred remediation failed for {report_id}: {e}")
+            findings = []
+        self._results[report_id] = findings
+        while len(self._results) > self.max_reports:
+            self._results.popitem(last=False)
+        self._tasks.pop(report_id, None)
+        return findings
+
+    def status(self, report_id: str) -> str:
+        report_id = self._resolve(report_id)
+        if report_id in self._results:
+            return "ready"
+        if report_id in self._tasks:
+            return "running"
+        if report_id in self._pending:
+            return "pending"
+        return "unknown"
+
+    async def get(self, report_id: str) -> Optional[List[AgentFinding]]:
+        """Remediation findings for a report, generating them on first access. None if unknown."""
+        report_id = self._resolve(report_id)
+        if report_id in self._results:
+            self._results.move_to_end(report_id)
+            return self._results[report_id]
+        task = self._start(report_id)
+        if task is None:
+            return None
+        # Shield so a disconnecting client doesn't cancel work other callers share
+        return await asyncio.shield(task)
+
+
+remediation_jobs = RemediationJobs()
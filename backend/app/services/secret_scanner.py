@@ -0,0 +1,89 @@
+"""
+Local secret detector.
+Regex signatures for well-known credential formats plus an entropy check on
+values assigned to secret-like names. No network, no LLM.
+"""
+import re
+import math
+from collections import Counter
+from typing import Dict, Any, List
+
+# (name, pattern, confidence)
+SECRET_PATTERNS = [
+    ("aws_access_key", re.compile(r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b"), 0.95),
+    ("github_token", re.compile(r"\bgh[pousr]_[A-Za-z0-9]{36,}\b"), 0.95),
+    ("slack_token", re.compile(r"\bxox[abprs]-[A-Za-z0-9-]{10,}\b"), 0.95),
+    ("openai_key", re.compile(r"\bsk-(?:or-v1-|proj-)?[A-Za-z0-9_-]{20,}\b"), 0.9),
+    ("google_api_key", re.compile(r"\bAIza[0-9A-Za-z_-]{35}\b"), 0.9),
+    ("private_key", re.compile(r"-----BEGIN (?:RSA |EC |DSA |OPENSSH |PGP )?PRIVATE KEY-----"), 0.99),
+    ("jwt", re.compile(r"\beyJ[A-Za-z0-9_-]{10,}\.eyJ[A-Za-z0-9_-]{10,}\.[A-Za-z0-9_-]{10,}\b"), 0.85),
+    ("connection_string", re.compile(r"\b[a-z][a-z0-9+]*://[^\s:/@]+:[^\s@/]{3,}@[^\s/]+", re.I), 0.85),
+]
+
+# name = "value" style assignments to secret-like identifiers
+_ASSIGNMENT_RE = re.compile(
+    r"""(?i)\b([\w.-]*(?:password|passwd|pwd|secret|token|api[_-]?key|apikey|access[_-]?key|private[_-]?key|client[_-]?secret)[\w.-]*)"""
+    r"""\s*[:=]\s*["']([^"'\s]{8,})["']"""
+)
+# Cheap prefilter; lines without any of these cannot match the patterns above
+_HINT_RE = re.compile(r"AKIA|ASIA|gh[pousr]_|xox|sk-|AIza|PRIVATE KEY|eyJ|://|[:=]")
+_PLACEHOLDER_RE = re.compile(r"(?i)^(?:your|change|example|dummy|test|xxx|<|\$\{|\{\{|os\.|env|none|null|\*+$)")
+
+ENTROPY_THRESHOLD = 3.5
+MAX_FINDINGS = 200
+
+
+def shannon_entropy(s: str) -> float:
+    if not s:
+        return 0.0
+    probs = [c / len(s) for c in Counter(s).values()]
+    return -sum(p * math.log2(p) for p in probs)
+
+
+def _redact(value: str) -> str:
+    return value[:4] + "…" + f"({len(value)} chars)" if len(value) > 4 else "…"
+
+
+def scan_line(line: str) -> List[Dict[str, Any]]:
+    """Secrets on a single line: [{"type", "confidence", "preview"}]."""
+    hits: List[Dict[str, Any]] = []
+    if not _HINT_RE.search(line):
+        return hits
+    for name, pattern, conf in SECRET_PATTERNS:
+        for m in pattern.finditer(line):
+            hits.append({"type": name, "confidence": conf, "preview": _redact(m.group(0))})
+    for m in _ASSIGNMENT_RE.finditer(line):
+        value = m.group(2)
+        if _PLACEHOLDER_RE.match(value):
+            continue
+        entropy = shannon_entropy(value)
+        if entropy >= ENTROPY_THRESHOLD:
+            hits.append({
+                "type": "high_entropy_assignment",
+                "confidence": round(min(0.9, 0.5 + (entropy - ENTROPY_THRESHOLD) * 0.2), 2),
+                "preview": f"{m.group(1)}={_redact(value)}",
+            })
+        else:
+            hits.append({"type": "hardcoded_credential", "confidence": 0.6, "preview": f"{m.group(1)}={_redact(value)}"})
+    return hits
+
+
+def secret_offsets(line: str) -> List[int]:
+    """Start offsets of the secrets scan_line reports, for clipping long lines around them."""
+    if not _HINT_RE.search(line):
+        return []
+    offsets = [m.start() for _, pattern, _ in SECRET_PATTERNS for m in pattern.finditer(line)]
+    offsets += [m.start() for m in _ASSIGNMENT_RE.finditer(line) if not _PLACEHOLDER_RE.match(m.group(2))]
+    return sorted(set(offsets))
+
+
+def scan_secrets(text: str) -> List[Dict[str, Any]]:
+    """Scan text line by line. Findings carry 1-based line numbers; values are redacted."""
+    findings: List[Dict[str, Any]] = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        for hit in scan_line(line):
+            hit["line"] = lineno
+            findings.append(hit)
+            if len(findings) >= MAX_FINDINGS:
+                return findings
+    return findings
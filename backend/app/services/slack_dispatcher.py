@@ -0,0 +1,261 @@
+"""
+Async Slack dispatcher.
+The request path only enqueues; per-channel workers deliver. Each channel is
+paced by a token bucket, honours Retry-After on 429s, and coalesces SOC
+alerts: the first alert after a quiet window goes out at once, alerts that
+arrive within DIGEST_WINDOW of the last one are sent together as a single
+build_soc_alert digest. Pending items are bounded; overflow is dropped and
+counted. slack_sdk's WebClient is synchronous, so posts run in worker threads.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from app.core.config import settings
+from app.services.slack_formatter import build_soc_alert
+from app.services import slack_service
+
+logger = logging.getLogger(__name__)
+
+RISK_ORDER = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+
+# Blocking post of one message (dict with text/blocks) to a channel
+PostFn = Callable[[str, Dict[str, Any]], None]
+
+
+class TokenBucket:
+    def __init__(self, rate_per_s: float, burst: int):
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        """Slack said Retry-After: no sends on this channel until then."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate_per_s)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate_per_s)
+
+
+class _Channel:
+    def __init__(self, name: str, rate_per_s: float, burst: int):
+        self.name = name
+        self.alerts: List[Dict[str, Any]] = []
+        self.messages: Deque[Dict[str, Any]] = deque()
+        self.last_alert_flush = float("-inf")
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SlackDispatcher:
+    def __init__(
+        self,
+        post_fn: PostFn,
+        max_pending: int,
+        rate_per_s: float,
+        burst: int,
+        digest_window_s: float,
+        max_retries: int,
+        drain_timeout_s: float,
+    ):
+        self.post_fn = post_fn
+        self.max_pending = max_pending
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.digest_window_s = digest_window_s
+        self.max_retries = max_retries
+        self.drain_timeout_s = drain_timeout_s
+        self._channels: Dict[str, _Channel] = {}
+        self._pending = 0
+        self._stopping = False
+        self.sent = 0
+        self.digests = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return slack_service.get_client() is not None
+
+    def _channel(self, name: str) -> _Channel:
+        ch = self._channels.get(name)
+        if ch is None:
+            ch = self._channels[name] = _Channel(name, self.rate_per_s, self.burst)
+        if ch.task is None or ch.task.done():
+            ch.task = asyncio.get_running_loop().create_task(self._drain(ch))
+        return ch
+
+    def _admit(self, what: str) -> bool:
+        if self._stopping:
+            logger.warning(f"Slack dispatcher stopping, {what} dropped")
+            self.dropped += 1
+            return False
+        if not self.enabled:
+            logger.warning("SLACK_BOT_TOKEN not set. Slack notifications disabled.")
+            return False
+        if self._pending >= self.max_pending:
+            logger.warning(f"Slack queue full ({self.max_pending}), {what} dropped")
+            self.dropped += 1
+            return False
+        return True
+
+    def enqueue_alert(
+        self,
+        artifact_type: str,
+        risk_level: str,
+        confidence: float,
+        agent_consensus_summary: str,
+        derived_from: Optional[str] = None,
+        channel: Optional[str] = None,
+    ) -> bool:
+        """Queue a SOC alert (build_soc_alert arguments); it may be merged into a digest. Never blocks."""
+        channel = channel or slack_service.default_channel()
+        if not channel:
+            logger.warning("SLACK_CHANNEL_ID not set. Slack notifications disabled.")
+            return False
+        if not self._admit("alert"):
+            return False
+        ch = self._channel(channel)
+        ch.alerts.append({
+            "artifact_type": artifact_type,
+            "risk_level": risk_level,
+            "confidence": confidence,
+            "agent_consensus_summary": agent_consensus_summary,
+            "derived_from": derived_from,
+        })
+        self._pending += 1
+        ch.wake.set()
+        return True
+
+    def enqueue_message(self, channel: str, message: Dict[str, Any]) -> bool:
+        """Queue a ready message (text/blocks); delivered as-is, in order. Never blocks."""
+        if not self._admit("message"):
+            return False
+        ch = self._channel(channel)
+        ch.messages.append(message)
+        self._pending += 1
+        ch.wake.set()
+        return True
+
+    async def send_now(self, channel: str, message: Dict[str, Any]) -> bool:
+        """Deliver one message and wait for the outcome (same pacing and retries as queued ones)."""
+        if not self.enabled:
+            return False
+        return await self._deliver(self._channel(channel), message)
+
+    def _digest(self, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        ranked = sorted(alerts, key=lambda a: (RISK_ORDER.get(a["risk_level"].upper(), 4), -a["confidence"]))
+        if len(ranked) > 1:
+            self.digests += 1
+            self.coalesced += len(ranked) - 1
+        return build_soc_alert(**ranked[0], related=ranked[1:] or None)
+
+    async def _drain(self, ch: _Channel) -> None:
+        while True:
+            if not ch.alerts and not ch.messages:
+                if self._stopping:
+                    return
+                ch.wake.clear()
+                await ch.wake.wait()
+                continue
+            if ch.messages:
+                message = ch.messages.popleft()
+                self._pending -= 1
+            else:
+                wait = ch.last_alert_flush + self.digest_window_s - time.monotonic()
+                if wait > 0 and not self._stopping:
+                    ch.wake.clear()
+                    try:
+                        # Woken early by a new item: re-check (ready messages go first)
+                        await asyncio.wait_for(ch.wake.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                alerts, ch.alerts = ch.alerts, []
+                self._pending -= len(alerts)
+                ch.last_alert_flush = time.monotonic()
+                message = self._digest(alerts)
+            await self._deliver(ch, message)
+
+    async def _deliver(self, ch: _Channel, message: Dict[str, Any]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            await ch.bucket.acquire()
+            try:
+                await asyncio.to_thread(self.post_fn, ch.name, message)
+                self.sent += 1
+                return True
+            except SlackApiError as e:
+                if e.response is None or e.response.status_code != 429:
+                    logger.error(f"Slack error on {ch.name}: {e}")
+                    break
+                retry_after = float(e.response.headers.get("Retry-After", 1))
+                self.rate_limited += 1
+                logger.warning(f"Slack rate limited on {ch.name}, retrying in {retry_after:.0f}s")
+                ch.bucket.pause(retry_after)
+            except Exception as e:
+                logger.error(f"Slack post to {ch.name} failed (attempt {attempt + 1}): {e}")
+                ch.bucket.pause(min(2 ** attempt, 30))
+        self.failed += 1
+        return False
+
+    async def start(self) -> None:
+        self._stopping = False
+
+    async def stop(self) -> None:
+        """Flush pending alerts (no digest wait) and deliver what fits in drain_timeout_s."""
+        self._stopping = True
+        tasks = [ch.task for ch in self._channels.values() if ch.task is not None and not ch.task.done()]
+        for ch in self._channels.values():
+            ch.wake.set()
+        if not tasks:
+            return
+        done, still_running = await asyncio.wait(tasks, timeout=self.drain_timeout_s)
+        for task in still_running:
+            task.cancel()
+        if still_running:
+            logger.warning(f"Slack dispatcher stopped with {self._pending} undelivered items")
+            self.dropped += self._pending
+            self._pending = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._pending,
+            "channels": len(self._channels),
+            "sent": self.sent,
+            "digests": self.digests,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "failed": self.failed,
+        }
+
+
+slack_dispatcher = SlackDispatcher(
+    post_fn=slack_service.post_message,
+    max_pending=settings.SLACK_QUEUE_SIZE,
+    rate_per_s=settings.SLACK_RATE_PER_S,
+    burst=settings.SLACK_BURST,
+    digest_window_s=settings.SLACK_DIGEST_WINDOW_S,
+    max_retries=settings.SLACK_MAX_RETRIES,
+    drain_timeout_s=settings.SLACK_DRAIN_TIMEOUT_S,
+)
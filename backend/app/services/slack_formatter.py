@@ -1,7 +1,14 @@
 """
 Slack message formatter - converts risk decision into SOC-style Slack alert using Block Kit.
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+# Digest lines beyond this are summarized as "...and N more" (Block Kit section text limit)
+MAX_RELATED_LINES = 20
+
+
+def _risk_emoji(risk_level: str) -> str:
+    return "🔴" if risk_level.upper() in ("CRITICAL", "HIGH") else "🟠" if risk_level.upper() == "MEDIUM" else "🟢"
 
 
 def build_soc_alert(
@@ -10,21 +17,24 @@ def build_soc_alert(
     confidence: float,
     agent_consensus_summary: str,
     derived_from: Optional[str] = None,
+    related: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
     """
     Build a SOC-style Slack alert message.
+    `related` (other alerts' build_soc_alert kwargs) turns it into a digest: this
+    alert as the headline, the others listed below it.
     Output shape: { "text": "...", "blocks": [...] }
     """
-    risk_emoji = "🔴" if risk_level.upper() in ("CRITICAL", "HIGH") else "🟠" if risk_level.upper() == "MEDIUM" else "🟢"
+    risk_emoji = _risk_emoji(risk_level)
     conf_pct = int(confidence * 100)
 
-    text = "🚨 Security Risk Detected"
+    text = f"🚨 {len(related) + 1} Security Risks Detected" if related else "🚨 Security Risk Detected"
     derived_line = f"Derived from: {derived_from}" if derived_from else "Derived from: Text/Code/Logs"
 
     blocks = [
         {
             "type": "header",
-            "text": {"type": "plain_text", "text": "🚨 Security Risk Detected", "emoji": True},
+            "text": {"type": "plain_text", "text": text, "emoji": True},
         },
         {"type": "section", "fields": [
             {"type": "mrkdwn", "text": f"*Artifact Type*\n{artifact_type or 'Unknown'}"},
@@ -38,4 +48,16 @@ def build_soc_alert(
             "text": {"type": "mrkdwn", "text": f"*Agent Consensus Summary*\n{agent_consensus_summary or 'N/A'}"},
         },
     ]
+    if related:
+        lines = [
+            f"• {_risk_emoji(a['risk_level'])} *{a['risk_level']}* {a.get('artifact_type') or 'Unknown'} "
+            f"({int(a['confidence'] * 100)}%): {(a.get('agent_consensus_summary') or 'N/A')[:100]}"
+            for a in related[:MAX_RELATED_LINES]
+        ]
+        if len(related) > MAX_RELATED_LINES:
+            lines.append(f"…and {len(related) - MAX_RELATED_LINES} more")
+        blocks += [
+            {"type": "divider"},
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*Also raised in this window*\n" + "\n".join(lines)}},
+        ]
     return {"text": text, "blocks": blocks}
@@ -1,10 +1,12 @@
 """
-Slack service - sends SOC alert messages only.
-No business logic or agent logic.
+Slack service - Slack Web API transport only.
+No business logic or agent logic; queuing, pacing and digests live in
+app/services/slack_dispatcher.py.
 """
 import os
 import logging
 from pathlib import Path
+from typing import Optional
 
 try:
     from dotenv import load_dotenv
@@ -25,28 +27,26 @@ def _get_client():
 _client = None
 
 
-def send_soc_alert(message: dict) -> bool:
-    """Send a SOC alert to Slack. Handles failures safely (log, don't crash)."""
+def get_client() -> Optional[WebClient]:
+    """Shared WebClient, or None when SLACK_BOT_TOKEN is not set."""
     global _client
     if _client is None:
         _client = _get_client()
-    if not _client:
-        logger.warning("SLACK_BOT_TOKEN not set. Slack notifications disabled.")
-        return False
+    return _client
 
+
+def default_channel() -> Optional[str]:
     from app.core.config import settings
-    channel = settings.SLACK_CHANNEL_ID or os.getenv("SLACK_CHANNEL_ID")
-    if not channel:
-        logger.warning("SLACK_CHANNEL_ID not set. Slack notifications disabled.")
-        return False
-
-    try:
-        _client.chat_postMessage(
-            channel=channel,
-            text=message.get("text", "Security alert"),
-            blocks=message.get("blocks", []),
-        )
-        return True
-    except Exception as e:
-        logger.error(f"Slack error: {e}", exc_info=True)
-        return False
+    return settings.SLACK_CHANNEL_ID or os.getenv("SLACK_CHANNEL_ID")
+
+
+def post_message(channel: str, message: dict) -> None:
+    """Blocking chat.postMessage; raises SlackApiError (429 carries Retry-After) and network errors."""
+    client = get_client()
+    if client is None:
+        raise RuntimeError("SLACK_BOT_TOKEN not set")
+    client.chat_postMessage(
+        channel=channel,
+        text=message.get("text", "Security alert"),
+        blocks=message.get("blocks") or None,
+    )
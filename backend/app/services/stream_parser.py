@@ -0,0 +1,87 @@
+"""
+Incremental parser for streamed LLM output.
+Feeds on completion deltas and emits each element of the "findings" array
+(or of a top-level array) as soon as its closing bracket arrives, so findings
+can be acted on before the model finishes generating.
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from app.services.json_repair import parse_llm_json
+
+logger = logging.getLogger(__name__)
+
+_FINDINGS_KEY_RE = re.compile(r'"findings"\s*:\s*$')
+_KEY_LOOKBACK = 40
+
+
+class FindingsStreamParser:
+    """Character-level scanner; `feed` returns the elements completed by that chunk."""
+
+    def __init__(self):
+        self.buffer: List[str] = []
+        self._in_str = False
+        self._escaped = False
+        self._depth = 0
+        self._array_depth: Optional[int] = None  # depth inside the findings array
+        self._element_start: Optional[int] = None
+        self.emitted = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        done: List[Dict[str, Any]] = []
+        for ch in chunk:
+            self.buffer.append(ch)
+            if self._in_str:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_str = False
+                continue
+            if ch == '"':
+                self._in_str = True
+            elif ch in "{[":
+                if ch == "[" and self._array_depth is None and self._opens_findings():
+                    self._array_depth = self._depth + 1
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._element_start = len(self.buffer) - 1
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._element_start is not None and self._depth == self._array_depth:
+                    element = self._decode("".join(self.buffer[self._element_start:]))
+                    self._element_start = None
+                    if element is not None:
+                        done.append(element)
+                elif ch == "]" and self._array_depth is not None and self._depth < self._array_depth:
+                    self._array_depth = -1  # array closed; nothing more to stream
+        self.emitted += len(done)
+        return done
+
+    def _opens_findings(self) -> bool:
+        before = "".join(self.buffer[-_KEY_LOOKBACK - 1:-1])
+        return self._depth == 0 or bool(_FINDINGS_KEY_RE.search(before))
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            value, _ = parse_llm_json(text)
+        return value if isinstance(value, dict) else None
+
+    def remainder(self) -> List[Dict[str, Any]]:
+        """
+        After the stream ends: items that were never emitted incrementally (non-array
+        shapes, or output that only parses after repair). Empty if streaming emitted any.
+        """
+        if self.emitted:
+            return []
+        data, _ = parse_llm_json("".join(self.buffer))
+        if isinstance(data, dict):
+            findings = data.get("findings")
+            data = findings if isinstance(findings, list) else [data]
+        return [d for d in data or [] if isinstance(d, dict)]
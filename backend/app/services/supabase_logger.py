@@ -1,14 +1,26 @@
 """
 Supabase vulnerability logger service.
-Logs vulnerability findings to Supabase database for audit trail and analysis.
+Logs vulnerability findings to the audit store (Supabase by default, see
+app/db/audit_store.py) for audit trail and analysis. Rows get client-side ids
+and, while the write-behind writer is running, are buffered and bulk-inserted
+off the request path.
 """
+import uuid
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
-from app.db.supabase_client import supabase
+from app.core.config import settings
+from app.db.audit_store import get_audit_store
+from app.services.audit_writer import audit_writer
+from app.services.history_cache import history_cache
 
 logger = logging.getLogger(__name__)
 
+def _write_behind() -> bool:
+    # Async-only stores (Postgres) always go through the writer
+    return (settings.AUDIT_WRITE_BEHIND and audit_writer.running) or not get_audit_store().supports_sync
+
+
 def log_vulnerability(
     artifact: str,
     risk: str,
@@ -18,9 +30,10 @@ def log_vulnerability(
     summary: Optional[str] = None,
     status: Optional[str] = None,
     overall_score: Optional[int] = None,
+    reused_from: Optional[str] = None,
 ) -> Optional[Dict]:
     """
-    Log a vulnerability to Supabase.
+    Log a vulnerability to the audit store.
     
     Args:
         artifact: Type of artifact analyzed (e.g., "PDF_DOCUMENT", "CODE", "GITHUB")
@@ -29,14 +42,16 @@ def log_vulnerability(
         agent_votes: Dictionary of agent names and their severity assessments
         artifact_id: Optional artifact ID
         summary: Optional summary of the analysis
-        status: Optional status (e.g., "GO", "NO-GO")
+        status: Optional status (e.g., "GO", "NO-GO", "REVIEW_REQUIRED")
         overall_score: Optional overall security score
+        reused_from: Optional id of the earlier report this result was reused from
     
     Returns:
-        The inserted record or None if failed
+        The inserted (or queued) record or None if failed
     """
     try:
         data = {
+            "id": str(uuid.uuid4()),
             "artifact": artifact.upper(),
             "risk": risk.upper(),
             "confidence": confidence,
@@ -52,13 +67,21 @@ def log_vulnerability(
             data["status"] = status
         if overall_score is not None:
             data["overall_score"] = overall_score
-        
-        response = supabase.table("vulnerabilities").insert(data).execute()
-        logger.info(f"✅ Logged vulnerability to Supabase: {risk} risk for {artifact}")
-        return response.data[0] if response.data else None
+        if reused_from:
+            data["reused_from"] = reused_from
+        data["created_at"] = datetime.utcnow().isoformat()
+
+        if _write_behind():
+            audit_writer.enqueue("vulnerabilities", data)
+        else:
+            get_audit_store().insert_rows_sync("vulnerabilities", [data])
+            logger.info(f"✅ Logged vulnerability to the audit store: {risk} risk for {artifact}")
+        if settings.HISTORY_CACHE_ENABLED:
+            history_cache.on_write(data)
+        return data
     except Exception as e:
         # Log errors but don't break the main flow
-        logger.error(f"❌ Failed to log vulnerability to Supabase: {e}")
+        logger.error(f"❌ Failed to log vulnerability to the audit store: {e}")
         return None
 
 
@@ -67,27 +90,32 @@ def log_alert(
     channel: str = "slack",
 ) -> Optional[Dict]:
     """
-    Log an alert notification to Supabase.
+    Log an alert notification to the audit store.
     
     Args:
         vulnerability_id: UUID of the vulnerability that triggered the alert
         channel: Channel where alert was sent (default: "slack")
     
     Returns:
-        The inserted record or None if failed
+        The inserted (or queued) record or None if failed
     """
     try:
         data = {
+            "id": str(uuid.uuid4()),
             "vulnerability_id": vulnerability_id,
             "channel": channel,
             "sent_at": datetime.utcnow().isoformat(),
         }
-        
-        response = supabase.table("alerts").insert(data).execute()
-        logger.info(f"✅ Logged alert to Supabase for vulnerability {vulnerability_id}")
-        return response.data[0] if response.data else None
+
+        if _write_behind():
+            audit_writer.enqueue("alerts", data)
+            return data
+
+        get_audit_store().insert_rows_sync("alerts", [data])
+        logger.info(f"✅ Logged alert to the audit store for vulnerability {vulnerability_id}")
+        return data
     except Exception as e:
-        logger.error(f"❌ Failed to log alert to Supabase: {e}")
+        logger.error(f"❌ Failed to log alert to the audit store: {e}")
         return None
 
 
@@ -96,7 +124,7 @@ def get_vulnerabilities(
     risk_filter: Optional[str] = None,
 ) -> List[Dict]:
     """
-    Retrieve vulnerabilities from Supabase.
+    Retrieve vulnerabilities from the audit store.
     
     Args:
         limit: Maximum number of records to retrieve
@@ -106,13 +134,7 @@ def get_vulnerabilities(
         List of vulnerability records
     """
     try:
-        query = supabase.table("vulnerabilities").select("*").order("created_at", desc=True).limit(limit)
-        
-        if risk_filter:
-            query = query.eq("risk", risk_filter.upper())
-        
-        response = query.execute()
-        return response.data if response.data else []
+        return get_audit_store().get_vulnerabilities_sync(limit=limit, risk_filter=risk_filter)
     except Exception as e:
-        logger.error(f"❌ Failed to retrieve vulnerabilities from Supabase: {e}")
+        logger.error(f"❌ Failed to retrieve vulnerabilities from the audit store: {e}")
         return []
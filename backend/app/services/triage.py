@@ -0,0 +1,223 @@
+"""
+Local pre-LLM triage.
+Scores lines with the ML keyword matcher and the secret scanner, groups them
+into functions/sections, and keeps only the most security-relevant spans (with
+a little context) within each agent's token budget.
+"""
+import re
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.ml_analytics import _KEYWORD_RE
+from app.services.secret_scanner import scan_line, secret_offsets
+
+logger = logging.getLogger(__name__)
+
+# Extra emphasis per agent on top of the shared security keywords
+AGENT_FOCUS_PATTERNS = {
+    "threat": re.compile(r"(?i)\b(gateway|boundary|trust|ingress|egress|service|flow|public|internal|tls|cors|proxy|admin)\b"),
+    "security": re.compile(r"(?i)(\beval\b|\bexec\b|subprocess|os\.system|cursor\.|\.execute\(|innerHTML|pickle|yaml\.load|verify\s*=\s*False|md5|sha1\b)"),
+    "soc": re.compile(r"(?i)\b(error|fail(?:ed|ure)?|denied|unauthori[sz]ed|forbidden|blocked|attack|scan|brute|4\d\d|5\d\d|ip|login)\b"),
+}
+
+# Lines that open a new function, class, file or document section
+_BOUNDARY_RE = re.compile(
+    r"^\s*(?:(?:async\s+)?def |class |function |func |fn |(?:public|private|protected|static)\s|"
+    r"--- FILE:|## |\[[A-Z][A-Z _:-]+\])"
+)
+MAX_SEGMENT_LINES = 40
+SECRET_WEIGHT = 5.0
+FOCUS_WEIGHT = 0.5
+# Half-width (chars) of the window kept around each hit when a single line is over budget
+CLIP_RADIUS = 160
+CLIP_MARKER = " ...[clipped]... "
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars/token), same heuristic as PDF extraction."""
+    return len(text) // 4 + 1
+
+
+def _line_score(line: str, focus: Optional[re.Pattern]) -> float:
+    lower = line.lower()
+    score = float(len(_KEYWORD_RE.findall(lower)))
+    hits = scan_line(line)
+    if hits:
+        score += SECRET_WEIGHT * max(h["confidence"] for h in hits)
+    if focus is not None:
+        score += FOCUS_WEIGHT * len(focus.findall(line))
+    return score
+
+
+def _hit_offsets(line: str, focus: Optional[re.Pattern]) -> List[int]:
+    """Where a line scores: secrets first, then keywords, then agent focus terms."""
+    offsets = secret_offsets(line)
+    offsets += [m.start() for m in _KEYWORD_RE.finditer(line.lower())]
+    if focus is not None:
+        offsets += [m.start() for m in focus.finditer(line)]
+    return list(dict.fromkeys(offsets))
+
+
+def clip_line(line: str, offsets: List[int], budget_tokens: int) -> Optional[str]:
+    """Windows of `line` around `offsets` (in priority order) within the budget; the prefix when there are none."""
+    max_chars = (budget_tokens - 1) * 4
+    if max_chars <= len(CLIP_MARKER):
+        return None
+    if not offsets:
+        return line[:max_chars - len(CLIP_MARKER)] + CLIP_MARKER
+    windows: List[Tuple[int, int]] = []
+    chars = 0
+    for offset in offsets:
+        lo, hi = max(0, offset - CLIP_RADIUS), min(len(line), offset + CLIP_RADIUS)
+        if any(a <= offset < b for a, b in windows):
+            continue
+        room = max_chars - chars - 2 * len(CLIP_MARKER)
+        if room <= 0:
+            break
+        if hi - lo > room:
+            lo, hi = max(0, offset - room // 4), max(0, offset - room // 4) + room
+        windows.append((lo, min(hi, len(line))))
+        chars += windows[-1][1] - windows[-1][0] + len(CLIP_MARKER)
+    merged: List[List[int]] = []
+    for lo, hi in sorted(windows):
+        if merged and lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    parts = [line[lo:hi] for lo, hi in merged]
+    clipped = CLIP_MARKER.join(parts)
+    if merged and merged[0][0] > 0:
+        clipped = CLIP_MARKER.lstrip() + clipped
+    if merged and merged[-1][1] < len(line):
+        clipped += CLIP_MARKER.rstrip()
+    return clipped
+
+
+def score_spans(text: str, agent: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Split text into functions/sections and score each: [{"start", "end", "score"}] (line indices, end exclusive)."""
+    lines = text.splitlines()
+    focus = AGENT_FOCUS_PATTERNS.get(agent or "")
+    line_scores = [_line_score(l, focus) for l in lines]
+
+    spans: List[Dict[str, Any]] = []
+    start = 0
+    for i, line in enumerate(lines):
+        new_segment = i > start and (
+            _BOUNDARY_RE.match(line) or i - start >= MAX_SEGMENT_LINES or (not line.strip() and i - start >= 8)
+        )
+        if new_segment:
+            spans.append({"start": start, "end": i})
+            start = i
+    if lines:
+        spans.append({"start": start, "end": len(lines)})
+
+    for span in spans:
+        scores = line_scores[span["start"]:span["end"]]
+        # Peak line matters most; total adds weight for dense blocks
+        span["score"] = max(scores, default=0.0) * 2 + sum(scores) / max(1, len(scores)) ** 0.5
+        # Scoring lines, best first: what an oversized span is trimmed down to
+        span["hits"] = sorted(
+            (i for i in range(span["start"], span["end"]) if line_scores[i] > 0), key=lambda i: -line_scores[i]
+        )
+    return spans
+
+
+def select_spans(
+    text: str,
+    spans: List[Dict[str, Any]],
+    budget_tokens: int,
+    context_lines: int = 2,
+    agent: Optional[str] = None,
+) -> Tuple[str, int]:
+    """
+    Greedily keep the highest-scoring spans (plus context) within the budget, in original order.
+    A span that doesn't fit is trimmed to its hit lines (with context where it fits), and a hit
+    line over the remaining budget is clipped to windows around its hits; budget left over goes
+    to the head of the content. Returns the trimmed text and the number of spans kept.
+    """
+    lines = text.splitlines()
+    focus = AGENT_FOCUS_PATTERNS.get(agent or "")
+    keep = [False] * len(lines)
+    used = 0
+    kept_spans = 0
+
+    def clip(i: int, offsets: List[int]) -> bool:
+        nonlocal used
+        clipped = clip_line(lines[i], offsets, budget_tokens - used)
+        if clipped is None:
+            return False
+        lines[i] = clipped
+        keep[i] = True
+        used += estimate_tokens(clipped)
+        return True
+
+    def take(lo: int, hi: int) -> bool:
+        nonlocal used
+        cost = sum(estimate_tokens(lines[i]) for i in range(lo, hi) if not keep[i])
+        if used + cost > budget_tokens:
+            return False
+        for i in range(lo, hi):
+            keep[i] = True
+        used += cost
+        return True
+
+    # The first line usually carries the artifact header ([GitHub Repository: ...] etc.)
+    if lines:
+        take(0, 1)
+
+    for span in sorted(spans, key=lambda s: -s["score"]):
+        if span["score"] <= 0:
+            break
+        if take(max(0, span["start"] - context_lines), min(len(lines), span["end"] + context_lines)):
+            kept_spans += 1
+            continue
+        trimmed = False
+        for i in span.get("hits", []):
+            lo, hi = max(span["start"], i - context_lines), min(span["end"], i + context_lines + 1)
+            trimmed = take(lo, hi) or take(i, i + 1) or (not keep[i] and clip(i, _hit_offsets(lines[i], focus))) or trimmed
+        kept_spans += trimmed
+
+    # Unused budget: the head of the content, so the agent never gets only the header
+    for i in range(len(lines)):
+        if used >= budget_tokens:
+            break
+        if not keep[i] and not take(i, i + 1) and clip(i, []):
+            break  # an over-budget line clipped to its prefix fills the rest
+
+    out: List[str] = []
+    skipped = 0
+    for i, line in enumerate(lines):
+        if keep[i]:
+            if skipped:
+                out.append(f"... [{skipped} lines omitted by triage] ...")
+                skipped = 0
+            out.append(line)
+        else:
+            skipped += 1
+    if skipped:
+        out.append(f"... [{skipped} lines omitted by triage] ...")
+    return "\n".join(out), kept_spans
+
+
+def triage_content(text: str, budget_tokens: int, agent: Optional[str] = None, context_lines: int = 2) -> Dict[str, Any]:
+    """
+    Trim `text` to its security-relevant spans for one agent.
+    Content already within budget passes through untouched.
+    """
+    original = estimate_tokens(text)
+    if original <= budget_tokens:
+        return {"content": text, "original_tokens": original, "kept_tokens": original, "tokens_saved": 0, "trimmed": False}
+
+    spans = score_spans(text, agent)
+    trimmed, kept_spans = select_spans(text, spans, budget_tokens, context_lines, agent)
+    kept = estimate_tokens(trimmed)
+    logger.info(f"Triage ({agent or 'all'}): {original} -> {kept} tokens")
+    return {
+        "content": trimmed,
+        "original_tokens": original,
+        "kept_tokens": kept,
+        "tokens_saved": original - kept,
+        "trimmed": True,
+        "spans_kept": kept_spans,
+        "spans_total": len(spans),
+    }
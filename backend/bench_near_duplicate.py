@@ -0,0 +1,66 @@
+"""
+Benchmark near-duplicate index lookup latency at scale.
+Usage: python bench_near_duplicate.py [stored_artifacts]   (default 1,000,000)
+"""
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.near_duplicate import LSHIndex, NUM_PERM, minhash_signature, estimate_jaccard
+
+
+def main(n: int) -> None:
+    rng = np.random.default_rng(42)
+    index = LSHIndex()
+
+    print(f"Building index with {n:,} signatures...")
+    start = time.perf_counter()
+    batch = 100_000
+    for offset in range(0, n, batch):
+        size = min(batch, n - offset)
+        sigs = rng.integers(0, 2**32, size=(size, NUM_PERM), dtype=np.uint32)
+        index.add_many([f"artifact-{offset + i}" for i in range(size)], sigs)
+    print(f"  built in {time.perf_counter() - start:.1f}s")
+
+    # Near-duplicate queries: stored signatures with ~5% of positions perturbed
+    queries = 2000
+    picks = rng.integers(0, n, size=queries)
+    latencies = []
+    hits = 0
+    for i in picks:
+        sig = index._signatures[i].copy()
+        mask = rng.random(NUM_PERM) < 0.05
+        sig[mask] = rng.integers(0, 2**32, size=int(mask.sum()), dtype=np.uint32)
+        t = time.perf_counter()
+        result = index.query(sig, threshold=0.9)
+        latencies.append(time.perf_counter() - t)
+        hits += bool(result) and result[0][0] == f"artifact-{i}"
+    lat = np.array(latencies) * 1000
+    print(f"Near-duplicate lookups ({queries}): recall={hits / queries:.3f} "
+          f"p50={np.percentile(lat, 50):.3f}ms p99={np.percentile(lat, 99):.3f}ms")
+
+    # Miss path: unrelated signatures
+    latencies = []
+    for _ in range(queries):
+        sig = rng.integers(0, 2**32, size=NUM_PERM, dtype=np.uint32)
+        t = time.perf_counter()
+        index.query(sig, threshold=0.9)
+        latencies.append(time.perf_counter() - t)
+    lat = np.array(latencies) * 1000
+    print(f"Miss lookups ({queries}): p50={np.percentile(lat, 50):.3f}ms p99={np.percentile(lat, 99):.3f}ms")
+
+    # Signature cost on a realistic artifact
+    text = "2026-02-05 15:15:54 INFO auth login ok user=42 ip=10.0.0.7\n" * 2000
+    t = time.perf_counter()
+    a = minhash_signature(text)
+    elapsed = (time.perf_counter() - t) * 1000
+    b = minhash_signature(text.replace("15:15:54", "16:42:01"))
+    print(f"Signature of {len(text):,} chars: {elapsed:.1f}ms, jaccard vs re-timestamped copy={estimate_jaccard(a, b):.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
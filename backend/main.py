@@ -1,12 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import endpoints
 from app.api import internal
+from app.services.audit_writer import audit_writer
+from app.services.slack_dispatcher import slack_dispatcher
+from app.services.alert_suppression import alert_suppression
+from app.db.audit_store import get_audit_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.AUDIT_WRITE_BEHIND or not get_audit_store().supports_sync:
+        await audit_writer.start()
+    await slack_dispatcher.start()
+    alert_suppression.load()
+    yield
+    # Deliver queued Slack alerts, then flush buffered audit rows (spilling what can't be written)
+    await slack_dispatcher.stop()
+    alert_suppression.save()
+    await audit_writer.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -0,0 +1,48 @@
+"""
+Minimal OpenAI-compatible chat-completions stub for exercising the LLM endpoint pool locally.
+Usage: python stub_llm_server.py [--port 9001] [--latency 0.2] [--fail-rate 0.0]
+Point LLM_ENDPOINTS at it, e.g.
+  LLM_ENDPOINTS='[{"name":"a","base_url":"http://127.0.0.1:9001/v1"},{"name":"b","base_url":"http://127.0.0.1:9002/v1"}]'
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, HTTPException
+
+app = FastAPI()
+CONFIG = {"latency": 0.2, "fail_rate": 0.0, "port": 9001}
+
+STUB_FINDINGS = '{"findings": [{"finding_type": "Stub Finding", "description": "served by stub", "severity": "low", "location": "stub"}]}'
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    await asyncio.sleep(random.uniform(0.5, 1.5) * CONFIG["latency"])
+    if random.random() < CONFIG["fail_rate"]:
+        raise HTTPException(status_code=503, detail="stub failure")
+    system = (body.get("messages") or [{}])[0].get("content", "")
+    content = '{"overall_score": 80, "summary": "stub", "status": "GO"}' if "overall_score" in system else STUB_FINDINGS
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        "system_fingerprint": f"stub-{CONFIG['port']}",
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    CONFIG.update(latency=args.latency, fail_rate=args.fail_rate, port=args.port)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
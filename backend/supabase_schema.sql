@@ -12,14 +12,24 @@ CREATE TABLE IF NOT EXISTS vulnerabilities (
     summary TEXT,
     status TEXT,
     overall_score INT4,
+    reused_from TEXT,  -- report id when an earlier analysis was reused (exact or near-duplicate)
     created_at TIMESTAMP DEFAULT NOW()
 );
+ALTER TABLE vulnerabilities ADD COLUMN IF NOT EXISTS reused_from TEXT;
 
--- Create index on risk level for filtering
-CREATE INDEX IF NOT EXISTS idx_vulnerabilities_risk ON vulnerabilities(risk);
+-- History is paged by keyset on (created_at, id), newest first; each filter
+-- gets a composite index that ends in the same order so pages are index seeks
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_created_at_id ON vulnerabilities(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_risk_created_at ON vulnerabilities(risk, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_status_created_at ON vulnerabilities(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_artifact_created_at ON vulnerabilities(artifact, created_at DESC, id DESC);
 
--- Create index on created_at for ordering
-CREATE INDEX IF NOT EXISTS idx_vulnerabilities_created_at ON vulnerabilities(created_at DESC);
+-- Create index on overall_score for score-range filters
+CREATE INDEX IF NOT EXISTS idx_vulnerabilities_score ON vulnerabilities(overall_score);
+
+-- Superseded by the composite indexes above
+DROP INDEX IF EXISTS idx_vulnerabilities_risk;
+DROP INDEX IF EXISTS idx_vulnerabilities_created_at;
 
 -- Table 2: alerts
 CREATE TABLE IF NOT EXISTS alerts (
@@ -31,3 +41,42 @@ CREATE TABLE IF NOT EXISTS alerts (
 
 -- Create index on vulnerability_id for lookups
 CREATE INDEX IF NOT EXISTS idx_alerts_vulnerability_id ON alerts(vulnerability_id);
+
+-- Table 3: risk_rollups
+-- Hourly and daily trend buckets, incremented by the backend on every
+-- vulnerabilities insert (increment_risk_rollups below) so dashboards read
+-- O(buckets) rows. The primary key doubles as the (granularity, time range) index.
+CREATE TABLE IF NOT EXISTS risk_rollups (
+    granularity TEXT NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    risk TEXT NOT NULL,
+    status TEXT NOT NULL,
+    artifact TEXT NOT NULL,
+    count INT8 NOT NULL DEFAULT 0,
+    score_sum INT8 NOT NULL DEFAULT 0,
+    score_count INT8 NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, risk, status, artifact)
+);
+
+-- Adds a batch of per-bucket deltas (computed client-side per insert batch)
+CREATE OR REPLACE FUNCTION increment_risk_rollups(deltas JSONB) RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO risk_rollups (granularity, bucket_start, risk, status, artifact, count, score_sum, score_count)
+    SELECT d.granularity, d.bucket_start, d.risk, d.status, d.artifact, d.count, d.score_sum, d.score_count
+    FROM jsonb_to_recordset(deltas) AS d(
+        granularity TEXT, bucket_start TIMESTAMP, risk TEXT, status TEXT, artifact TEXT,
+        count INT8, score_sum INT8, score_count INT8
+    )
+    ON CONFLICT (granularity, bucket_start, risk, status, artifact) DO UPDATE SET
+        count = risk_rollups.count + EXCLUDED.count,
+        score_sum = risk_rollups.score_sum + EXCLUDED.score_sum,
+        score_count = risk_rollups.score_count + EXCLUDED.score_count;
+$$;
+
+-- One-time backfill for existing history (run once, before the backend starts writing rollups)
+INSERT INTO risk_rollups (granularity, bucket_start, risk, status, artifact, count, score_sum, score_count)
+SELECT g.granularity, date_trunc(g.granularity, v.created_at), v.risk, COALESCE(v.status, 'UNKNOWN'), v.artifact,
+       COUNT(*), COALESCE(SUM(v.overall_score), 0), COUNT(v.overall_score)
+FROM vulnerabilities v CROSS JOIN (VALUES ('hour'), ('day')) AS g(granularity)
+WHERE NOT EXISTS (SELECT 1 FROM risk_rollups)
+GROUP BY 1, 2, 3, 4, 5;
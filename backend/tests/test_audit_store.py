@@ -0,0 +1,31 @@
+import base64
+import json
+import uuid
+
+import pytest
+
+from app.db.audit_store import decode_cursor, encode_cursor
+
+
+def _raw_cursor(created_at, row_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, row_id]).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = {"created_at": "2026-01-02T03:04:05.123456", "id": str(uuid.uuid4())}
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+
+
+@pytest.mark.parametrize("created_at,row_id", [
+    ("2026-01-02T03:04:05,id.gt.0)", str(uuid.uuid4())),
+    ("2026-01-02T03:04:05", "x),risk.eq.LOW"),
+    ("not a time", str(uuid.uuid4())),
+])
+def test_malformed_cursor_is_rejected(created_at, row_id):
+    with pytest.raises(ValueError):
+        decode_cursor(_raw_cursor(created_at, row_id))
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("%%%not-base64")
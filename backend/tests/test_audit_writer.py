@@ -0,0 +1,102 @@
+import asyncio
+import json
+import uuid
+
+from app.db.audit_store import HistoryQuery, SQLiteAuditStore
+from app.services.audit_writer import AuditWriter
+
+
+def _vulnerability(**kw):
+    row = {
+        "id": str(uuid.uuid4()), "artifact": "CODE", "risk": "HIGH", "confidence": 0.9, "agent_votes": {},
+        "status": "NO-GO", "overall_score": 40, "created_at": "2026-01-01T10:00:00",
+    }
+    row.update(kw)
+    return row
+
+
+def _writer(insert_fn, tmp_path, **kw):
+    return AuditWriter(
+        insert_fn=insert_fn, flush_rows=100, flush_interval_s=60, max_buffer=kw.pop("max_buffer", 100),
+        spill_path=str(tmp_path / "spill.jsonl"), dead_letter_path=str(tmp_path / "dead.jsonl"), **kw,
+    )
+
+
+def test_retry_after_an_ambiguous_failure_does_not_duplicate(tmp_path):
+    store = SQLiteAuditStore(str(tmp_path / "audit.db"))
+    calls = []
+
+    def insert(table, rows):
+        calls.append(len(rows))
+        store.insert_rows_sync(table, rows)
+        if len(calls) == 1:
+            raise TimeoutError("committed, but the response was lost")
+
+    writer = _writer(insert, tmp_path)
+    writer.enqueue("vulnerabilities", _vulnerability())
+    asyncio.run(writer.flush())
+    assert writer.buffered() == 1 and writer.flush_errors == 1
+    asyncio.run(writer.flush())
+    assert writer.buffered() == 0
+    assert len(store.query_vulnerabilities_sync(HistoryQuery(limit=10))) == 1
+    [rollup] = store.query_rollups_sync("day", "2026-01-01T00:00:00", "2026-01-02T00:00:00")
+    assert rollup["count"] == 1
+
+
+def test_poison_row_is_dead_lettered_after_max_attempts(tmp_path):
+    stored = []
+    poison = _vulnerability(risk=None)
+
+    def insert(table, rows):
+        if any(r["risk"] is None for r in rows):
+            raise ValueError("risk is required")
+        stored.extend(rows)
+
+    writer = _writer(insert, tmp_path, max_attempts=3)
+    good = _vulnerability()
+    writer.enqueue("vulnerabilities", good)
+    writer.enqueue("vulnerabilities", poison)
+    for _ in range(3):
+        asyncio.run(writer.flush())
+    assert writer.buffered() == 0
+    assert [r["id"] for r in stored] == [good["id"]]
+    assert writer.dead_lettered == 1
+    [line] = (tmp_path / "dead.jsonl").read_text().splitlines()
+    assert json.loads(line)["row"]["id"] == poison["id"]
+
+
+def test_alerts_wait_for_their_vulnerabilities(tmp_path):
+    written = []
+    fail = [True]
+
+    def insert(table, rows):
+        if table == "vulnerabilities" and fail[0]:
+            raise ConnectionError("down")
+        written.append(table)
+
+    writer = _writer(insert, tmp_path)
+    vulnerability = _vulnerability()
+    writer.enqueue("vulnerabilities", vulnerability)
+    writer.enqueue("alerts", {"id": str(uuid.uuid4()), "vulnerability_id": vulnerability["id"], "channel": "slack"})
+    asyncio.run(writer.flush())
+    assert written == [] and writer.buffered() == 2
+    fail[0] = False
+    asyncio.run(writer.flush())
+    assert written == ["vulnerabilities", "alerts"]
+
+
+def test_overflow_spills_and_is_replayed_on_start(tmp_path):
+    stored = []
+    writer = _writer(lambda table, rows: stored.extend(rows), tmp_path, max_buffer=1)
+    writer.enqueue("vulnerabilities", _vulnerability())
+    writer.enqueue("vulnerabilities", _vulnerability())
+    assert writer.buffered() == 1 and writer.spilled == 1
+    asyncio.run(writer.flush())
+
+    async def restart():
+        await writer.start()
+        await writer.stop()
+
+    asyncio.run(restart())
+    assert len(stored) == 2
+    assert not (tmp_path / "spill.jsonl").exists()
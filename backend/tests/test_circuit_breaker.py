@@ -0,0 +1,62 @@
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _tripped(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=3, reset_timeout_s=30)
+    for _ in range(3):
+        breaker.record_failure()
+    return breaker
+
+
+def test_consecutive_failures_open_the_circuit(clock):
+    breaker = CircuitBreaker("llm", failure_threshold=3, reset_timeout_s=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker = _tripped(clock)
+    assert breaker.state == OPEN and breaker.trips == 1
+    assert not breaker.allow_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def test_half_open_admits_a_single_probe(clock):
+    breaker = _tripped(clock)
+    clock[0] += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.check()  # the probe's own calls go through
+
+
+def test_probe_success_closes_and_failure_reopens(clock):
+    breaker = _tripped(clock)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.trips == 2
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow_request()
+
+
+def test_stale_probe_is_replaced(clock):
+    breaker = _tripped(clock)
+    clock[0] += 30
+    assert breaker.allow_request()
+    clock[0] += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,17 @@
+from app.services.content_router import route_content
+
+
+def _routed(text):
+    return [agent for agent, view in route_content("pdf_document", text).items() if view]
+
+
+def test_pdf_keywords_match_whole_words():
+    assert _routed("Login flow and product catalog technology overview") == ["threat", "security", "soc"]
+
+
+def test_mixed_pdf_goes_to_every_agent():
+    assert _routed("Architecture of the api gateway. Errors are logged.") == ["threat", "security", "soc"]
+
+
+def test_single_type_pdf_is_routed():
+    assert _routed("2024-01-01 ERROR connection refused\n2024-01-01 exception in worker") == ["soc"]
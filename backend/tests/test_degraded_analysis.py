@@ -0,0 +1,17 @@
+from app.models.schemas import AgentFinding
+from app.services.degraded_analysis import REVIEW_REQUIRED, local_risk_evaluation
+
+
+def _finding(severity):
+    return AgentFinding(agent_name="Logic Auditor", finding_type="t", description="d", severity=severity, location="x")
+
+
+def test_local_risk_evaluation_never_approves():
+    assert local_risk_evaluation([_finding("low")], "s")["status"] == REVIEW_REQUIRED
+    assert local_risk_evaluation([], "s")["status"] == REVIEW_REQUIRED
+
+
+def test_local_risk_evaluation_blocks_severe_findings():
+    evaluation = local_risk_evaluation([_finding("high")], "s")
+    assert evaluation["status"] == "NO-GO"
+    assert evaluation["overall_score"] == 85
@@ -0,0 +1,8 @@
+from app.services.escalation_policy import EscalationPolicy, should_notify_slack
+
+
+def test_notify_levels_are_normalized():
+    policy = EscalationPolicy(notify_levels=["high", " Critical ", ""])
+    assert policy.notify_levels == ["HIGH", "CRITICAL"]
+    assert should_notify_slack("HIGH", 0.9, {}, policy)
+    assert not should_notify_slack("LOW", 0.9, {}, policy)
@@ -0,0 +1,53 @@
+from app.models.schemas import AgentFinding
+from app.services.finding_dedup import _tfidf_cosine, _tokens, dedupe_findings
+
+
+def _finding(agent: str, location: str, finding_type: str = "SQL Injection") -> AgentFinding:
+    return AgentFinding(
+        agent_name=agent,
+        finding_type=finding_type,
+        description="User input is concatenated into a SQL query",
+        severity="high",
+        location=location,
+    )
+
+
+def test_generic_location_does_not_bridge_specific_ones():
+    findings = [
+        _finding("Security Agent", "app/orders.py:10"),
+        _finding("Threat Agent", "codebase"),
+        _finding("SOC Agent", "app/users.py:88"),
+    ]
+    merged, stats = dedupe_findings(findings)
+    assert stats["output"] == 2
+    assert sorted(f.location for f in merged) == ["app/orders.py:10", "app/users.py:88"]
+
+
+def test_lines_and_agents_are_kept_apart():
+    same_file = [_finding("Security Agent", "app/orders.py:10"), _finding("Threat Agent", "app/orders.py:42")]
+    assert dedupe_findings(same_file)[1]["output"] == 2
+    same_agent = [_finding("Security Agent", "app/orders.py:10"), _finding("Security Agent", "app/orders.py")]
+    assert dedupe_findings(same_agent)[1]["output"] == 2
+
+
+def test_cross_agent_duplicates_merge():
+    findings = [_finding("Security Agent", "app/orders.py:10"), _finding("Threat Agent", "app/orders.py")]
+    merged, stats = dedupe_findings(findings)
+    assert stats["output"] == 1
+    assert merged[0].location == "app/orders.py:10"
+    assert merged[0].contributing_agents == ["Security Agent", "Threat Agent"]
+
+
+def test_every_member_must_match():
+    def finding(agent, finding_type, description):
+        return AgentFinding(agent_name=agent, finding_type=finding_type, description=description, severity="high", location="app/api.py")
+
+    findings = [
+        finding("Security Agent", "Injection", "user input reaches the sql query and the shell command"),
+        finding("Threat Agent", "Query Injection", "user input reaches the sql query"),
+        finding("SOC Agent", "Command Injection", "user input reaches the shell command"),
+    ]
+    # A~B and A~C, but B and C are different issues
+    sims = _tfidf_cosine([_tokens(f"{f.finding_type} {f.finding_type} {f.description}") for f in findings])
+    assert sims[0, 1] >= 0.5 and sims[0, 2] >= 0.5 and sims[1, 2] < 0.5
+    assert dedupe_findings(findings)[1]["output"] == 2
@@ -0,0 +1,9 @@
+from app.db.audit_store import HistoryQuery
+from app.services.history_cache import row_matches
+
+
+def test_offset_timestamps_compare_in_utc():
+    row = {"created_at": "2026-03-01T02:30:00+05:30", "risk": "HIGH"}
+    # 02:30+05:30 is 21:00 UTC the previous day
+    assert row_matches(HistoryQuery(since="2026-02-28T20:00:00", until="2026-02-28T22:00:00"), row)
+    assert not row_matches(HistoryQuery(since="2026-03-01T00:00:00"), row)
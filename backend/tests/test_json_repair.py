@@ -0,0 +1,23 @@
+from app.services.json_repair import parse_llm_json
+
+
+def test_partial_array_element_is_dropped():
+    value, repaired = parse_llm_json('{"findings":[{"a":1,"b":"x"},{"a":2,')
+    assert repaired
+    assert value == {"findings": [{"a": 1, "b": "x"}]}
+
+
+def test_partial_nested_element_is_dropped():
+    value, _ = parse_llm_json('{"findings":[{"a":1},{"a":2,"tags":["x",')
+    assert value == {"findings": [{"a": 1}]}
+
+
+def test_truncated_after_complete_element_keeps_it():
+    value, repaired = parse_llm_json('```json\n{"findings":[{"a":1},{"a":2}],')
+    assert repaired
+    assert value == {"findings": [{"a": 1}, {"a": 2}]}
+
+
+def test_truncated_top_level_object_keeps_complete_keys():
+    value, _ = parse_llm_json('{"overall_score": 70, "summary": "ok", "status": "GO", "extra": "unterm')
+    assert value == {"overall_score": 70, "summary": "ok", "status": "GO"}
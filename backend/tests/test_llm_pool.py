@@ -0,0 +1,38 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.llm_pool import LLMEndpoint, LLMPool
+
+
+def _pool():
+    endpoint = LLMEndpoint("test", "http://localhost:1", "key", max_concurrency=1)
+
+    async def create(model, messages, **kw):
+        async def chunks():
+            for text in ("a", "b", "c"):
+                yield SimpleNamespace(text=text)
+        return chunks()
+
+    endpoint.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return LLMPool([endpoint]), endpoint
+
+
+def test_stream_holds_the_slot_until_consumed():
+    async def run():
+        pool, endpoint = _pool()
+        stream = await pool.create(model="m", messages=[], stream=True)
+        assert endpoint.outstanding == 1 and endpoint._slots.locked()
+        assert [c.text async for c in stream] == ["a", "b", "c"]
+        assert endpoint.outstanding == 0 and not endpoint._slots.locked()
+    asyncio.run(run())
+
+
+def test_closing_an_abandoned_stream_releases_the_slot():
+    async def run():
+        pool, endpoint = _pool()
+        stream = await pool.create(model="m", messages=[], stream=True)
+        await stream.__anext__()
+        await stream.aclose()
+        await stream.aclose()
+        assert endpoint.outstanding == 0 and not endpoint._slots.locked()
+    asyncio.run(run())
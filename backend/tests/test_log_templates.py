@@ -0,0 +1,29 @@
+from app.services.log_templates import LogTemplateMiner, mine_logs
+
+
+def test_top_values_are_kept_per_slot():
+    lines = [f"WARN Failed password for user=root from 10.0.0.{5 if i % 10 else 9} port {1000 + i}" for i in range(50)]
+    miner = LogTemplateMiner()
+    miner.add_lines(lines)
+    [template] = miner.stats()["top_templates"]
+    values = dict(template["values"])
+    assert values[4] == [("root", 50)]
+    assert values[6][:2] == [("10.0.0.5", 45), ("10.0.0.9", 5)]
+
+
+def test_summary_lists_slot_values():
+    lines = [f"Accepted login for user=alice from 192.168.1.{i % 2}" for i in range(20)]
+    summary = mine_logs("\n".join(lines))["summary"]
+    assert "alice x20" in summary
+    assert "192.168.1.0 x10" in summary
+
+
+def test_late_heavy_hitter_survives_a_full_slot():
+    lines = [f"Failed login from 10.1.{i // 250}.{i % 250}" for i in range(1500)]
+    lines += ["Failed login from 6.6.6.6"] * 5000
+    miner = LogTemplateMiner()
+    miner.add_lines(lines)
+    [template] = miner.stats()["top_templates"]
+    value, count = dict(template["values"])[3][0]
+    assert value == "6.6.6.6"
+    assert count >= 5000
@@ -0,0 +1,21 @@
+from app.models.schemas import AgentFinding
+from app.services.remediation_cache import finding_fingerprint
+
+
+def _finding(description, location="N/A"):
+    return AgentFinding(
+        agent_name="Threat Modeler", finding_type="Missing Encryption", description=description,
+        severity="high", location=location, suggestion="",
+    )
+
+
+def test_generic_location_without_snippet_keys_on_description():
+    a = _finding("Payments DB stores card numbers in plain text", location="document")
+    b = _finding("Backups of the HR share are unencrypted")
+    assert finding_fingerprint(a) != finding_fingerprint(b)
+
+
+def test_specific_location_still_shares_a_plan():
+    a = _finding("Card numbers stored in plain text", location="app/db.py:12")
+    b = _finding("PANs are not encrypted at rest", location="app/db.py:40")
+    assert finding_fingerprint(a) == finding_fingerprint(b)
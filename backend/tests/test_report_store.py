@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from app.db.report_store import ReportStore
+from app.models.schemas import SecurityReport
+
+
+def _report(report_id, **kw):
+    return SecurityReport(id=report_id, timestamp=datetime.utcnow(), overall_score=90, findings=[], summary="s", status="GO", **kw)
+
+
+def test_partial_and_degraded_reports_are_not_reusable(tmp_path):
+    store = ReportStore(str(tmp_path / "reports.db"), cache_size=1)
+    store.put(_report("full"))
+    store.put(_report("partial", partial=True, missing_agents=["risk"]))
+    store.put(_report("degraded", degraded=True))
+    assert store.get_reusable("full") is not None
+    assert store.get_reusable("partial") is None
+    assert store.get_reusable("degraded") is None
+    assert store.get("partial") is not None
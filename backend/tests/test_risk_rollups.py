@@ -0,0 +1,8 @@
+from app.db.risk_rollups import rollup_deltas
+
+
+def test_offset_timestamps_are_bucketed_in_utc():
+    row = {"created_at": "2026-03-01T02:30:00+05:30", "risk": "HIGH", "status": "NO-GO", "artifact": "CODE", "overall_score": 50}
+    buckets = {d["granularity"]: d["bucket_start"] for d in rollup_deltas([row])}
+    assert buckets["hour"] == "2026-02-28T21:00:00"
+    assert buckets["day"] == "2026-02-28T00:00:00"
@@ -0,0 +1,34 @@
+from app.services.triage import triage_content
+
+
+def test_oversized_span_is_trimmed_to_its_hit_lines():
+    text = (
+        "[Header]\ndef load():\n"
+        + "    blob = '" + "a" * 4000 + "'\n"
+        + "    password='hunter2xyz'\n    return blob\n"
+        + "\n".join(f"line {i} plain text" for i in range(200))
+    )
+    result = triage_content(text, 300, "security")
+    assert "hunter2xyz" in result["content"]
+    assert result["kept_tokens"] <= 320
+
+
+def test_unused_budget_goes_to_the_head():
+    text = "[Header]\n" + "\n".join(f"row {i} nothing here" for i in range(20000))
+    result = triage_content(text, 500, "security")
+    assert "row 0 nothing here" in result["content"]
+    assert result["kept_tokens"] > 400
+
+
+def test_single_long_line_is_clipped_to_the_budget():
+    text = "x" * 140000
+    result = triage_content(text, 8000, "security")
+    assert result["trimmed"]
+    assert 7000 < result["kept_tokens"] <= 8000
+
+
+def test_long_line_is_clipped_around_its_secret():
+    text = "var a=1;" * 20000 + 'var password="hunter2xyz";' + "var b=2;" * 20000
+    result = triage_content(text, 500, "security")
+    assert "hunter2xyz" in result["content"]
+    assert result["kept_tokens"] <= 500